@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import pathlib
+import argparse
+
+import aiohttp
+
+BENCH_DIR = pathlib.Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT_DIR / "xerox"))
+
+import disnake  # noqa: E402
+
+import fakecord  # noqa: E402
+from Util import Configuration  # noqa: E402
+
+
+def load_config(args: argparse.Namespace, state: dict) -> "Configuration.MasterConfig":
+    path = args.config if args.config.exists() else ROOT_DIR / "config" / "master.json.example"
+    values = json.loads(path.read_text())
+    guild = state["guilds"][0]
+    values.update(
+        {
+            "ADMIN_GUILD": int(guild["id"]),
+            "EMOJI_GUILD": int(guild["id"]),
+            "EMOJI": {},
+            "BOT_LOG_CHANNEL": int(guild["channels"][0]),
+            "METRICS_PORT": args.metrics_port,
+            "MEMORY_PROFILE": args.memory_profile,
+        }
+    )
+    if args.cogs:
+        values["COGS"] = args.cogs
+    return Configuration.MasterConfig.from_dict(values, 0.0)
+
+
+async def seed_database(state: dict, monitors: int, batch: bool) -> list[tuple[int, int]]:
+    from Database import DBConnector
+    guild = state["guilds"][0]
+    guild_id = int(guild["id"])
+    channels = [int(c) for c in guild["channels"]]
+    pairs = list(zip(channels[2::2], channels[3::2]))[:monitors]
+    if len(pairs) < monitors:
+        raise SystemExit(f"Need {2 + 2 * monitors} channels for {monitors} monitors, the fake guild has {len(channels)}.")
+
+    await DBConnector.db.imagemonitor.delete_many(where={"guild": guild_id})
+    for from_channel, to_channel in pairs:
+        await DBConnector.db.imagemonitor.create(
+            data={
+                "guild": guild_id,
+                "from_channel": from_channel,
+                "to_channel": to_channel,
+                "limit": 10,
+                "success_msg": "Image moved successfully",
+                "batch": batch,
+            }
+        )
+    await DBConnector.fetch_guild_config(guild_id)
+    await DBConnector.db.guildconfig.update(where={"guild": guild_id}, data={"guild_log": channels[1]})
+    DBConnector.invalidate_guild_config(guild_id)
+    return pairs
+
+
+async def wait_for(predicate, timeout: float, interval: float = 0.1) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await predicate():
+            return True
+        await asyncio.sleep(interval)
+    return False
+
+
+async def drive(session: aiohttp.ClientSession, url: str, pairs: list[tuple[int, int]], args: argparse.Namespace):
+    interval = 1 / args.rate if args.rate > 0 else 0
+    start = time.perf_counter()
+    for i in range(args.messages):
+        if interval:
+            await asyncio.sleep(max(0.0, start + i * interval - time.perf_counter()))
+        from_channel, _ = pairs[i % len(pairs)]
+        async with session.post(f"{url}/_control/messages", json={"channel_id": from_channel, "attachments": args.attachments, "size": args.size, "dispatch": not args.backlog}) as response:
+            response.raise_for_status()
+    if args.backlog:
+        async def registered() -> bool:
+            async with session.get(f"{url}/_control/state") as response:
+                return any("img-mon-config" in commands for commands in (await response.json())["commands"].values())
+        if not await wait_for(registered, args.startup_timeout):
+            raise SystemExit("The img-mon-config command was never registered.")
+        await asyncio.sleep(1)
+        for from_channel, _ in pairs:
+            options = [{"type": 1, "name": "parse-backlog", "options": [{"type": 4, "name": "limit", "value": 1000}]}]
+            async with session.post(f"{url}/_control/interactions", json={"command": "img-mon-config", "channel_id": from_channel, "options": options}) as response:
+                response.raise_for_status()
+
+
+def print_report(stats: dict, elapsed: float, messages: int):
+    redirects = stats["redirects"]
+    print(f"Redirected {redirects['count']}/{messages} messages in {elapsed:.2f}s ({redirects['count'] / elapsed if elapsed else 0:.1f} msg/s), {stats['pending_messages']} still pending.")
+    if redirects["count"]:
+        print(f"End-to-end latency: p50 {redirects['p50_ms']} ms, p95 {redirects['p95_ms']} ms, p99 {redirects['p99_ms']} ms, max {redirects['max_ms']} ms.")
+    print(f"Uploads: {stats['uploads']} ({stats['uploaded_bytes'] / 1024 / 1024:.1f} MiB), deletes: {stats['deleted']}.")
+    print(f"{'route':<70} {'requests':>9} {'429s':>6}")
+    for route, count in stats["requests"].items():
+        print(f"{route:<70} {count:>9} {stats['rate_limited'].get(route, 0):>6}")
+    for route, count in stats["unknown_routes"].items():
+        print(f"UNHANDLED {route} ({count})")
+
+
+async def run(args: argparse.Namespace) -> int:
+    server = runner = None
+    url = args.server
+    if url is None:
+        server = fakecord.create_server(args)
+        runner = await server.start(args.host, args.port)
+        url = server.base_url
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/_control/state") as response:
+            state = await response.json()
+        disnake.http.Route.BASE = f"{url}/api/v10"
+        Configuration.MASTER_CONFIG = load_config(args, state)
+
+        from Bot.xerox import cache_options, xerox
+        from Database import DBConnector
+        from Util import Logging
+        os.makedirs("logs", exist_ok=True)
+        Logging.setup_logging()
+        await DBConnector.connect(Configuration.get_master_var("DB_SLOW_QUERY_MS", 250))
+        pairs = await seed_database(state, args.monitors, args.batch)
+
+        bot = xerox(**cache_options(Configuration.get_config().cogs, args.memory_profile))
+        bot_task = asyncio.create_task(bot.start("fakecord"))
+        try:
+            async def ready() -> bool:
+                if bot_task.done():
+                    bot_task.result()
+                return bot.loaded and bot.get_cog("ImageMonitor") is not None
+
+            if not await wait_for(ready, args.startup_timeout):
+                print("Bot did not become ready in time, is ImageMonitor in the cog list?")
+                return 1
+            startup = bot.describe_startup()
+            await session.post(f"{url}/_control/reset")
+
+            start = time.perf_counter()
+            await drive(session, url, pairs, args)
+
+            async def drained() -> bool:
+                async with session.get(f"{url}/_control/stats") as response:
+                    return (await response.json())["pending_messages"] == 0
+            await wait_for(drained, args.timeout)
+            elapsed = time.perf_counter() - start
+
+            async with session.get(f"{url}/_control/stats") as response:
+                stats = await response.json()
+        finally:
+            await bot.close()
+            bot_task.cancel()
+            await DBConnector.disconnect()
+            Logging.stop_logging()
+            if runner is not None:
+                await runner.cleanup()
+
+    if args.json:
+        print(json.dumps({"elapsed": elapsed, "startup": startup, **stats}, indent=4))
+    else:
+        print(startup)
+        print_report(stats, elapsed, args.messages)
+    return 0 if stats["pending_messages"] == 0 else 1
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the real bot against the local fake Discord server and measure end-to-end redirects.")
+    parser.add_argument("--server", help="URL of an already running fakecord server, starts one in-process if omitted.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    fakecord.add_server_arguments(parser)
+    parser.add_argument("--config", type=pathlib.Path, default=ROOT_DIR / "config" / "master.json", help="Master config to start from, IDs are replaced with the fake guild.")
+    parser.add_argument("--cogs", nargs="*", help="Cogs to load, defaults to the config.")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Expose the metrics endpoint during the run.")
+    parser.add_argument("--memory-profile", choices=["default", "low"], default="default", help="Intent and cache profile the bot starts with.")
+    parser.add_argument("--monitors", type=int, default=4, help="Image monitors to create in the fake guild.")
+    parser.add_argument("--batch", action="store_true", help="Create the monitors in batched mode.")
+    parser.add_argument("--messages", type=int, default=200, help="Messages to inject.")
+    parser.add_argument("--rate", type=float, default=10, help="Messages per second, 0 sends as fast as possible.")
+    parser.add_argument("--backlog", action="store_true", help="Store the messages without dispatching them and redirect them with parse-backlog.")
+    parser.add_argument("--attachments", type=int, default=1, help="Attachments per message.")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="Attachment size in bytes.")
+    parser.add_argument("--startup-timeout", type=float, default=30, help="Seconds to wait for the bot to become ready.")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for outstanding redirects.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,861 @@
+import sys
+import json
+import time
+import zlib
+import random
+import asyncio
+import argparse
+import itertools
+import statistics
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from aiohttp import web, WSMsgType
+
+DISCORD_EPOCH = 1420070400000
+FIXTURE_TIME = 1704067200000
+API_PREFIX = "/api/v{version}"
+MAX_MESSAGES_PER_CHANNEL = 5000
+MEMBER_CHUNK_SIZE = 1000
+LATENCY_SAMPLES = 10000
+
+OP_DISPATCH = 0
+OP_HEARTBEAT = 1
+OP_IDENTIFY = 2
+OP_RESUME = 6
+OP_REQUEST_GUILD_MEMBERS = 8
+OP_HELLO = 10
+OP_HEARTBEAT_ACK = 11
+
+INTENT_GUILD_MEMBERS = 1 << 1
+INTENT_GUILD_MESSAGES = 1 << 9
+INTENT_MESSAGE_CONTENT = 1 << 15
+
+ADMINISTRATOR = 1 << 3
+ALL_PERMISSIONS = (1 << 50) - 1
+
+
+class Snowflakes:
+    def __init__(self):
+        self.increment = itertools.count()
+
+    def at(self, ms: int) -> int:
+        return ((ms - DISCORD_EPOCH) << 22) | (next(self.increment) & 0xFFF)
+
+    def now(self) -> int:
+        return self.at(int(time.time() * 1000))
+
+
+def snowflake_time(id: int) -> float:
+    return ((id >> 22) + DISCORD_EPOCH) / 1000
+
+
+def timestamp(id: int) -> str:
+    return datetime.fromtimestamp(snowflake_time(id), timezone.utc).isoformat()
+
+
+@dataclass
+class RateLimit:
+    limit: int
+    window: float
+    remaining: int = 0
+    reset: float = 0.0
+
+    def hit(self, now: float) -> bool:
+        if now >= self.reset:
+            self.remaining = self.limit
+            self.reset = now + self.window
+        if self.remaining == 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+@dataclass
+class LatencyStats:
+    samples: deque = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+    count: int = 0
+
+    def add(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"count": self.count}
+        ordered = sorted(self.samples)
+
+        def pick(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+        return {
+            "count": self.count,
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "p99_ms": pick(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+
+@dataclass
+class Session:
+    ws: web.WebSocketResponse
+    id: str
+    compress: object = None
+    sequence: int = 0
+    events: deque = field(default_factory=lambda: deque(maxlen=1000))
+    shard: tuple[int, int] = (0, 1)
+    intents: int = -1
+
+    def owns(self, guild_id: int) -> bool:
+        return (guild_id >> 22) % self.shard[1] == self.shard[0]
+
+    def visible(self, event: str, data: dict) -> dict | None:
+        if "guild_id" in data and not self.owns(int(data["guild_id"])):
+            return None
+        if event == "MESSAGE_CREATE":
+            if not self.intents & INTENT_GUILD_MESSAGES:
+                return None
+            if not self.intents & INTENT_MESSAGE_CONTENT:
+                return {**data, "content": "", "attachments": [], "embeds": [], "components": []}
+        return data
+
+    async def send(self, payload: dict):
+        raw = json.dumps(payload, separators=(",", ":"))
+        if self.compress is None:
+            await self.ws.send_str(raw)
+        else:
+            await self.ws.send_bytes(self.compress.compress(raw.encode()) + self.compress.flush(zlib.Z_SYNC_FLUSH))
+
+    async def dispatch(self, event: str, data: dict):
+        self.sequence += 1
+        self.events.append((self.sequence, event, data))
+        if not self.ws.closed:
+            await self.send({"op": OP_DISPATCH, "t": event, "s": self.sequence, "d": data})
+
+
+class FakeDiscord:
+    def __init__(
+        self, guilds: int = 1, channels: int = 10, users: int = 50, latency: float = 0.0, jitter: float = 0.0,
+        rate_limit: int = 5, rate_window: float = 5.0, global_limit: int = 50, api_version: int = 10
+    ):
+        self.snowflakes = Snowflakes()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.global_limit = global_limit
+        self.api_version = api_version
+        self.base_url = ""
+        self.token = None
+
+        self.application_id = self.snowflakes.at(FIXTURE_TIME)
+        self.bot_user = self.user(self.application_id, "xerox", bot=True)
+        self.users = [self.user(self.snowflakes.at(FIXTURE_TIME), f"user-{i}") for i in range(users)]
+        self.guilds: dict[int, dict] = dict()
+        self.channels: dict[int, dict] = dict()
+        self.messages: dict[int, OrderedDict[int, dict]] = dict()
+        self.attachments: dict[int, int] = dict()
+        self.commands: dict[int | None, dict[str, dict]] = dict()
+        for i in range(guilds):
+            self.add_guild(f"guild-{i}", channels)
+
+        self.sessions: dict[str, Session] = dict()
+        self.buckets: dict[tuple, RateLimit] = dict()
+        self.global_bucket = RateLimit(global_limit, 1.0)
+        self.requests: dict[str, int] = dict()
+        self.rate_limited: dict[str, int] = dict()
+        self.unknown_routes: dict[str, int] = dict()
+        self.pending_messages: dict[int, float] = dict()
+        self.pending_interactions: dict[int, float] = dict()
+        self.redirects = LatencyStats()
+        self.interactions = LatencyStats()
+        self.uploads = 0
+        self.uploaded_bytes = 0
+        self.deleted = 0
+
+    def user(self, id: int, name: str, bot: bool = False) -> dict:
+        return {"id": str(id), "username": name, "global_name": name, "discriminator": "0", "avatar": None, "bot": bot, "public_flags": 0}
+
+    def add_guild(self, name: str, channels: int) -> dict:
+        guild_id = self.snowflakes.at(FIXTURE_TIME)
+        role = {"id": str(guild_id), "name": "@everyone", "permissions": str(ADMINISTRATOR), "position": 0, "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0}
+        guild = {
+            "id": str(guild_id),
+            "name": name,
+            "icon": None,
+            "owner_id": self.bot_user["id"],
+            "afk_timeout": 300,
+            "verification_level": 0,
+            "default_message_notifications": 0,
+            "explicit_content_filter": 0,
+            "mfa_level": 0,
+            "nsfw_level": 0,
+            "premium_tier": 0,
+            "preferred_locale": "en-US",
+            "features": [],
+            "roles": [role],
+            "emojis": [],
+            "stickers": [],
+            "channels": [],
+            "threads": [],
+            "members": [],
+            "voice_states": [],
+            "presences": [],
+            "member_count": len(self.users) + 1,
+            "large": False,
+            "unavailable": False,
+            "joined_at": timestamp(guild_id),
+        }
+        for user in [self.bot_user] + self.users:
+            guild["members"].append(self.member(user))
+        self.guilds[guild_id] = guild
+        for i in range(channels):
+            self.add_channel(guild_id, f"channel-{i}")
+        return guild
+
+    def member(self, user: dict) -> dict:
+        return {"user": user, "roles": [], "joined_at": timestamp(int(user["id"])), "deaf": False, "mute": False, "flags": 0, "nick": None}
+
+    def add_channel(self, guild_id: int, name: str) -> dict:
+        channel_id = self.snowflakes.at(FIXTURE_TIME)
+        guild = self.guilds[guild_id]
+        channel = {
+            "id": str(channel_id),
+            "type": 0,
+            "guild_id": str(guild_id),
+            "name": name,
+            "position": len(guild["channels"]),
+            "permission_overwrites": [],
+            "nsfw": False,
+            "parent_id": None,
+            "topic": None,
+            "rate_limit_per_user": 0,
+            "last_message_id": None,
+        }
+        guild["channels"].append(channel)
+        self.channels[channel_id] = channel
+        self.messages[channel_id] = OrderedDict()
+        return channel
+
+    def text_channels(self, guild_id: int = None) -> list[int]:
+        return [int(c["id"]) for c in self.channels.values() if guild_id is None or int(c["guild_id"]) == guild_id]
+
+    def attachment(self, channel_id: int, filename: str, size: int, content_type: str = None) -> dict:
+        attachment_id = self.snowflakes.now()
+        self.attachments[attachment_id] = size
+        url = f"{self.base_url}/attachments/{channel_id}/{attachment_id}/{filename}"
+        return {"id": str(attachment_id), "filename": filename, "size": size, "url": url, "proxy_url": url, "content_type": content_type or guess_content_type(filename)}
+
+    def create_message(self, channel_id: int, author: dict, content: str = "", attachments: list[dict] = None, embeds: list[dict] = None, nonce=None) -> dict:
+        channel = self.channels[channel_id]
+        message_id = self.snowflakes.now()
+        message = {
+            "id": str(message_id),
+            "channel_id": str(channel_id),
+            "guild_id": channel["guild_id"],
+            "author": author,
+            "member": {k: v for k, v in self.member(author).items() if k != "user"},
+            "content": content or "",
+            "timestamp": timestamp(message_id),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": attachments or [],
+            "embeds": embeds or [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+            "components": [],
+        }
+        if nonce is not None:
+            message["nonce"] = nonce
+        messages = self.messages[channel_id]
+        messages[message_id] = message
+        while len(messages) > MAX_MESSAGES_PER_CHANNEL:
+            messages.popitem(last=False)
+        channel["last_message_id"] = str(message_id)
+        return message
+
+    def delete_message(self, channel_id: int, message_id: int) -> bool:
+        message = self.messages.get(channel_id, {}).pop(message_id, None)
+        if message is None:
+            return False
+        for attachment in message["attachments"]:
+            self.attachments.pop(int(attachment["id"]), None)
+        self.deleted += 1
+        started = self.pending_messages.pop(message_id, None)
+        if started is not None:
+            self.redirects.add(time.perf_counter() - started)
+        return True
+
+    async def broadcast(self, event: str, data: dict):
+        for session in list(self.sessions.values()):
+            visible = session.visible(event, data)
+            if visible is not None:
+                await session.dispatch(event, visible)
+
+    async def inject_message(self, channel_id: int, author: dict = None, content: str = "", attachments: int = 1, size: int = 256 * 1024, extension: str = "png", dispatch: bool = True) -> dict:
+        author = author or random.choice(self.users)
+        files = [self.attachment(channel_id, f"image-{i}.{extension}", size) for i in range(attachments)]
+        message = self.create_message(channel_id, author, content, files)
+        self.pending_messages[int(message["id"])] = time.perf_counter()
+        if dispatch:
+            await self.broadcast("MESSAGE_CREATE", message)
+        return message
+
+    async def inject_interaction(self, name: str, channel_id: int, options: list[dict] = None, guild_id: int = None, author: dict = None) -> dict:
+        channel = self.channels[channel_id]
+        guild_id = guild_id or int(channel["guild_id"])
+        command = self.commands.get(guild_id, {}).get(name)
+        scope = {"guild_id": str(guild_id)} if command is not None else {}
+        command = command or self.commands.get(None, {}).get(name)
+        if command is None:
+            raise web.HTTPNotFound(text=f"Unknown command {name}")
+        author = author or self.bot_user
+        interaction_id = self.snowflakes.now()
+        interaction = {
+            "id": str(interaction_id),
+            "application_id": str(self.application_id),
+            "type": 2,
+            "data": {"id": command["id"], "name": name, "type": 1, "options": options or [], **scope},
+            "guild_id": str(guild_id),
+            "channel_id": str(channel_id),
+            "channel": channel,
+            "member": {**self.member(author), "permissions": str(ALL_PERMISSIONS)},
+            "token": f"token-{interaction_id}",
+            "version": 1,
+            "app_permissions": str(ALL_PERMISSIONS),
+            "locale": "en-US",
+            "guild_locale": "en-US",
+            "entitlements": [],
+            "authorizing_integration_owners": {},
+        }
+        self.pending_interactions[interaction_id] = time.perf_counter()
+        await self.broadcast("INTERACTION_CREATE", interaction)
+        return interaction
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def stats(self) -> dict:
+        return {
+            "requests": dict(sorted(self.requests.items())),
+            "rate_limited": dict(sorted(self.rate_limited.items())),
+            "unknown_routes": dict(sorted(self.unknown_routes.items())),
+            "redirects": self.redirects.summary(),
+            "interactions": self.interactions.summary(),
+            "pending_messages": len(self.pending_messages),
+            "pending_interactions": len(self.pending_interactions),
+            "uploads": self.uploads,
+            "uploaded_bytes": self.uploaded_bytes,
+            "deleted": self.deleted,
+            "sessions": len(self.sessions),
+        }
+
+    def reset_stats(self):
+        self.requests.clear()
+        self.rate_limited.clear()
+        self.unknown_routes.clear()
+        self.pending_messages.clear()
+        self.pending_interactions.clear()
+        self.redirects = LatencyStats()
+        self.interactions = LatencyStats()
+        self.uploads = self.uploaded_bytes = self.deleted = 0
+
+    @web.middleware
+    async def api_middleware(self, request: web.Request, handler):
+        if not request.path.startswith(API_PREFIX.format(version=self.api_version)):
+            return await handler(request)
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource is not None else request.path
+        name = f"{request.method} {route}"
+        self.requests[name] = self.requests.get(name, 0) + 1
+        delay = self.delay()
+        if delay:
+            await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        if not self.global_bucket.hit(now):
+            return self.too_many_requests(name, self.global_bucket.reset - now, True)
+        major = request.match_info.get("channel_id") or request.match_info.get("guild_id") or request.match_info.get("token")
+        key = (request.method, route, major)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = RateLimit(self.rate_limit, self.rate_window)
+        if not bucket.hit(now):
+            return self.too_many_requests(name, bucket.reset - now, False)
+
+        response = await handler(request)
+        response.headers.update(
+            {
+                "X-RateLimit-Limit": str(bucket.limit),
+                "X-RateLimit-Remaining": str(bucket.remaining),
+                "X-RateLimit-Reset": f"{time.time() + bucket.reset - now:.3f}",
+                "X-RateLimit-Reset-After": f"{bucket.reset - now:.3f}",
+                "X-RateLimit-Bucket": f"{abs(hash(key[:2])):x}",
+            }
+        )
+        return response
+
+    def too_many_requests(self, name: str, retry_after: float, is_global: bool) -> web.Response:
+        self.rate_limited[name] = self.rate_limited.get(name, 0) + 1
+        retry_after = round(max(retry_after, 0.001), 3)
+        headers = {"Retry-After": str(retry_after), "Via": "1.1 fakecord", "X-RateLimit-Limit": str(self.rate_limit), "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": str(retry_after)}
+        if is_global:
+            headers["X-RateLimit-Global"] = "true"
+        else:
+            headers["X-RateLimit-Scope"] = "user"
+        return json_response({"message": "You are being rate limited.", "retry_after": retry_after, "global": is_global}, status=429, headers=headers)
+
+    async def not_found(self, request: web.Request) -> web.Response:
+        name = f"{request.method} {request.path}"
+        self.unknown_routes[name] = self.unknown_routes.get(name, 0) + 1
+        return json_response({"message": "404: Not Found", "code": 0}, status=404)
+
+    def get_channel(self, request: web.Request) -> dict:
+        channel = self.channels.get(int(request.match_info["channel_id"]))
+        if channel is None:
+            raise web.HTTPNotFound(body=json.dumps({"message": "Unknown Channel", "code": 10003}).encode(), content_type="application/json")
+        return channel
+
+    async def read_payload(self, request: web.Request, channel_id: int) -> tuple[dict, list[dict]]:
+        if not request.content_type.startswith("multipart/"):
+            return (await request.json() if request.can_read_body else {}), []
+        payload, files = {}, dict()
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "payload_json":
+                payload = json.loads(await part.text())
+            elif part.name and part.name.startswith("files["):
+                size = 0
+                while chunk := await part.read_chunk():
+                    size += len(chunk)
+                self.uploads += 1
+                self.uploaded_bytes += size
+                files[int(part.name[6:-1])] = self.attachment(channel_id, part.filename or "file", size, part.headers.get("Content-Type"))
+        attachments = []
+        for i, attachment in enumerate(payload.get("attachments") or [{"id": i} for i in files]):
+            uploaded = files.get(int(attachment.get("id", i)))
+            if uploaded is not None:
+                attachments.append({**uploaded, "description": attachment.get("description")})
+        return payload, attachments
+
+    async def handle_gateway(self, request: web.Request) -> web.Response:
+        return json_response({"url": self.base_url.replace("http", "ws", 1) + "/gateway"})
+
+    async def handle_gateway_bot(self, request: web.Request) -> web.Response:
+        return json_response(
+            {
+                "url": self.base_url.replace("http", "ws", 1) + "/gateway",
+                "shards": 1,
+                "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 86400000, "max_concurrency": 1},
+            }
+        )
+
+    async def handle_me(self, request: web.Request) -> web.Response:
+        return json_response(self.bot_user)
+
+    async def handle_application(self, request: web.Request) -> web.Response:
+        return json_response({
+            "id": str(self.application_id),
+            "name": "xerox",
+            "icon": None,
+            "description": "",
+            "bot_public": True,
+            "bot_require_code_grant": False,
+            "verify_key": "",
+            "flags": 0,
+            "owner": self.users[0],
+            "team": None,
+        })
+
+    async def handle_get_guild(self, request: web.Request) -> web.Response:
+        guild = self.guilds.get(int(request.match_info["guild_id"]))
+        if guild is None:
+            return json_response({"message": "Unknown Guild", "code": 10004}, status=404)
+        return json_response({k: v for k, v in guild.items() if k not in ("channels", "members", "threads", "voice_states", "presences")})
+
+    async def handle_get_channel(self, request: web.Request) -> web.Response:
+        return json_response(self.get_channel(request))
+
+    async def handle_create_message(self, request: web.Request) -> web.Response:
+        channel = self.get_channel(request)
+        channel_id = int(channel["id"])
+        payload, attachments = await self.read_payload(request, channel_id)
+        embeds = payload.get("embeds") or ([payload["embed"]] if payload.get("embed") else [])
+        message = self.create_message(channel_id, self.bot_user, payload.get("content"), attachments, embeds, payload.get("nonce"))
+        await self.broadcast("MESSAGE_CREATE", message)
+        return json_response(message)
+
+    async def handle_get_message(self, request: web.Request) -> web.Response:
+        channel = self.get_channel(request)
+        message = self.messages[int(channel["id"])].get(int(request.match_info["message_id"]))
+        if message is None:
+            return json_response({"message": "Unknown Message", "code": 10008}, status=404)
+        return json_response(message)
+
+    async def handle_history(self, request: web.Request) -> web.Response:
+        channel = self.get_channel(request)
+        messages = self.messages[int(channel["id"])]
+        limit = max(1, min(100, int(request.query.get("limit", 50))))
+        if "after" in request.query:
+            after = int(request.query["after"])
+            selected = [m for id, m in messages.items() if id > after][:limit]
+            selected.reverse()
+        elif "around" in request.query:
+            around = int(request.query["around"])
+            ids = list(messages)
+            index = next((i for i, id in enumerate(ids) if id >= around), len(ids))
+            start = max(0, index - limit // 2)
+            selected = [messages[id] for id in ids[start:start + limit]]
+            selected.reverse()
+        else:
+            before = int(request.query.get("before", 1 << 63))
+            selected = []
+            for id in reversed(messages):
+                if id < before:
+                    selected.append(messages[id])
+                    if len(selected) == limit:
+                        break
+        return json_response(selected)
+
+    async def handle_delete_message(self, request: web.Request) -> web.Response:
+        channel = self.get_channel(request)
+        channel_id = int(channel["id"])
+        message_id = int(request.match_info["message_id"])
+        if not self.delete_message(channel_id, message_id):
+            return json_response({"message": "Unknown Message", "code": 10008}, status=404)
+        await self.broadcast("MESSAGE_DELETE", {"id": str(message_id), "channel_id": str(channel_id), "guild_id": channel["guild_id"]})
+        return web.Response(status=204)
+
+    async def handle_bulk_delete(self, request: web.Request) -> web.Response:
+        channel = self.get_channel(request)
+        channel_id = int(channel["id"])
+        ids = [int(id) for id in (await request.json()).get("messages", [])]
+        if not 2 <= len(ids) <= 100:
+            return json_response({"message": "Invalid Form Body", "code": 50035}, status=400)
+        cutoff = time.time() - 14 * 24 * 3600
+        if any(snowflake_time(id) < cutoff for id in ids):
+            return json_response({"message": "You can only bulk delete messages that are under 14 days old.", "code": 50034}, status=400)
+        deleted = [id for id in ids if self.delete_message(channel_id, id)]
+        await self.broadcast("MESSAGE_DELETE_BULK", {"ids": [str(id) for id in deleted], "channel_id": str(channel_id), "guild_id": channel["guild_id"]})
+        return web.Response(status=204)
+
+    async def handle_typing(self, request: web.Request) -> web.Response:
+        self.get_channel(request)
+        return web.Response(status=204)
+
+    async def handle_attachment(self, request: web.Request) -> web.StreamResponse:
+        size = self.attachments.get(int(request.match_info["attachment_id"]))
+        if size is None:
+            return web.Response(status=404)
+        delay = self.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        response = web.StreamResponse(headers={"Content-Type": guess_content_type(request.match_info["filename"]), "Content-Length": str(size)})
+        await response.prepare(request)
+        chunk = bytes(min(size, 64 * 1024))
+        remaining = size
+        while remaining > 0:
+            await response.write(chunk[:remaining])
+            remaining -= len(chunk)
+        await response.write_eof()
+        return response
+
+    def command_scope(self, request: web.Request) -> int | None:
+        guild_id = request.match_info.get("guild_id")
+        return int(guild_id) if guild_id is not None else None
+
+    async def handle_get_commands(self, request: web.Request) -> web.Response:
+        return json_response(list(self.commands.get(self.command_scope(request), {}).values()))
+
+    async def handle_put_commands(self, request: web.Request) -> web.Response:
+        scope = self.command_scope(request)
+        existing = self.commands.get(scope, {})
+        commands = dict()
+        for command in await request.json():
+            previous = existing.get(command["name"])
+            commands[command["name"]] = {
+                "type": 1,
+                "options": [],
+                "default_member_permissions": None,
+                "dm_permission": True,
+                "nsfw": False,
+                **command,
+                "id": previous["id"] if previous else str(self.snowflakes.now()),
+                "application_id": str(self.application_id),
+                "guild_id": str(scope) if scope is not None else None,
+                "version": str(self.snowflakes.now()),
+            }
+        self.commands[scope] = commands
+        return json_response(list(commands.values()))
+
+    async def handle_command_permissions(self, request: web.Request) -> web.Response:
+        return json_response([])
+
+    async def handle_interaction_callback(self, request: web.Request) -> web.Response:
+        interaction_id = int(request.match_info["interaction_id"])
+        started = self.pending_interactions.pop(interaction_id, None)
+        if started is not None:
+            self.interactions.add(time.perf_counter() - started)
+        if request.content_type.startswith("multipart/"):
+            await self.read_payload(request, 0)
+        return web.Response(status=204)
+
+    async def handle_webhook_message(self, request: web.Request) -> web.Response:
+        if request.method == "DELETE":
+            return web.Response(status=204)
+        token = request.match_info["token"]
+        interaction_id = int(token.removeprefix("token-")) if token.startswith("token-") else None
+        channel_id = next(iter(self.channels))
+        payload, attachments = await self.read_payload(request, 0) if request.can_read_body else ({}, [])
+        message = self.create_message(channel_id, self.bot_user, payload.get("content"), attachments, payload.get("embeds"))
+        message["interaction"] = {"id": str(interaction_id), "type": 2, "name": "", "user": self.bot_user} if interaction_id else None
+        return json_response(message)
+
+    async def send_member_chunks(self, session: Session, data: dict):
+        guild_ids = data["guild_id"] if isinstance(data["guild_id"], list) else [data["guild_id"]]
+        for guild_id in guild_ids:
+            guild = self.guilds.get(int(guild_id))
+            if guild is None:
+                continue
+            members = guild["members"][:data["limit"]] if data.get("limit") else guild["members"]
+            chunks = [members[i:i + MEMBER_CHUNK_SIZE] for i in range(0, len(members), MEMBER_CHUNK_SIZE)] or [[]]
+            for index, chunk in enumerate(chunks):
+                await session.dispatch(
+                    "GUILD_MEMBERS_CHUNK",
+                    {"guild_id": str(guild_id), "members": chunk, "chunk_index": index, "chunk_count": len(chunks), "nonce": data.get("nonce")}
+                )
+
+    async def handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=None, max_msg_size=0)
+        await ws.prepare(request)
+        session = None
+        compress = zlib.compressobj() if request.query.get("compress") == "zlib-stream" else None
+        hello = Session(ws, "", compress)
+        await hello.send({"op": OP_HELLO, "d": {"heartbeat_interval": 41250}})
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            payload = json.loads(msg.data)
+            op = payload.get("op")
+            if op == OP_HEARTBEAT:
+                await hello.send({"op": OP_HEARTBEAT_ACK})
+            elif op == OP_IDENTIFY:
+                data = payload["d"]
+                session = Session(ws, f"{self.snowflakes.now():x}", compress, shard=tuple(data.get("shard") or (0, 1)), intents=data.get("intents", -1))
+                self.sessions[session.id] = session
+                hello = session
+                guilds = [guild for id, guild in self.guilds.items() if session.owns(id)]
+                await session.dispatch(
+                    "READY",
+                    {
+                        "v": self.api_version,
+                        "user": self.bot_user,
+                        "shard": list(session.shard),
+                        "guilds": [{"id": guild["id"], "unavailable": True} for guild in guilds],
+                        "session_id": session.id,
+                        "resume_gateway_url": self.base_url.replace("http", "ws", 1) + "/gateway",
+                        "application": {"id": str(self.application_id), "flags": 0},
+                        "private_channels": [],
+                        "relationships": [],
+                        "_trace": ["fakecord"],
+                    }
+                )
+                for guild in guilds:
+                    if not session.intents & INTENT_GUILD_MEMBERS:
+                        guild = {**guild, "members": guild["members"][:1]}
+                    await session.dispatch("GUILD_CREATE", guild)
+            elif op == OP_REQUEST_GUILD_MEMBERS and session is not None:
+                await self.send_member_chunks(session, payload["d"])
+            elif op == OP_RESUME:
+                data = payload["d"]
+                previous = self.sessions.get(data.get("session_id"))
+                if previous is None:
+                    await hello.send({"op": 9, "d": False})
+                    continue
+                session = Session(ws, previous.id, compress, previous.sequence, previous.events, previous.shard, previous.intents)
+                self.sessions[session.id] = session
+                hello = session
+                for sequence, event, event_data in list(previous.events):
+                    if sequence > (data.get("seq") or 0):
+                        await session.send({"op": OP_DISPATCH, "t": event, "s": sequence, "d": event_data})
+                await session.dispatch("RESUMED", {"_trace": ["fakecord"]})
+        return ws
+
+    async def handle_control_message(self, request: web.Request) -> web.Response:
+        body = await request.json() if request.can_read_body else {}
+        channel_id = int(body.get("channel_id") or random.choice(self.text_channels()))
+        if channel_id not in self.channels:
+            return json_response({"message": "Unknown Channel"}, status=404)
+        message = await self.inject_message(
+            channel_id,
+            content=body.get("content", ""),
+            attachments=int(body.get("attachments", 1)),
+            size=int(body.get("size", 256 * 1024)),
+            extension=body.get("extension", "png"),
+            dispatch=body.get("dispatch", True),
+        )
+        return json_response(message)
+
+    async def handle_control_interaction(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        interaction = await self.inject_interaction(body["command"], int(body["channel_id"]), body.get("options"))
+        return json_response(interaction)
+
+    async def handle_control_state(self, request: web.Request) -> web.Response:
+        return json_response(
+            {
+                "application_id": str(self.application_id),
+                "user": self.bot_user,
+                "guilds": [{"id": g["id"], "name": g["name"], "channels": [c["id"] for c in g["channels"]]} for g in self.guilds.values()],
+                "commands": {str(scope): sorted(commands) for scope, commands in self.commands.items()},
+            }
+        )
+
+    async def handle_control_stats(self, request: web.Request) -> web.Response:
+        return json_response(self.stats())
+
+    async def handle_control_reset(self, request: web.Request) -> web.Response:
+        self.reset_stats()
+        return web.Response(status=204)
+
+    async def handle_control_config(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if "latency_ms" in body:
+            self.latency = float(body["latency_ms"]) / 1000
+        if "jitter_ms" in body:
+            self.jitter = float(body["jitter_ms"]) / 1000
+        if "rate_limit" in body:
+            self.rate_limit = int(body["rate_limit"])
+            self.buckets.clear()
+        if "rate_window" in body:
+            self.rate_window = float(body["rate_window"])
+            self.buckets.clear()
+        if "global_limit" in body:
+            self.global_bucket = RateLimit(int(body["global_limit"]), 1.0)
+        return json_response({
+            "latency_ms": self.latency * 1000,
+            "jitter_ms": self.jitter * 1000,
+            "rate_limit": self.rate_limit,
+            "rate_window": self.rate_window,
+            "global_limit": self.global_bucket.limit,
+        })
+
+    async def handle_control_disconnect(self, request: web.Request) -> web.Response:
+        for session in list(self.sessions.values()):
+            await session.ws.close(code=4000)
+        return web.Response(status=204)
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.api_middleware], client_max_size=512 * 1024 * 1024)
+        api = API_PREFIX.format(version=self.api_version)
+        app.router.add_get(f"{api}/gateway", self.handle_gateway)
+        app.router.add_get(f"{api}/gateway/bot", self.handle_gateway_bot)
+        app.router.add_get(f"{api}/users/@me", self.handle_me)
+        app.router.add_get(f"{api}/oauth2/applications/@me", self.handle_application)
+        app.router.add_get(f"{api}/applications/@me", self.handle_application)
+        app.router.add_get(f"{api}/guilds/{{guild_id}}", self.handle_get_guild)
+        app.router.add_get(f"{api}/channels/{{channel_id}}", self.handle_get_channel)
+        app.router.add_get(f"{api}/channels/{{channel_id}}/messages", self.handle_history)
+        app.router.add_post(f"{api}/channels/{{channel_id}}/messages", self.handle_create_message)
+        app.router.add_post(f"{api}/channels/{{channel_id}}/messages/bulk-delete", self.handle_bulk_delete)
+        app.router.add_get(f"{api}/channels/{{channel_id}}/messages/{{message_id}}", self.handle_get_message)
+        app.router.add_delete(f"{api}/channels/{{channel_id}}/messages/{{message_id}}", self.handle_delete_message)
+        app.router.add_post(f"{api}/channels/{{channel_id}}/typing", self.handle_typing)
+        app.router.add_get(f"{api}/applications/{{application_id}}/commands", self.handle_get_commands)
+        app.router.add_put(f"{api}/applications/{{application_id}}/commands", self.handle_put_commands)
+        app.router.add_get(f"{api}/applications/{{application_id}}/guilds/{{guild_id}}/commands", self.handle_get_commands)
+        app.router.add_put(f"{api}/applications/{{application_id}}/guilds/{{guild_id}}/commands", self.handle_put_commands)
+        app.router.add_get(f"{api}/applications/{{application_id}}/guilds/{{guild_id}}/commands/permissions", self.handle_command_permissions)
+        app.router.add_post(f"{api}/interactions/{{interaction_id}}/{{token}}/callback", self.handle_interaction_callback)
+        app.router.add_route("*", f"{api}/webhooks/{{application_id}}/{{token}}/messages/{{message_id}}", self.handle_webhook_message)
+        app.router.add_post(f"{api}/webhooks/{{application_id}}/{{token}}", self.handle_webhook_message)
+        app.router.add_route("*", f"{api}/{{tail:.*}}", self.not_found)
+        app.router.add_get("/attachments/{channel_id}/{attachment_id}/{filename}", self.handle_attachment)
+        app.router.add_get("/gateway", self.handle_websocket)
+        app.router.add_post("/_control/messages", self.handle_control_message)
+        app.router.add_post("/_control/interactions", self.handle_control_interaction)
+        app.router.add_post("/_control/config", self.handle_control_config)
+        app.router.add_post("/_control/disconnect", self.handle_control_disconnect)
+        app.router.add_post("/_control/reset", self.handle_control_reset)
+        app.router.add_get("/_control/state", self.handle_control_state)
+        app.router.add_get("/_control/stats", self.handle_control_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> web.AppRunner:
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return runner
+
+
+def json_response(data, status: int = 200, headers: dict = None) -> web.Response:
+    return web.Response(body=json.dumps(data).encode(), status=status, headers=headers, content_type="application/json")
+
+
+def guess_content_type(filename: str) -> str:
+    extension = filename.rsplit(".", 1)[-1].lower()
+    return {
+        "png": "image/png",
+        "jpg": "image/jpeg",
+        "jpeg": "image/jpeg",
+        "gif": "image/gif",
+        "webp": "image/webp",
+    }.get(extension, "application/octet-stream")
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--guilds", type=int, default=1, help="Number of fake guilds.")
+    parser.add_argument("--channels", type=int, default=10, help="Text channels per guild.")
+    parser.add_argument("--users", type=int, default=50, help="Fake members per guild.")
+    parser.add_argument("--latency", type=float, default=0, help="Added latency per API request in ms.")
+    parser.add_argument("--jitter", type=float, default=0, help="Random latency jitter in ms.")
+    parser.add_argument("--rate-limit", type=int, default=5, help="Requests per bucket and window.")
+    parser.add_argument("--rate-window", type=float, default=5.0, help="Bucket window in seconds.")
+    parser.add_argument("--global-limit", type=int, default=50, help="Global requests per second.")
+
+
+def create_server(args: argparse.Namespace) -> FakeDiscord:
+    return FakeDiscord(
+        guilds=args.guilds,
+        channels=args.channels,
+        users=args.users,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        global_limit=args.global_limit,
+    )
+
+
+async def serve(args: argparse.Namespace):
+    server = create_server(args)
+    runner = await server.start(args.host, args.port)
+    print(f"Fake Discord listening on {server.base_url}, API at {server.base_url}{API_PREFIX.format(version=server.api_version)}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Discord REST API and gateway.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_server_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
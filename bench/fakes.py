@@ -0,0 +1,373 @@
+import asyncio
+import itertools
+from datetime import datetime, timezone
+
+import disnake  # noqa
+from prisma import models
+
+SNOWFLAKES = itertools.count(1 << 40)
+
+IMAGE_MONITOR_DEFAULTS = {
+    "success_msg": "Image moved successfully",
+    "limit": 1,
+    "batch": False,
+    "last_message": None,
+    "duplicate_policy": "forward",
+    "duplicate_window": 1440,
+    "duplicate_perceptual": False,
+    "transcode_format": None,
+    "transcode_quality": 85,
+    "transcode_max_dimension": 2560,
+    "transcode_max_bytes": 1048576,
+    "transcode_saved": 0,
+    "rate_user": 0,
+    "rate_user_burst": 5,
+    "rate_channel": 0,
+    "rate_channel_burst": 20,
+    "rate_overflow": "warn",
+}
+GUILD_CONFIG_DEFAULTS = {
+    "guild_log": None,
+    "time_zone": "UTC",
+}
+IMAGE_HASH_DEFAULTS = {
+    "perceptual": None,
+    "created_at": lambda: datetime.now(timezone.utc),
+}
+REDIRECT_DEFAULTS = {
+    "duplicates": 0,
+    "created_at": lambda: datetime.now(timezone.utc),
+}
+REDIRECT_ROLLUP_DEFAULTS = {
+    "redirects": 0,
+    "images": 0,
+}
+OPERATORS = {
+    "equals": lambda a, b: a == b,
+    "not": lambda a, b: a != b,
+    "in": lambda a, b: a in b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+}
+
+
+def snowflake() -> int:
+    return next(SNOWFLAKES)
+
+
+async def delay(seconds: float):
+    if seconds > 0:
+        await asyncio.sleep(seconds)
+    else:
+        await asyncio.sleep(0)
+
+
+class FakeUser:
+    def __init__(self, id: int = None, name: str = None, bot: bool = False):
+        self.id = id or snowflake()
+        self.name = name or f"user-{self.id}"
+        self.mention = f"<@{self.id}>"
+        self.bot = bot
+
+
+class FakeAttachment:
+    def __init__(self, size: int = 256 * 1024, filename: str = "image.png", content_type: str = "image/png", latency: float = 0.0, payload: bytes = None, width: int = None, height: int = None):
+        self.id = snowflake()
+        self.size = size
+        self.width = width
+        self.height = height
+        self.filename = filename
+        self.content_type = content_type
+        self.url = f"https://cdn.invalid/attachments/{self.id}/{filename}"
+        self.latency = latency
+        self.payload = payload
+
+    async def read(self) -> bytes:
+        await delay(self.latency)
+        if self.payload is not None:
+            return self.payload
+        return bytes(self.size)
+
+
+class FakeSentMessage:
+    def __init__(self, channel: "FakeTextChannel", content: str = None, files: list = None, embed=None):
+        self.id = snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.files = files or []
+        self.embed = embed
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{self.id}"
+
+
+class FakeTextChannel:
+    def __init__(self, guild: "FakeGuild", id: int = None, name: str = None, latency: float = 0.0):
+        self.id = id or snowflake()
+        self.name = name or f"channel-{self.id}"
+        self.mention = f"<#{self.id}>"
+        self.guild = guild
+        self.latency = latency
+        self.last_message_id = None
+        self.sent = 0
+        self.uploaded_bytes = 0
+        self.delete_requests = 0
+
+    async def send(self, content: str = None, *, file: disnake.File = None, files: list[disnake.File] = None, embed=None, **kwargs) -> FakeSentMessage:
+        files = ([file] if file is not None else []) + (files or [])
+        try:
+            for f in files:
+                self.uploaded_bytes += len(f.fp.read())
+            await delay(self.latency)
+        finally:
+            for f in files:
+                f.close()
+        self.sent += 1
+        message = FakeSentMessage(self, content=content, files=[f.filename for f in files], embed=embed)
+        self.last_message_id = message.id
+        return message
+
+    async def delete_messages(self, messages: list["FakeMessage"]):
+        self.delete_requests += 1
+        await delay(self.latency)
+        for message in messages:
+            message.deleted = True
+
+
+class FakeGuild:
+    def __init__(self, id: int = None, filesize_limit: int = 25 * 1024 * 1024):
+        self.id = id or snowflake()
+        self.name = f"guild-{self.id}"
+        self.filesize_limit = filesize_limit
+        self.channels: dict[int, FakeTextChannel] = dict()
+
+    def add_channel(self, latency: float = 0.0, id: int = None) -> FakeTextChannel:
+        channel = FakeTextChannel(self, id=id, latency=latency)
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, id: int) -> FakeTextChannel | None:
+        return self.channels.get(id)
+
+
+class FakeMessage:
+    def __init__(self, channel: FakeTextChannel, author: FakeUser, attachments: list[FakeAttachment] = None, content: str = "", id: int = None, latency: float = 0.0, created_at: datetime = None):
+        self.id = id or snowflake()
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.attachments = attachments or []
+        self.content = content
+        self.latency = latency
+        self.deleted = False
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{self.id}"
+        channel.last_message_id = self.id
+
+    async def delete(self):
+        self.channel.delete_requests += 1
+        await delay(self.latency)
+        self.deleted = True
+
+
+class FakeBot:
+    def __init__(self):
+        self.guilds: dict[int, FakeGuild] = dict()
+        self.loop = asyncio.get_running_loop()
+        self.latency = 0.0
+        self.user = FakeUser(name="xerox", bot=True)
+
+    def add_guild(self, guild: FakeGuild = None) -> FakeGuild:
+        guild = guild or FakeGuild()
+        self.guilds[guild.id] = guild
+        return guild
+
+    def get_channel(self, id: int) -> FakeTextChannel | None:
+        for guild in self.guilds.values():
+            channel = guild.get_channel(id)
+            if channel is not None:
+                return channel
+        return None
+
+    def get_guild(self, id: int) -> FakeGuild | None:
+        return self.guilds.get(id)
+
+    def is_ready(self) -> bool:
+        return True
+
+    def is_closed(self) -> bool:
+        return False
+
+
+class FakeActions:
+    def __init__(self, model, defaults: dict, latency: float = 0.0):
+        self.model = model
+        self.defaults = defaults
+        self.rows: dict[int, dict] = dict()
+        self.latency = latency
+        self.ids = itertools.count(1)
+        self.calls = 0
+
+    def matches(self, row: dict, where: dict) -> bool:
+        for k, v in (where or {}).items():
+            if isinstance(v, dict) and not v.keys() <= OPERATORS.keys():
+                if not self.matches(row, v):
+                    return False
+            elif isinstance(v, dict):
+                if not all(OPERATORS[op](row.get(k), operand) for op, operand in v.items()):
+                    return False
+            elif row.get(k) != v:
+                return False
+        return True
+
+    def apply(self, row: dict, data: dict):
+        for k, v in data.items():
+            if isinstance(v, dict) and "increment" in v:
+                row[k] = row.get(k, 0) + v["increment"]
+            else:
+                row[k] = v
+
+    async def find_many(self, where: dict = None, order: dict = None, take: int = None, **kwargs) -> list:
+        self.calls += 1
+        await delay(self.latency)
+        rows = [row for row in self.rows.values() if self.matches(row, where)]
+        for key, direction in (order or {}).items():
+            rows.sort(key=lambda row: row[key], reverse=direction == "desc")
+        return [self.model(**row) for row in rows[:take]]
+
+    async def find_unique(self, where: dict, **kwargs):
+        self.calls += 1
+        await delay(self.latency)
+        for row in self.rows.values():
+            if self.matches(row, where):
+                return self.model(**row)
+        return None
+
+    async def find_first(self, where: dict = None, **kwargs):
+        rows = await self.find_many(where)
+        return rows[0] if rows else None
+
+    async def create(self, data: dict, **kwargs):
+        self.calls += 1
+        await delay(self.latency)
+        row = {"id": next(self.ids), **{k: v() if callable(v) else v for k, v in self.defaults.items()}, **data}
+        self.rows[row["id"]] = row
+        return self.model(**row)
+
+    async def create_many(self, data: list[dict], **kwargs) -> int:
+        self.calls += 1
+        await delay(self.latency)
+        for entry in data:
+            row = {"id": next(self.ids), **{k: v() if callable(v) else v for k, v in self.defaults.items()}, **entry}
+            self.rows[row["id"]] = row
+        return len(data)
+
+    async def upsert(self, where: dict, data: dict, **kwargs):
+        existing = await self.find_unique(where)
+        if existing is not None:
+            return await self.update(where, data.get("update", {}))
+        return await self.create(data["create"])
+
+    async def update(self, where: dict, data: dict, **kwargs):
+        self.calls += 1
+        await delay(self.latency)
+        for row in self.rows.values():
+            if self.matches(row, where):
+                self.apply(row, data)
+                return self.model(**row)
+        return None
+
+    async def update_many(self, where: dict, data: dict, **kwargs) -> int:
+        self.calls += 1
+        await delay(self.latency)
+        count = 0
+        for row in self.rows.values():
+            if self.matches(row, where):
+                self.apply(row, data)
+                count += 1
+        return count
+
+    async def delete(self, where: dict, **kwargs):
+        self.calls += 1
+        for id, row in list(self.rows.items()):
+            if self.matches(row, where):
+                del self.rows[id]
+                return self.model(**row)
+        return None
+
+    async def delete_many(self, where: dict = None, **kwargs) -> int:
+        self.calls += 1
+        matched = [id for id, row in self.rows.items() if self.matches(row, where)]
+        for id in matched:
+            del self.rows[id]
+        return len(matched)
+
+    async def group_by(self, by: list[str], where: dict = None, sum: dict = None, **kwargs) -> list[dict]:
+        self.calls += 1
+        await delay(self.latency)
+        groups: dict[tuple, dict] = dict()
+        for row in self.rows.values():
+            if not self.matches(row, where):
+                continue
+            key = tuple(row[k] for k in by)
+            group = groups.setdefault(key, {**{k: row[k] for k in by}, "_sum": {k: 0 for k in sum or {}}})
+            for k in sum or {}:
+                group["_sum"][k] += row[k]
+        return list(groups.values())
+
+
+class FakeBatch:
+    def __init__(self, db: "FakeDB"):
+        self.db = db
+        self.operations = []
+
+    def __getattr__(self, name: str):
+        actions = getattr(self.db, name)
+        return FakeBatchActions(self, actions)
+
+    async def __aenter__(self) -> "FakeBatch":
+        return self
+
+    async def __aexit__(self, *exc):
+        if exc[0] is None:
+            for method, kwargs in self.operations:
+                await method(**kwargs)
+
+
+class FakeBatchActions:
+    def __init__(self, batch: FakeBatch, actions: FakeActions):
+        self.batch = batch
+        self.actions = actions
+
+    def __getattr__(self, name: str):
+        return lambda **kwargs: self.batch.operations.append((getattr(self.actions, name), kwargs))
+
+
+class FakeDB:
+    def __init__(self, latency: float = 0.0):
+        self.imagemonitor = FakeActions(models.ImageMonitor, IMAGE_MONITOR_DEFAULTS, latency)
+        self.guildconfig = FakeActions(models.GuildConfig, GUILD_CONFIG_DEFAULTS, latency)
+        self.imagehash = FakeActions(models.ImageHash, IMAGE_HASH_DEFAULTS, latency)
+        self.redirect = FakeActions(models.Redirect, REDIRECT_DEFAULTS, latency)
+        self.redirectrollup = FakeActions(models.RedirectRollup, REDIRECT_ROLLUP_DEFAULTS, latency)
+
+    def batch_(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    @property
+    def calls(self) -> int:
+        return sum(actions.calls for actions in vars(self).values() if isinstance(actions, FakeActions))
+
+
+def monitor_row(guild: FakeGuild, from_channel: FakeTextChannel, to_channel: FakeTextChannel, **overrides) -> dict:
+    row = {
+        **IMAGE_MONITOR_DEFAULTS,
+        "guild": guild.id,
+        "from_channel": from_channel.id,
+        "to_channel": to_channel.id,
+        "limit": 10,
+        "last_message": from_channel.last_message_id,
+    }
+    row.update(overrides)
+    return row
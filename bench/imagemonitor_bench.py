@@ -0,0 +1,330 @@
+import io
+import sys
+import json
+import time
+import asyncio
+import pathlib
+import argparse
+import random
+import tracemalloc
+import statistics
+from dataclasses import dataclass, field
+
+BENCH_DIR = pathlib.Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "xerox"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fakes import FakeAttachment, FakeBot, FakeDB, FakeGuild, FakeMessage, FakeTextChannel, FakeUser, monitor_row  # noqa: E402
+from Util import Configuration  # noqa: E402
+
+Configuration.MASTER_CONFIG = Configuration.MasterConfig.from_dict({"ENV": "bench", "EMBED_COLOR": "0x0"}, 0.0)
+
+from Database import DBConnector  # noqa: E402
+from Util import Logging, Metrics, Outbound, RateLimit, Redirects  # noqa: E402
+
+DEFAULT_BASELINE = BENCH_DIR / "baselines.json"
+PARAMETERS = ["messages", "rate", "attachments", "distinct", "photo_width", "photo_height", "monitors", "size", "latency", "db_latency"]
+
+
+@dataclass
+class Environment:
+    bot: FakeBot
+    db: FakeDB
+    guild: FakeGuild
+    log_channel: FakeTextChannel
+    cog: object = None
+    monitors: list[tuple[FakeTextChannel, FakeTextChannel]] = field(default_factory=list)
+
+    async def close(self):
+        if self.cog is not None:
+            self.cog.cog_unload()
+        await Logging.flush_guild_logs()
+        await Outbound.drain()
+        await Redirects.stop()
+
+
+@dataclass
+class Result:
+    name: str
+    messages: int
+    elapsed: float
+    latencies: list[float]
+    db_calls: int
+    uploads: int
+    peak_kib: float = 0.0
+    uploaded_kib: float = 0.0
+    delete_requests: int = 0
+    retained_per_message: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.messages / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            "throughput": round(self.throughput, 1),
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(self.latencies) * 1000, 3) if self.latencies else 0.0,
+            "db_calls": self.db_calls,
+            "uploads": self.uploads,
+            "uploaded_kib": round(self.uploaded_kib, 1),
+            "delete_requests": self.delete_requests,
+            "peak_kib": round(self.peak_kib, 1),
+            "retained_bytes_per_message": round(self.retained_per_message, 1),
+        }
+
+
+async def create_environment(monitors: int, latency: float = 0.0, db_latency: float = 0.0, load_cog: bool = True, **monitor_overrides) -> Environment:
+    db = FakeDB(db_latency)
+    DBConnector.db = db
+    DBConnector.guild_configs.clear()
+    DBConnector.pending_guild_configs.clear()
+    Outbound.QUEUES.clear()
+    RateLimit.USERS.buckets.clear()
+    RateLimit.CHANNELS.buckets.clear()
+    Logging.GUILD_LOG_BUFFERS.clear()
+    bot = FakeBot()
+    guild = bot.add_guild()
+    log_channel = guild.add_channel(latency)
+    await db.guildconfig.create(data={"guild": guild.id, "guild_log": log_channel.id})
+    Logging.BOT = bot
+    env = Environment(bot=bot, db=db, guild=guild, log_channel=log_channel)
+    for _ in range(monitors):
+        from_channel = guild.add_channel(latency)
+        to_channel = guild.add_channel(latency)
+        await db.imagemonitor.create(data=monitor_row(guild, from_channel, to_channel, **monitor_overrides))
+        env.monitors.append((from_channel, to_channel))
+    if load_cog:
+        from Cogs import ImageMonitor as image_monitor
+        image_monitor.db = db
+        env.cog = image_monitor.ImageMonitor(bot)
+        await env.cog.cog_load()
+    db.imagemonitor.calls = db.guildconfig.calls = 0
+    return env
+
+
+def make_photo(width: int, height: int) -> bytes:
+    from PIL import Image
+    rng = random.Random(0)
+    image = Image.new("RGB", (64, 48))
+    image.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(64 * 48)])
+    out = io.BytesIO()
+    image.resize((width, height), Image.BICUBIC).save(out, "PNG")
+    return out.getvalue()
+
+
+def make_messages(env: Environment, count: int, attachments: int, size: int, latency: float, monitored: bool = True, distinct: int = 0, photo: bytes = None) -> list[FakeMessage]:
+    authors = [FakeUser() for _ in range(50)]
+    channels = [from_channel for from_channel, _ in env.monitors] if monitored else [env.guild.add_channel(latency) for _ in range(max(1, len(env.monitors)))]
+    if photo is not None:
+        from PIL import Image
+        width, height = Image.open(io.BytesIO(photo)).size
+    messages = []
+    for i in range(count):
+        files = []
+        for j in range(attachments):
+            if photo is not None:
+                files.append(FakeAttachment(size=len(photo), filename=f"image-{j}.png", latency=latency, payload=photo, width=width, height=height))
+                continue
+            payload = ((i * attachments + j) % distinct).to_bytes(8, "little") * (size // 8) if distinct else None
+            files.append(FakeAttachment(size=size, filename=f"image-{j}.png", latency=latency, payload=payload))
+        messages.append(FakeMessage(channels[i % len(channels)], authors[i % len(authors)], files, content="look at this", latency=latency))
+    return messages
+
+
+async def drive(calls: list, rate: float) -> tuple[float, list[float]]:
+    latencies = []
+
+    async def timed(call):
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+
+    interval = 1 / rate if rate > 0 else 0
+    start = time.perf_counter()
+    tasks = []
+    for i, call in enumerate(calls):
+        if interval:
+            await asyncio.sleep(max(0.0, start + i * interval - time.perf_counter()))
+        tasks.append(asyncio.create_task(timed(call)))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start, latencies
+
+
+async def run_imagemonitor(name: str, args: argparse.Namespace, attachments: int, monitored: bool = True, distinct: int = 0, photo: bytes = None, **monitor_overrides) -> Result:
+    env = await create_environment(args.monitors, args.latency / 1000, args.db_latency / 1000, **monitor_overrides)
+    messages = make_messages(env, args.messages, attachments, args.size, args.latency / 1000, monitored, distinct, photo)
+    try:
+        elapsed, latencies = await drive([lambda m=m: env.cog.on_message(m) for m in messages], args.rate)
+    finally:
+        await env.close()
+    uploads = sum(to_channel.sent for _, to_channel in env.monitors)
+    result = Result(name, len(messages), elapsed, latencies, env.db.calls, uploads)
+    result.uploaded_kib = sum(to_channel.uploaded_bytes for _, to_channel in env.monitors) / 1024
+    result.delete_requests = sum(from_channel.delete_requests for from_channel, _ in env.monitors)
+    return result
+
+
+async def run_backlog(name: str, args: argparse.Namespace, bulk: bool) -> Result:
+    from Util.Backlog import BacklogEngine, BulkDeleter
+    env = await create_environment(1, args.latency / 1000, args.db_latency / 1000)
+    from_channel, to_channel = env.monitors[0]
+    monitor = env.cog.monitors[from_channel.id]
+    messages = make_messages(env, args.messages, 1, args.size, args.latency / 1000)
+    deleter = BulkDeleter(from_channel) if bulk else None
+    latencies = []
+
+    async def history():
+        for message in messages:
+            yield message
+
+    async def handle(message: FakeMessage):
+        started = time.perf_counter()
+        try:
+            return await env.cog.parse_message(message, monitor, True, deleter)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    engine = BacklogEngine(history(), handle, workers=env.cog.backlog_workers, queue_size=env.cog.backlog_queue_size, deleter=deleter)
+    try:
+        await engine.run()
+    finally:
+        await env.close()
+    result = Result(name, len(messages), engine.elapsed, latencies, env.db.calls, to_channel.sent)
+    result.uploaded_kib = to_channel.uploaded_bytes / 1024
+    result.delete_requests = from_channel.delete_requests
+    return result
+
+
+async def run_guild_log(name: str, args: argparse.Namespace) -> Result:
+    env = await create_environment(0, args.latency / 1000, args.db_latency / 1000, load_cog=False)
+    lines = [f"An image sent by <@{i}> (`{i}`) in <#1> has been redirected to <#2> : https://discord.com/channels/1/2/{i}." for i in range(args.messages)]
+    try:
+        elapsed, latencies = await drive([lambda line=line: Logging.guild_log(env.guild.id, line) for line in lines], args.rate)
+    finally:
+        await env.close()
+    return Result(name, len(lines), elapsed, latencies, env.db.calls, env.log_channel.sent)
+
+
+SCENARIOS = {
+    "unmonitored": lambda args: run_imagemonitor("unmonitored", args, 1, monitored=False),
+    "single-image": lambda args: run_imagemonitor("single-image", args, 1),
+    "multi-image": lambda args: run_imagemonitor("multi-image", args, args.attachments),
+    "multi-image-batched": lambda args: run_imagemonitor("multi-image-batched", args, args.attachments, batch=True),
+    "duplicate-images": lambda args: run_imagemonitor("duplicate-images", args, 1, distinct=args.distinct, duplicate_policy="skip"),
+    "duplicate-images-batched": lambda args: run_imagemonitor(
+        "duplicate-images-batched", args, args.attachments, distinct=max(1, args.attachments - 1), batch=True, duplicate_policy="skip"
+    ),
+    "transcoded": lambda args: run_imagemonitor("transcoded", args, 1, photo=make_photo(args.photo_width, args.photo_height), transcode_format="webp"),
+    "rate-limited": lambda args: run_imagemonitor("rate-limited", args, 1, rate_user=6, rate_user_burst=3, rate_overflow="drop"),
+    "backlog": lambda args: run_backlog("backlog", args, bulk=False),
+    "backlog-bulk-delete": lambda args: run_backlog("backlog-bulk-delete", args, bulk=True),
+    "guild-log": lambda args: run_guild_log("guild-log", args),
+}
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> Result:
+    for histogram in (Metrics.IMAGE_PHASES, Metrics.DB_QUERIES):
+        histogram.series.clear()
+    result = await SCENARIOS[name](args)
+    if args.allocations:
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await SCENARIOS[name](args)
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result.peak_kib = (peak - before) / 1024
+        result.retained_per_message = (after - before) / max(1, result.messages)
+    return result
+
+
+def run_parameters(args: argparse.Namespace, names: list[str]) -> dict:
+    return {name: getattr(args, name) for name in names}
+
+
+def compare(results: dict[str, dict], baselines: dict[str, dict], tolerance: float) -> list[str]:
+    regressions = []
+    for name, summary in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        expected, actual = baseline.get("parameters") or {}, summary.get("parameters") or {}
+        differing = sorted(key for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key))
+        if differing:
+            print(f"Skipping {name}, the baseline was recorded with different parameters: {', '.join(f'{key} {expected.get(key)} vs {actual.get(key)}' for key in differing)}.")
+            continue
+        if summary["throughput"] < baseline["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {summary['throughput']}/s vs baseline {baseline['throughput']}/s")
+        if summary["p99_ms"] > baseline["p99_ms"] * (1 + tolerance) and summary["p99_ms"] - baseline["p99_ms"] > 0.05:
+            regressions.append(f"{name}: p99 {summary['p99_ms']} ms vs baseline {baseline['p99_ms']} ms")
+    return regressions
+
+
+def print_table(results: dict[str, dict]):
+    print(f"{'scenario':<24} {'msg/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db':>6} {'uploads':>8} {'up KiB':>10} {'deletes':>8} {'peak KiB':>9} {'B/msg':>8}")
+    for name, s in results.items():
+        print(
+            f"{name:<24} {s['throughput']:>9.1f} {s['p50_ms']:>8.3f} {s['p95_ms']:>8.3f} {s['p99_ms']:>8.3f} "
+            f"{s['db_calls']:>6} {s['uploads']:>8} {s['uploaded_kib']:>10.1f} {s.get('delete_requests', 0):>8} {s['peak_kib']:>9.1f} {s['retained_bytes_per_message']:>8.1f}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the ImageMonitor pipeline and guild logging.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run, may be repeated. Defaults to all.")
+    parser.add_argument("--messages", type=int, default=2000, help="Messages per scenario.")
+    parser.add_argument("--rate", type=float, default=0, help="Messages per second, 0 sends as fast as possible.")
+    parser.add_argument("--attachments", type=int, default=5, help="Attachments per message in the multi-image scenarios.")
+    parser.add_argument("--distinct", type=int, default=20, help="Distinct images in the duplicate-images scenario.")
+    parser.add_argument("--photo-width", type=int, default=3000, help="Width of the generated photo in the transcoded scenario.")
+    parser.add_argument("--photo-height", type=int, default=2000, help="Height of the generated photo in the transcoded scenario.")
+    parser.add_argument("--monitors", type=int, default=10, help="Number of monitored channels.")
+    parser.add_argument("--size", type=int, default=64 * 1024, help="Attachment size in bytes.")
+    parser.add_argument("--latency", type=float, default=0, help="Simulated Discord latency per request in ms.")
+    parser.add_argument("--db-latency", type=float, default=0, help="Simulated database latency per query in ms.")
+    parser.add_argument("--no-allocations", dest="allocations", action="store_false", help="Skip the tracemalloc pass.")
+    parser.add_argument("--baseline", type=pathlib.Path, default=DEFAULT_BASELINE, help="Baseline file to compare against.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression before failing.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        results[name] = (await run_scenario(name, args)).summary()
+        results[name]["parameters"] = run_parameters(args, PARAMETERS)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print_table(results)
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update_baseline:
+        baselines.update(results)
+        args.baseline.write_text(json.dumps(baselines, indent=4, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}.")
+        return 0
+    if not baselines:
+        print(f"No baseline found at {args.baseline}, run with --update-baseline to create one.")
+        return 0
+    regressions = compare(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,182 @@
+import sys
+import gzip
+import json
+import time
+import asyncio
+import pathlib
+import argparse
+from dataclasses import dataclass, field
+
+from imagemonitor_bench import DEFAULT_BASELINE, Environment, Result, compare, print_table, run_parameters
+from fakes import FakeAttachment, FakeBot, FakeDB, FakeGuild, FakeMessage, FakeUser, monitor_row
+
+from Database import DBConnector
+from Util import Logging, Outbound
+
+
+@dataclass
+class Recording:
+    path: pathlib.Path
+    messages: list[tuple[float, dict]] = field(default_factory=list)
+    monitors: list[tuple[float, list[dict]]] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.messages[-1][0] if self.messages else 0.0
+
+
+def load(path: pathlib.Path) -> Recording:
+    recording = Recording(path)
+    offset = last = 0.0
+    with gzip.open(path, "rt") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry["k"] == "h":
+                offset = last
+                continue
+            last = offset + entry["t"]
+            if entry["k"] == "m":
+                recording.messages.append((last, entry))
+            elif entry["k"] == "i":
+                recording.monitors.append((last, entry["m"]))
+    return recording
+
+
+class Replayer:
+    def __init__(self, env: Environment, latency: float):
+        self.env = env
+        self.latency = latency
+        self.users: dict[int, FakeUser] = dict()
+
+    def guild(self, id: int) -> FakeGuild:
+        guild = self.env.bot.get_guild(id)
+        if guild is None:
+            guild = self.env.bot.add_guild(FakeGuild(id=id))
+        return guild
+
+    def channel(self, guild: FakeGuild, id: int):
+        return guild.get_channel(id) or guild.add_channel(self.latency, id=id)
+
+    async def apply_monitors(self, monitors: list[dict]):
+        db = self.env.db
+        await db.imagemonitor.delete_many()
+        self.env.monitors.clear()
+        for monitor in monitors:
+            guild = self.guild(monitor["g"])
+            if await db.guildconfig.find_unique(where={"guild": guild.id}) is None:
+                await db.guildconfig.create(data={"guild": guild.id, "guild_log": guild.add_channel(self.latency).id})
+            from_channel, to_channel = self.channel(guild, monitor["f"]), self.channel(guild, monitor["t"])
+            await db.imagemonitor.create(data=monitor_row(guild, from_channel, to_channel, limit=monitor["l"], batch=monitor["b"], **monitor.get("c", {})))
+            self.env.monitors.append((from_channel, to_channel))
+        if self.env.cog is not None:
+            self.env.cog.monitors = {m.from_channel: m for m in await db.imagemonitor.find_many()}
+
+    def message(self, entry: dict) -> FakeMessage:
+        guild = self.guild(entry["g"])
+        author = self.users.get(entry["a"])
+        if author is None:
+            author = self.users[entry["a"]] = FakeUser(id=entry["a"], bot=entry["b"])
+        files = [FakeAttachment(size=size, filename=f"image.{extension}" if extension else "image", latency=self.latency) for size, extension in entry["f"]]
+        return FakeMessage(self.channel(guild, entry["c"]), author, files, content="x" * entry["n"], latency=self.latency)
+
+
+async def create_environment(recording: Recording, args: argparse.Namespace) -> tuple[Environment, Replayer]:
+    db = FakeDB(args.db_latency / 1000)
+    DBConnector.db = db
+    DBConnector.guild_configs.clear()
+    DBConnector.pending_guild_configs.clear()
+    Outbound.QUEUES.clear()
+    Logging.GUILD_LOG_BUFFERS.clear()
+    bot = FakeBot()
+    Logging.BOT = bot
+    env = Environment(bot=bot, db=db, guild=None, log_channel=None)
+    replayer = Replayer(env, args.latency / 1000)
+    await replayer.apply_monitors(recording.monitors[0][1] if recording.monitors else [])
+
+    from Cogs import ImageMonitor as image_monitor
+    image_monitor.db = db
+    env.cog = image_monitor.ImageMonitor(bot)
+    await env.cog.cog_load()
+    db.imagemonitor.calls = db.guildconfig.calls = 0
+    return env, replayer
+
+
+async def replay(recording: Recording, args: argparse.Namespace) -> tuple[Result, list[float]]:
+    env, replayer = await create_environment(recording, args)
+    speed = args.speed
+    latencies, lags = [], []
+    monitors = iter(recording.monitors[1:])
+    next_monitors = next(monitors, None)
+
+    async def handle(message: FakeMessage, scheduled: float):
+        started = time.perf_counter()
+        lags.append(max(0.0, started - scheduled))
+        await env.cog.on_message(message)
+        latencies.append(time.perf_counter() - started)
+
+    start = time.perf_counter()
+    tasks = []
+    try:
+        for t, entry in recording.messages:
+            while next_monitors is not None and next_monitors[0] <= t:
+                await replayer.apply_monitors(next_monitors[1])
+                next_monitors = next(monitors, None)
+            scheduled = start + t / speed if speed > 0 else time.perf_counter()
+            if speed > 0:
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            tasks.append(asyncio.create_task(handle(replayer.message(entry), scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    finally:
+        await env.close()
+    uploads = sum(to_channel.sent for _, to_channel in env.monitors)
+    name = f"replay:{recording.path.name}@{speed:g}x" if speed > 0 else f"replay:{recording.path.name}@max"
+    return Result(name, len(recording.messages), elapsed, latencies, env.db.calls, uploads), lags
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay a recorded event file into ImageMonitor.on_message against in-memory fakes.")
+    parser.add_argument("recording", type=pathlib.Path, help="Recording written with RECORD_EVENTS_PATH.")
+    parser.add_argument("--speed", type=float, default=1, help="Replay speed multiplier, 0 replays as fast as possible.")
+    parser.add_argument("--latency", type=float, default=0, help="Simulated Discord latency per request in ms.")
+    parser.add_argument("--db-latency", type=float, default=0, help="Simulated database latency per query in ms.")
+    parser.add_argument("--baseline", type=pathlib.Path, default=DEFAULT_BASELINE, help="Baseline file to compare against.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression before failing.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+    recording = load(args.recording)
+    images = sum(len(entry["f"]) for _, entry in recording.messages)
+    print(f"Loaded {len(recording.messages)} messages with {images} attachments spanning {recording.duration:.1f}s from {args.recording}.")
+    result, lags = await replay(recording, args)
+    summary = result.summary()
+    summary["lag_p99_ms"] = round(sorted(lags)[min(len(lags) - 1, int(0.99 * len(lags)))] * 1000, 3) if lags else 0.0
+    summary["parameters"] = run_parameters(args, ["speed", "latency", "db_latency"])
+    results = {result.name: summary}
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print_table(results)
+        print(f"Schedule lag p99: {summary['lag_p99_ms']} ms")
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update_baseline:
+        baselines.update(results)
+        args.baseline.write_text(json.dumps(baselines, indent=4, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}.")
+        return 0
+    regressions = compare(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "ImageMonitor" ADD COLUMN     "batch" BOOLEAN NOT NULL DEFAULT false;
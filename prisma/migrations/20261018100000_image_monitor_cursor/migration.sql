@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "ImageMonitor" ADD COLUMN     "last_message" BIGINT;
@@ -0,0 +1,22 @@
+-- AlterTable
+ALTER TABLE "ImageMonitor" ADD COLUMN     "duplicate_perceptual" BOOLEAN NOT NULL DEFAULT false,
+ADD COLUMN     "duplicate_policy" TEXT NOT NULL DEFAULT 'forward',
+ADD COLUMN     "duplicate_window" INTEGER NOT NULL DEFAULT 1440;
+
+-- CreateTable
+CREATE TABLE "ImageHash" (
+    "id" SERIAL NOT NULL,
+    "monitor" INTEGER NOT NULL,
+    "digest" TEXT NOT NULL,
+    "perceptual" BIGINT,
+    "jump_url" TEXT NOT NULL,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "ImageHash_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "ImageHash_monitor_digest_idx" ON "ImageHash"("monitor", "digest");
+
+-- CreateIndex
+CREATE INDEX "ImageHash_monitor_created_at_idx" ON "ImageHash"("monitor", "created_at");
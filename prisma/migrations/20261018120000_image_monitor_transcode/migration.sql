@@ -0,0 +1,6 @@
+-- AlterTable
+ALTER TABLE "ImageMonitor" ADD COLUMN     "transcode_format" TEXT,
+ADD COLUMN     "transcode_max_bytes" INTEGER NOT NULL DEFAULT 1048576,
+ADD COLUMN     "transcode_max_dimension" INTEGER NOT NULL DEFAULT 2560,
+ADD COLUMN     "transcode_quality" INTEGER NOT NULL DEFAULT 85,
+ADD COLUMN     "transcode_saved" BIGINT NOT NULL DEFAULT 0;
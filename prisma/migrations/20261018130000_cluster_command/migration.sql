@@ -0,0 +1,13 @@
+-- CreateTable
+CREATE TABLE "ClusterCommand" (
+    "id" SERIAL NOT NULL,
+    "command" TEXT NOT NULL,
+    "payload" JSONB NOT NULL DEFAULT '{}',
+    "origin" INTEGER NOT NULL,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "ClusterCommand_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "ClusterCommand_created_at_idx" ON "ClusterCommand"("created_at");
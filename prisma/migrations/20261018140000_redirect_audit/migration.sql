@@ -0,0 +1,40 @@
+-- CreateTable
+CREATE TABLE "Redirect" (
+    "id" SERIAL NOT NULL,
+    "monitor" INTEGER NOT NULL,
+    "guild" BIGINT NOT NULL,
+    "channel" BIGINT NOT NULL,
+    "target" BIGINT NOT NULL,
+    "user" BIGINT NOT NULL,
+    "message" BIGINT NOT NULL,
+    "images" INTEGER NOT NULL,
+    "duplicates" INTEGER NOT NULL DEFAULT 0,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "Redirect_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateTable
+CREATE TABLE "RedirectRollup" (
+    "id" SERIAL NOT NULL,
+    "monitor" INTEGER NOT NULL,
+    "guild" BIGINT NOT NULL,
+    "user" BIGINT NOT NULL,
+    "hour" TIMESTAMP(3) NOT NULL,
+    "redirects" INTEGER NOT NULL DEFAULT 0,
+    "images" INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT "RedirectRollup_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "Redirect_monitor_created_at_idx" ON "Redirect"("monitor", "created_at");
+
+-- CreateIndex
+CREATE INDEX "Redirect_guild_created_at_idx" ON "Redirect"("guild", "created_at");
+
+-- CreateIndex
+CREATE INDEX "RedirectRollup_guild_hour_idx" ON "RedirectRollup"("guild", "hour");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "RedirectRollup_monitor_user_hour_key" ON "RedirectRollup"("monitor", "user", "hour");
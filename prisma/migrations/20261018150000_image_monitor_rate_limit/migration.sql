@@ -0,0 +1,6 @@
+-- AlterTable
+ALTER TABLE "ImageMonitor" ADD COLUMN     "rate_channel" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "rate_channel_burst" INTEGER NOT NULL DEFAULT 20,
+ADD COLUMN     "rate_overflow" TEXT NOT NULL DEFAULT 'warn',
+ADD COLUMN     "rate_user" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "rate_user_burst" INTEGER NOT NULL DEFAULT 5;
@@ -1,22 +1,71 @@
+import time
+import importlib
+
 import disnake  # noqa
-from disnake import ApplicationCommandInteraction
+from disnake import ApplicationCommandInteraction, Intents, MemberCacheFlags
 from disnake.ext import commands
 from disnake.ext.commands import ExtensionAlreadyLoaded, errors
 
-from Util import Configuration, Emoji, Logging
+from Util import Cluster, Configuration, Emoji, Logging, Metrics, Outbound, RateLimit, Recorder, Redirects, TimeZones, Transcode
+
+
+def cache_options(cogs: tuple[str, ...], profile: str) -> dict:
+    if profile != "low":
+        return {
+            "intents": Intents(
+                guilds=True,
+                members=True,
+                emojis=True,
+                messages=True,
+                reactions=True,
+                message_content=True,
+                moderation=True
+            )
+        }
 
+    intents = Intents.none()
+    intents.guilds = True
+    member_cache = False
+    for name in cogs:
+        try:
+            cog = getattr(importlib.import_module(f"Cogs.{name}"), name)
+        except Exception as e:
+            Logging.error(f"Failed to read the requirements of cog {name}: {e}")
+            continue
+        for intent in cog.INTENTS:
+            setattr(intents, intent, True)
+        member_cache |= cog.MEMBER_CACHE
+    if member_cache:
+        intents.members = True
+    return {
+        "intents": intents,
+        "member_cache_flags": MemberCacheFlags.from_intents(intents) if member_cache else MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": member_cache,
+        "max_messages": None,
+    }
 
-class xerox(commands.InteractionBot):
+
+class xerox(commands.AutoShardedInteractionBot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.loaded = False
         self.shutting_down = False
+        self.command_started: dict[int, float] = dict()
+        self.started = time.perf_counter()
 
     async def on_ready(self):
         if not self.loaded:
-            await Logging.initialize(self, Configuration.get_master_var("BOT_LOG_CHANNEL"))
+            Outbound.initialize()
+            await Metrics.start(self, Configuration.get_master_var("METRICS_HOST", "127.0.0.1"), Cluster.metrics_port(Configuration.get_master_var("METRICS_PORT", 0)))
+            await Logging.initialize(self, Configuration.get_config().bot_log_channel, Cluster.is_clustered(), f"[{Cluster.label()}]" if Cluster.is_clustered() else "")
+            await Cluster.start(self)
+            Recorder.initialize()
+            RateLimit.initialize()
+            Redirects.initialize()
+            Transcode.initialize()
+            await TimeZones.initialize()
             await Emoji.initialize(self)
-            for extension in Configuration.get_master_var("COGS", []):
+            for extension in Configuration.get_config().cogs:
                 try:
                     Logging.info(f"Loading {extension} cog.")
                     self.load_extension(f"Cogs.{extension}")
@@ -24,9 +73,42 @@ class xerox(commands.InteractionBot):
                     pass
                 except Exception as e:
                     Logging.error(f"Failed to load cog {extension}: {e}")
-            Logging.info("Successfully logged in and ready.")
+            self.check_intents()
+            shards = Cluster.describe_shards(self)
+            Logging.info(f"Successfully logged in and ready ({Cluster.label()}): {'; '.join(shards)}.")
+            startup = self.describe_startup()
+            Logging.info(startup)
             self.loaded = True
-            await Logging.bot_log("Successfully logged in and ready.")
+            await Logging.bot_log("Successfully logged in and ready.\n" + "\n".join(shards) + "\n" + startup)
+
+    def check_intents(self):
+        for name, cog in self.cogs.items():
+            missing = [intent for intent in getattr(cog, "INTENTS", ()) if not getattr(self.intents, intent)]
+            if missing:
+                Logging.warning(f"Cog {name} needs the {', '.join(missing)} intent(s), which are disabled.")
+            if getattr(cog, "MEMBER_CACHE", False) and not self._connection.member_cache_flags.joined:
+                Logging.warning(f"Cog {name} needs the member cache, which is disabled.")
+
+    def describe_startup(self) -> str:
+        members = sum(len(guild.members) for guild in self.guilds)
+        return (
+            f"Ready after {time.perf_counter() - self.started:.1f}s using {Metrics.resident_memory() / 1024 / 1024:.0f} MiB, "
+            f"memory profile {Configuration.get_master_var('MEMORY_PROFILE', 'default')}, {len(self.guilds)} guild(s), {members} cached member(s), "
+            f"intents {self.intents.value}."
+        )
+
+    async def on_shard_ready(self, shard_id: int):
+        Logging.info(f"Shard {shard_id} is ready ({Cluster.label()}).")
+        if self.loaded:
+            await Logging.bot_log(f"Shard {shard_id} is ready.")
+
+    async def on_shard_resumed(self, shard_id: int):
+        Logging.info(f"Shard {shard_id} resumed its session, latency {Cluster.format_latency(self.get_shard(shard_id).latency)}.")
+
+    async def on_shard_disconnect(self, shard_id: int):
+        Logging.warning(f"Shard {shard_id} disconnected from the gateway.")
+        if self.loaded and not self.shutting_down:
+            await Logging.bot_log(f"Shard {shard_id} disconnected from the gateway.")
 
     async def close(self):
         if not self.shutting_down:
@@ -41,9 +123,28 @@ class xerox(commands.InteractionBot):
                 if hasattr(c, "close"):
                     await c.close()
                 self.unload_extension(f"Cogs.{cog}")
+            await Cluster.stop()
+            await Recorder.stop()
+            await Redirects.stop()
+            Transcode.shutdown()
+            await Logging.flush_guild_logs()
+            await Outbound.drain()
+            await Metrics.stop()
         return await super().close()
 
+    async def on_slash_command(self, inter: ApplicationCommandInteraction):
+        self.command_started[inter.id] = time.perf_counter()
+
+    async def on_slash_command_completion(self, inter: ApplicationCommandInteraction):
+        self.observe_command(inter, "ok")
+
+    def observe_command(self, inter: ApplicationCommandInteraction, status: str):
+        start = self.command_started.pop(inter.id, None)
+        if start is not None:
+            Metrics.COMMANDS.observe(time.perf_counter() - start, command=inter.application_command.qualified_name, status=status)
+
     async def on_slash_command_error(self, inter: ApplicationCommandInteraction, exception: errors.CommandError) -> None:
+        self.observe_command(inter, "error")
         if isinstance(exception, errors.NotOwner):
             await inter.response.send_message("You are not the owner of this bot.", ephemeral=True)
         elif isinstance(exception, errors.BotMissingPermissions):
@@ -7,15 +7,54 @@ from disnake import ApplicationCommandInteraction
 from disnake.ext import commands
 
 from Cogs.BaseCog import BaseCog
+from Database import DBConnector
 from Database.DBConnector import db  # noqa
-from Util import Configuration, Logging
+from Util import Cluster, Configuration, Logging, Outbound
+from Views import Embed
+
+
+ACTIVITY_TYPES = {
+    "Playing": disnake.ActivityType.playing,
+    "Listening": disnake.ActivityType.listening,
+    "Watching": disnake.ActivityType.watching,
+    "Competing": disnake.ActivityType.competing,
+}
 
 
 class Administration(BaseCog):
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
+        Cluster.on_command("presence", self.apply_presence)
+        Cluster.on_command("restart", self.apply_restart)
+        Cluster.on_command("reload-cog", self.apply_reload_cog)
+        Cluster.on_command("reload-config", self.apply_reload_config)
+
+    def cog_unload(self):
+        for command in ("presence", "restart", "reload-cog", "reload-config"):
+            Cluster.remove_command(command)
+
+    async def apply_presence(self, payload: dict):
+        await self.bot.change_presence(activity=disnake.Activity(type=ACTIVITY_TYPES[payload["type"]], name=payload["message"]))
 
-    @commands.slash_command(description="Change the bot's presence.", guild_ids=[Configuration.get_master_var("ADMIN_GUILD", 0)])
+    async def apply_restart(self, payload: dict):
+        Logging.info(f"Restart requested by {payload['by']} on another cluster.")
+        await self.bot.close()
+
+    async def apply_reload_cog(self, payload: dict):
+        cog = payload["cog"]
+        c = self.bot.get_cog(cog)
+        if c is None:
+            return
+        if hasattr(c, "close") and not payload["now"]:
+            await c.close()
+        self.bot.unload_extension(f"Cogs.{cog}")
+        self.bot.load_extension(f"Cogs.{cog}")
+        Logging.info(f"{cog} has been reloaded by {payload['by']} on another cluster.")
+
+    async def apply_reload_config(self, payload: dict):
+        Configuration.reload_master(payload["force"])
+
+    @commands.slash_command(description="Change the bot's presence.", guild_ids=[Configuration.get_config().admin_guild])
     @commands.is_owner()
     @commands.default_member_permissions(administrator=True)
     async def presence(
@@ -24,28 +63,22 @@ class Administration(BaseCog):
         type:    str = commands.Param(description="The type of activity", choices=["Playing", "Listening", "Watching", "Competing"]),
         message: str = commands.Param(description="The message to display")
     ):
-        match type:
-            case "Playing":
-                activity = disnake.Activity(type=disnake.ActivityType.playing, name=message)
-            case "Listening":
-                activity = disnake.Activity(type=disnake.ActivityType.listening, name=message)
-            case "Watching":
-                activity = disnake.Activity(type=disnake.ActivityType.watching, name=message)
-            case "Competing":
-                activity = disnake.Activity(type=disnake.ActivityType.competing, name=message)
-        await self.bot.change_presence(activity=activity)
+        payload = {"type": type, "message": message}
+        await self.apply_presence(payload)
+        await Cluster.broadcast("presence", payload)
         await inter.response.send_message("Presence changed.", ephemeral=True)
 
-    @commands.slash_command(description="Restart the bot.", guild_ids=[Configuration.get_master_var("ADMIN_GUILD", 0)])
+    @commands.slash_command(description="Restart the bot.", guild_ids=[Configuration.get_config().admin_guild])
     @commands.is_owner()
     @commands.default_member_permissions(administrator=True)
     async def restart(self, inter: ApplicationCommandInteraction):
         Logging.info(f"Restart requested by {inter.author.name}.")
         await Logging.bot_log(f"Restart requested by {inter.author.name}.")
         await inter.response.send_message("Shutting down.", ephemeral=True)
+        await Cluster.broadcast("restart", {"by": inter.author.name})
         await self.bot.close()
 
-    @commands.slash_command(description="Cog management.", guild_ids=[Configuration.get_master_var("ADMIN_GUILD", 0)])
+    @commands.slash_command(description="Cog management.", guild_ids=[Configuration.get_config().admin_guild])
     @commands.is_owner()
     @commands.default_member_permissions(administrator=True)
     async def cog(self, inter: ApplicationCommandInteraction):
@@ -69,11 +102,78 @@ class Administration(BaseCog):
                 await c.close()
             self.bot.unload_extension(f"Cogs.{cog}")
             self.bot.load_extension(f"Cogs.{cog}")
+            await Cluster.broadcast("reload-cog", {"cog": cog, "now": now, "by": inter.author.name})
             await inter.edit_original_response(f"**{cog}** has been reloaded.")
             await Logging.bot_log(f"**{cog}** has been reloaded by {inter.author.name}.")
         else:
             await inter.response.send_message("I can't find that cog.", ephemeral=True)
 
+    @commands.slash_command(name="reload-config", description="Reload the master config from disk.", guild_ids=[Configuration.get_config().admin_guild])
+    @commands.is_owner()
+    @commands.default_member_permissions(administrator=True)
+    async def reload_config(
+        self,
+        inter: ApplicationCommandInteraction,
+        force: bool = commands.Param(description="Reload even if the file has not changed.", default=False)
+    ):
+        try:
+            reloaded = Configuration.reload_master(force)
+        except Exception as e:
+            await inter.response.send_message(f"Failed to reload the config: {e}", ephemeral=True)
+            return
+        if not reloaded:
+            await inter.response.send_message("The config file has not changed.", ephemeral=True)
+            return
+        await Cluster.broadcast("reload-config", {"force": True})
+        await inter.response.send_message("Config reloaded. Settings that cogs read when loading take effect once the cog is reloaded.", ephemeral=True)
+        await Logging.bot_log(f"Master config reloaded by {inter.author.name}.")
+
+    @commands.slash_command(description="Runtime statistics.", guild_ids=[Configuration.get_config().admin_guild])
+    @commands.is_owner()
+    @commands.default_member_permissions(administrator=True)
+    async def stats(self, inter: ApplicationCommandInteraction):
+        pass
+
+    @stats.sub_command(description="Show the outbound message queues.")
+    async def outbound(self, inter: ApplicationCommandInteraction):
+        queues = sorted(Outbound.stats(), key=lambda q: (q["depth"], q["sent"]), reverse=True)
+        if not queues:
+            await inter.response.send_message("No messages have been sent yet.", ephemeral=True)
+            return
+        embed = Embed.default_embed(
+            title="Outbound queues",
+            description=f"{sum(q['depth'] for q in queues)} message(s) queued across {len(queues)} channel(s).",
+            author=inter.author.name,
+            icon_url=inter.author.avatar.url
+        )
+        for queue in queues[:10]:
+            waits = ", ".join(f"{p}: {queue['avg_wait'][p] * 1000:.0f}/{queue['max_wait'][p] * 1000:.0f} ms" for p in queue["avg_wait"])
+            embed.add_field(
+                name=f"Channel {queue['channel']}",
+                value=f"<#{queue['channel']}>\nDepth {queue['depth']} | Sent {queue['sent']} | Merged {queue['merged']} | Dropped {queue['dropped']}\nWait (avg/max) {waits or 'n/a'}",
+                inline=False
+            )
+        await inter.response.send_message(embed=embed, ephemeral=True)
+
+    @stats.sub_command(name="db", description="Show database query statistics.")
+    async def db_stats(self, inter: ApplicationCommandInteraction):
+        stats = sorted(DBConnector.query_stats.items(), key=lambda item: item[1].total, reverse=True)
+        stats = [(key, s) for key, s in stats if s.count]
+        if not stats:
+            await inter.response.send_message("No queries have been run yet.", ephemeral=True)
+            return
+        lines = [f"{'query':<28} {'count':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'slow':>5} {'err':>4}"]
+        for (model, operation), s in stats[:20]:
+            lines.append(
+                f"{f'{model}.{operation}':<28} {s.count:>7} {s.percentile(0.5) * 1000:>7.1f} {s.percentile(0.95) * 1000:>7.1f} "
+                f"{s.percentile(0.99) * 1000:>7.1f} {s.max * 1000:>7.1f} {s.slow:>5} {s.errors:>4}"
+            )
+        total = sum(s.total for _, s in stats)
+        await inter.response.send_message(
+            f"Latencies in ms, slow threshold {DBConnector.SLOW_QUERY_THRESHOLD * 1000:.0f} ms, {total:.2f}s spent in queries.\n```\n" + "\n".join(lines) + "\n```",
+            ephemeral=True
+        )
+
     @commands.slash_command(description="Run any code")
     @commands.is_owner()
     @commands.default_member_permissions(manage_guild=True)
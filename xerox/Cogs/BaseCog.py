@@ -3,5 +3,8 @@ from disnake.ext import commands
 
 
 class BaseCog(commands.Cog):
+    INTENTS: tuple[str, ...] = ()
+    MEMBER_CACHE = False
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
@@ -5,7 +5,7 @@ from disnake import ApplicationCommandInteraction, Forbidden
 from disnake.ext import commands
 
 from Cogs.BaseCog import BaseCog
-from Util import Logging
+from Util import Cluster, Logging, Outbound
 
 
 class Basic(BaseCog):
@@ -15,8 +15,15 @@ class Basic(BaseCog):
     @commands.slash_command(description="Ping the bot.")
     async def ping(self, inter: ApplicationCommandInteraction):
         latency = round(self.bot.latency * 1000, 2)
+        content = f"Websocket ping is {latency} ms"
+        if len(self.bot.shards) > 1 or Cluster.is_clustered():
+            shard_id = inter.guild.shard_id if inter.guild is not None else 0
+            shard = self.bot.get_shard(shard_id)
+            if shard is not None:
+                content = f"Websocket ping is {Cluster.format_latency(shard.latency)} on shard {shard_id} ({Cluster.label()})"
+            content += "\n" + "\n".join(Cluster.describe_shards(self.bot))
         t1 = time.perf_counter()
-        await inter.response.send_message(f"Websocket ping is {latency} ms", ephemeral=True)
+        await inter.response.send_message(content, ephemeral=True)
         t2 = time.perf_counter()
         rest = round((t2 - t1) * 1000)
         if not inter.is_expired():
@@ -28,7 +35,7 @@ class Basic(BaseCog):
     @commands.bot_has_permissions(send_messages=True)
     async def echo(self, inter: ApplicationCommandInteraction, message: str = commands.Param(description="The message to send.")):
         try:
-            await inter.channel.send(message.replace("\\n", "\n"))
+            await Outbound.send(inter.channel, Outbound.Priority.USER, content=message.replace("\\n", "\n"))
         except Forbidden:
             await inter.response.send_message("I don't have permission to send messages in that channel.", ephemeral=True)
             return
@@ -1,28 +1,444 @@
+import io
 import os
+import time
 import uuid
-import pathlib
+import heapq
+import asyncio
+import datetime
+import tempfile
+from typing import List
 
+import aiohttp
 import disnake # noqa
-from disnake import ApplicationCommandInteraction, Message
-from disnake.ext import commands
+from disnake import ApplicationCommandInteraction, Attachment, Message
+from disnake.ext import commands, tasks
 
 from Cogs.BaseCog import BaseCog
-from Database.DBConnector import db
+from Database.DBConnector import db, get_cached_guild_config
 from prisma.models import ImageMonitor as ImageMonitorModel
-from Util import Logging, Utils
+from Util import Cluster, Configuration, Dedupe, Logging, Metrics, Outbound, RateLimit, Recorder, Redirects, Template, Transcode, Utils
+from Util.Backlog import BacklogEngine, BulkDeleter
 from Util.Emoji import msg_with_emoji
 from Views import Embed
 
 
+MAX_FILES_PER_MESSAGE = 10
+HASH_PRUNE_INTERVAL = 3600
+STATS_MONITORS = 20
+STATS_USERS = 10
+DEFAULT_SUCCESS_MSG = "Image moved successfully"
+
+
 class ImageMonitor(BaseCog):
+    INTENTS = ("guild_messages", "message_content")
+
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
+        self.monitors: dict[int, ImageMonitorModel] = dict()
+        self.spool_threshold: int = Configuration.get_master_var("IMAGE_SPOOL_THRESHOLD", 8 * 1024 * 1024)
+        self.session: aiohttp.ClientSession | None = None
+        self.backlog_workers: int = Configuration.get_master_var("BACKLOG_WORKERS", 4)
+        self.backlog_queue_size: int = Configuration.get_master_var("BACKLOG_QUEUE_SIZE", 50)
+        self.backlog_progress_interval: float = Configuration.get_master_var("BACKLOG_PROGRESS_INTERVAL", 5)
+        self.cursors: dict[int, int] = dict()
+        self.dirty_cursors: set[int] = set()
+        self.unfinished_messages: dict[int, set[int]] = dict()
+        self.finished_messages: dict[int, list[int]] = dict()
+        self.failed_messages: dict[int, set[int]] = dict()
+        self.catch_up_concurrency: int = Configuration.get_master_var("CATCH_UP_CONCURRENCY", 2)
+        self.catch_up_limit: int = Configuration.get_master_var("CATCH_UP_LIMIT", 1000)
+        self.catch_up_retry_delay: float = Configuration.get_master_var("CATCH_UP_RETRY_DELAY", 60)
+        self.catch_up_task: asyncio.Task | None = None
+        self.catch_up_retry: asyncio.TimerHandle | None = None
+        self.catch_up_claims: set[int] | None = None
+        self.flush_cursors.change_interval(seconds=Configuration.get_master_var("CURSOR_FLUSH_INTERVAL", 30))
+        self.duplicate_indexes: dict[int, Dedupe.DuplicateIndex] = dict()
+        self.duplicate_index_size: int = Configuration.get_master_var("DUPLICATE_INDEX_SIZE", 1000)
+        self.duplicate_distance: int = Configuration.get_master_var("DUPLICATE_PERCEPTUAL_DISTANCE", 6)
+        self.pending_hashes: list[dict] = []
+        self.hashes_pruned: float = time.monotonic()
+        self.flush_hashes.change_interval(seconds=Configuration.get_master_var("DUPLICATE_FLUSH_INTERVAL", 10))
+        self.transcode_savings: dict[int, int] = dict()
+        self.templates: dict[int, Template.Template] = dict()
+        self.accepting = True
+        self.in_flight: dict[asyncio.Task, Message] = dict()
+        self.queued: dict[int, Message] = dict()
+        self.engines: set[BacklogEngine] = set()
+        self.drain_timeout: float = Configuration.get_master_var("DRAIN_TIMEOUT", 15)
+        self.completed = 0
 
     async def cog_load(self):
-        pathlib.Path("imgs").mkdir(parents=True, exist_ok=True)
-        directory = pathlib.Path("imgs")
-        for file in directory.iterdir():
-            file.unlink(missing_ok=True)
+        monitors = [monitor for monitor in await db.imagemonitor.find_many() if Cluster.owns(monitor.guild)]
+        self.monitors = {monitor.from_channel: monitor for monitor in monitors}
+        for monitor in monitors:
+            self.compile_template(monitor)
+            if monitor.last_message is not None:
+                self.cursors[monitor.id] = monitor.last_message
+            else:
+                self.seed_cursor(monitor)
+        Logging.info(f"Loaded {len(self.monitors)} ImageMonitor entries.")
+        Recorder.record_monitors(self.monitors.values())
+        self.flush_cursors.start()
+        self.flush_hashes.start()
+        self.schedule_catch_up()
+
+    def cog_unload(self):
+        self.flush_cursors.cancel()
+        self.flush_hashes.cancel()
+        if self.catch_up_task is not None:
+            self.catch_up_task.cancel()
+        if self.catch_up_retry is not None:
+            self.catch_up_retry.cancel()
+        if self.session is not None and not self.session.closed:
+            self.bot.loop.create_task(self.session.close())
+
+    async def close(self):
+        await self.drain()
+        if self.catch_up_task is not None:
+            self.catch_up_task.cancel()
+        if self.catch_up_retry is not None:
+            self.catch_up_retry.cancel()
+        await self.flush_cursors()
+        await self.flush_hashes()
+
+    async def drain(self):
+        self.accepting = False
+        engines = list(self.engines)
+        for engine in engines:
+            engine.stop()
+        if not self.in_flight and not engines and not self.queued:
+            return
+        start = time.perf_counter()
+        completed = self.completed
+        Logging.info(f"Pausing ImageMonitor intake and waiting for {len(self.in_flight)} in-flight message(s) and {len(engines)} backlog run(s).")
+        if engines:
+            await asyncio.wait([asyncio.ensure_future(engine.wait()) for engine in engines], timeout=self.drain_timeout)
+        abandoned: dict[asyncio.Task, Message] = dict()
+        if self.in_flight:
+            _, pending = await asyncio.wait(list(self.in_flight), timeout=max(0.0, start + self.drain_timeout - time.perf_counter()))
+            abandoned = {task: self.in_flight[task] for task in pending}
+            for task in pending:
+                task.cancel()
+        for engine in engines:
+            if not engine.done.is_set():
+                engine.abort()
+        skipped = sum(engine.skipped for engine in engines)
+        report = f"ImageMonitor drained in {time.perf_counter() - start:.1f}s: {self.completed - completed} message(s) completed, {len(abandoned)} abandoned"
+        if skipped:
+            report += f", {skipped} backlog message(s) left for the next catch-up"
+        if self.queued:
+            report += f", {len(self.queued)} rate limited message(s) left for the next catch-up"
+        Logging.info(f"{report}.")
+        if abandoned:
+            Logging.warning(f"Abandoned ImageMonitor messages: {', '.join(message.jump_url for message in abandoned.values())}")
+            await Logging.bot_log(f"{report}, these may need to be checked manually:\n" + "\n".join(message.jump_url for message in list(abandoned.values())[:10]))
+        else:
+            await Logging.bot_log(f"{report}.")
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        self.schedule_catch_up()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.schedule_catch_up()
+
+    def compile_template(self, monitor: ImageMonitorModel) -> Template.Template:
+        success_msg = monitor.success_msg if monitor.success_msg is not None else DEFAULT_SUCCESS_MSG
+        try:
+            template = Template.parse(success_msg)
+        except ValueError as e:
+            Logging.warning(f"The success message of ImageMonitor entry {monitor.id} is invalid, unknown variables are sent as is: {e}")
+            template = Template.parse(success_msg, strict=False)
+        self.templates[monitor.id] = template
+        return template
+
+    def seed_cursor(self, monitor: ImageMonitorModel):
+        channel = self.bot.get_channel(monitor.from_channel)
+        if channel is not None and channel.last_message_id is not None:
+            self.advance_cursor(monitor, channel.last_message_id)
+
+    def advance_cursor(self, monitor: ImageMonitorModel, message_id: int):
+        if message_id > self.cursors.get(monitor.id, 0):
+            self.cursors[monitor.id] = message_id
+            self.dirty_cursors.add(monitor.id)
+
+    def start_cursor(self, monitor: ImageMonitorModel, message_id: int):
+        if message_id > self.cursors.get(monitor.id, 0):
+            self.unfinished_messages.setdefault(monitor.id, set()).add(message_id)
+
+    def finish_cursor(self, monitor: ImageMonitorModel, message_id: int):
+        unfinished = self.unfinished_messages.get(monitor.id)
+        if unfinished is None or message_id not in unfinished:
+            return
+        unfinished.discard(message_id)
+        finished = self.finished_messages.setdefault(monitor.id, [])
+        heapq.heappush(finished, message_id)
+        floor = min(unfinished) if unfinished else None
+        cursor = None
+        while finished and (floor is None or finished[0] < floor):
+            cursor = heapq.heappop(finished)
+        if cursor is not None:
+            self.advance_cursor(monitor, cursor)
+        if not unfinished:
+            del self.unfinished_messages[monitor.id]
+
+    def fail_cursor(self, monitor: ImageMonitorModel, message_id: int):
+        if message_id in self.unfinished_messages.get(monitor.id, ()):
+            self.failed_messages.setdefault(monitor.id, set()).add(message_id)
+            self.retry_catch_up()
+
+    def release_failed(self, monitor: ImageMonitorModel, until: int):
+        failed = self.failed_messages.get(monitor.id)
+        if not failed:
+            return
+        for message_id in [message_id for message_id in failed if message_id < until]:
+            failed.discard(message_id)
+            self.finish_cursor(monitor, message_id)
+        if not failed:
+            del self.failed_messages[monitor.id]
+
+    def forget_cursor(self, monitor_id: int):
+        self.cursors.pop(monitor_id, None)
+        self.dirty_cursors.discard(monitor_id)
+        self.unfinished_messages.pop(monitor_id, None)
+        self.finished_messages.pop(monitor_id, None)
+        self.failed_messages.pop(monitor_id, None)
+
+    @tasks.loop(seconds=30)
+    async def flush_cursors(self):
+        dirty = self.dirty_cursors
+        savings = self.transcode_savings
+        self.dirty_cursors = set()
+        self.transcode_savings = dict()
+        for monitor_id in dirty | savings.keys():
+            data = {}
+            if monitor_id in dirty and monitor_id in self.cursors:
+                data["last_message"] = self.cursors[monitor_id]
+            if monitor_id in savings:
+                data["transcode_saved"] = {
+                    "increment": savings[monitor_id]
+                }
+            try:
+                await db.imagemonitor.update_many(
+                    where={
+                        "id": monitor_id
+                    },
+                    data=data
+                )
+            except Exception as e:
+                if monitor_id in dirty:
+                    self.dirty_cursors.add(monitor_id)
+                if monitor_id in savings:
+                    self.transcode_savings[monitor_id] = self.transcode_savings.get(monitor_id, 0) + savings[monitor_id]
+                Logging.error(f"Failed to save the cursor of ImageMonitor entry {monitor_id}: {e}")
+
+    @tasks.loop(seconds=10)
+    async def flush_hashes(self):
+        pending = self.pending_hashes
+        self.pending_hashes = []
+        if pending:
+            try:
+                await db.imagehash.create_many(data=pending)
+            except Exception as e:
+                Logging.error(f"Failed to save {len(pending)} image hashes: {e}")
+        if time.monotonic() - self.hashes_pruned >= HASH_PRUNE_INTERVAL:
+            self.hashes_pruned = time.monotonic()
+            await self.prune_hashes()
+
+    async def prune_hashes(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for monitor in list(self.monitors.values()):
+            try:
+                await db.imagehash.delete_many(
+                    where={
+                        "monitor": monitor.id,
+                        "created_at": {
+                            "lt": now - datetime.timedelta(minutes=monitor.duplicate_window)
+                        }
+                    }
+                )
+            except Exception as e:
+                Logging.error(f"Failed to prune image hashes of ImageMonitor entry {monitor.id}: {e}")
+
+    async def get_duplicate_index(self, monitor: ImageMonitorModel) -> Dedupe.DuplicateIndex:
+        index = self.duplicate_indexes.get(monitor.id)
+        if index is None:
+            index = self.duplicate_indexes[monitor.id] = Dedupe.DuplicateIndex(self.duplicate_index_size, self.duplicate_distance)
+            index.loaded = asyncio.create_task(self.load_duplicate_index(monitor, index))
+        await asyncio.shield(index.loaded)
+        return index
+
+    async def load_duplicate_index(self, monitor: ImageMonitorModel, index: Dedupe.DuplicateIndex):
+        try:
+            hashes = await db.imagehash.find_many(
+                where={
+                    "monitor": monitor.id,
+                    "created_at": {
+                        "gte": datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=monitor.duplicate_window)
+                    }
+                },
+                order={
+                    "created_at": "desc"
+                },
+                take=index.size
+            )
+        except Exception as e:
+            Logging.error(f"Failed to load image hashes of ImageMonitor entry {monitor.id}: {e}")
+            return
+        for h in reversed(hashes):
+            index.add(Dedupe.Fingerprint(h.digest, Dedupe.to_unsigned(h.perceptual)), h.jump_url, h.created_at.timestamp())
+
+    async def fingerprint_attachment(self, monitor: ImageMonitorModel, attachment: Attachment, buffer: io.IOBase) -> Dedupe.Fingerprint | None:
+        if monitor.duplicate_policy == "forward":
+            return None
+        with Metrics.IMAGE_PHASES.time(phase="hash"):
+            return await Dedupe.fingerprint(buffer, attachment.size, monitor.duplicate_perceptual)
+
+    async def lookup_duplicate(self, monitor: ImageMonitorModel, fingerprint: Dedupe.Fingerprint) -> str | None:
+        index = await self.get_duplicate_index(monitor)
+        seen = index.find(fingerprint, monitor.duplicate_window * 60)
+        if seen is None:
+            return None
+        return await seen.resolve()
+
+    async def find_duplicate(self, monitor: ImageMonitorModel, attachment: Attachment, buffer: io.IOBase) -> tuple[Dedupe.Seen | None, str | None]:
+        fingerprint = await self.fingerprint_attachment(monitor, attachment, buffer)
+        if fingerprint is None:
+            return None, None
+        jump_url = await self.lookup_duplicate(monitor, fingerprint)
+        if jump_url is not None:
+            return None, jump_url
+        return self.reserve(monitor, fingerprint), None
+
+    def reserve(self, monitor: ImageMonitorModel, fingerprint: Dedupe.Fingerprint) -> Dedupe.Seen | None:
+        index = self.duplicate_indexes.get(monitor.id)
+        if index is None or index.find(fingerprint, monitor.duplicate_window * 60) is not None:
+            return None
+        return index.reserve(fingerprint)
+
+    def remember(self, monitor: ImageMonitorModel, reservation: Dedupe.Seen | None, jump_url: str):
+        if reservation is None or reservation.pending is None:
+            return
+        index = self.duplicate_indexes.get(monitor.id)
+        if index is not None:
+            index.complete(reservation, jump_url)
+        self.pending_hashes.append(
+            {
+                "monitor": monitor.id,
+                "digest": reservation.digest,
+                "perceptual": Dedupe.to_signed(reservation.perceptual),
+                "jump_url": jump_url
+            }
+        )
+
+    def release(self, monitor: ImageMonitorModel, reservations: List[Dedupe.Seen | None]):
+        index = self.duplicate_indexes.get(monitor.id)
+        for reservation in reservations:
+            if reservation is not None and reservation.pending is not None:
+                if index is not None:
+                    index.complete(reservation, None)
+                else:
+                    reservation.pending.set_result(None)
+
+    async def handle_duplicates(self, message: Message, monitor: ImageMonitorModel, to_channel: disnake.TextChannel, duplicates: List[str]):
+        Metrics.IMAGE_DUPLICATES.inc(len(duplicates), policy=monitor.duplicate_policy)
+        links = ", ".join(dict.fromkeys(duplicates))
+        action = "linked" if monitor.duplicate_policy == "link" else "skipped"
+        if monitor.duplicate_policy == "link":
+            await Outbound.send(to_channel, Outbound.Priority.REDIRECT, content=f"Sent by {message.author.mention} in {message.channel.mention}. {len(duplicates)} duplicate image(s) of {links}")
+        Logging.info(f"{len(duplicates)} duplicate image(s) sent by {message.author.name} ({message.author.id}) in {message.channel.id} have been {action}.")
+        await Logging.guild_log(
+            message.guild.id,
+            msg_with_emoji(
+                "IMG",
+                f"{len(duplicates)} duplicate image(s) sent by {message.author.mention} (`{message.author.id}`) in {message.channel.mention} have been {action} : {links}."
+            )
+        )
+
+    def schedule_catch_up(self):
+        if not self.accepting:
+            return
+        if self.catch_up_task is None or self.catch_up_task.done():
+            self.catch_up_task = asyncio.create_task(self.catch_up())
+
+    def retry_catch_up(self):
+        if self.accepting and self.catch_up_retry is None:
+            self.catch_up_retry = asyncio.get_running_loop().call_later(self.catch_up_retry_delay, self.run_catch_up_retry)
+
+    def run_catch_up_retry(self):
+        self.catch_up_retry = None
+        if self.catch_up_task is not None and not self.catch_up_task.done():
+            self.retry_catch_up()
+        else:
+            self.schedule_catch_up()
+
+    def claim(self, message: Message) -> bool:
+        if self.catch_up_claims is None:
+            return True
+        if message.id in self.catch_up_claims:
+            return False
+        self.catch_up_claims.add(message.id)
+        return True
+
+    async def catch_up(self):
+        self.catch_up_claims = {message.id for message in self.in_flight.values()} | set(self.queued)
+        try:
+            await self.run_catch_up()
+        finally:
+            self.catch_up_claims = None
+
+    async def run_catch_up(self):
+        semaphore = asyncio.Semaphore(max(1, self.catch_up_concurrency))
+        until = disnake.Object(disnake.utils.time_snowflake(disnake.utils.utcnow(), high=True))
+
+        async def run(monitor: ImageMonitorModel, channel: disnake.TextChannel, cursor: int) -> BacklogEngine:
+            deleter = BulkDeleter(channel)
+
+            async def handle(message: Message):
+                if message.author.bot or not self.claim(message):
+                    return
+                return await self.parse_message(message, monitor, True, deleter)
+
+            async with semaphore:
+                engine = BacklogEngine(
+                    channel.history(limit=self.catch_up_limit, after=disnake.Object(cursor), before=until, oldest_first=True),
+                    handle,
+                    workers=self.backlog_workers,
+                    queue_size=self.backlog_queue_size,
+                    deleter=deleter
+                )
+                self.engines.add(engine)
+                try:
+                    await engine.run()
+                finally:
+                    self.engines.discard(engine)
+                if not engine.stopping:
+                    self.release_failed(monitor, until.id)
+                return engine
+
+        runs = []
+        for monitor in list(self.monitors.values()):
+            cursor = self.cursors.get(monitor.id)
+            channel = self.bot.get_channel(monitor.from_channel)
+            if cursor is None or channel is None or channel.last_message_id is None or channel.last_message_id <= cursor:
+                continue
+            runs.append(run(monitor, channel, cursor))
+        if not runs:
+            return
+
+        results = await asyncio.gather(*runs, return_exceptions=True)
+        engines = [r for r in results if isinstance(r, BacklogEngine)]
+        for r in results:
+            if isinstance(r, Exception):
+                Logging.error(f"ImageMonitor catch-up failed: {r}")
+        processed = sum(engine.processed for engine in engines)
+        redirected = sum(engine.redirected for engine in engines)
+        deleted = sum(engine.deleter.deleted for engine in engines)
+        requests = sum(engine.deleter.requests for engine in engines)
+        Logging.info(f"ImageMonitor catch-up processed {processed} missed messages in {len(runs)} channel(s), redirected {redirected} images and deleted {deleted} originals with {requests} requests.")
+        if redirected:
+            await Logging.bot_log(f"ImageMonitor catch-up processed {processed} missed messages in {len(runs)} channel(s) and redirected {redirected} images.")
 
     @commands.slash_command(name="img-mon-config", description="ImageMonitor management", dm_permission=False)
     @commands.guild_only()
@@ -41,7 +457,8 @@ class ImageMonitor(BaseCog):
         )
         embed.add_field(name="Line breaks", value="Line breaks are represented by `\\n`.", inline=False)
         embed.add_field(name="Variables", value="Variables are replaced with their corresponding value.", inline=False)
-        embed.add_field(name="{{user}}", value="A user mention, e.g. @user", inline=False)
+        for name, description in Template.VARIABLES.items():
+            embed.add_field(name=f"{{{{{name}}}}}", value=description, inline=False)
         await inter.response.send_message(embed=embed)
 
     @img_mon.sub_command(name="list", description="List the channels being monitored.")
@@ -66,20 +483,96 @@ class ImageMonitor(BaseCog):
         for monitor in monitors:
             from_channel = Utils.coalesce(self.bot.get_channel(monitor.from_channel), Utils.get_alternate_channel(monitor.from_channel))
             to_channel: disnake.abc.GuildChannel = Utils.coalesce(self.bot.get_channel(monitor.to_channel), Utils.get_alternate_channel(monitor.to_channel))
+            details = []
+            if monitor.batch:
+                details.append("batched")
+            if monitor.duplicate_policy != "forward":
+                details.append(f"duplicates: {monitor.duplicate_policy} within {monitor.duplicate_window} min")
+            if monitor.transcode_format:
+                details.append(f"transcoded to {monitor.transcode_format}, saved {monitor.transcode_saved / 1024 / 1024:.1f} MiB")
+            if RateLimit.is_limited(monitor):
+                limits = []
+                if monitor.rate_user > 0:
+                    limits.append(f"{monitor.rate_user}/min per user (burst {monitor.rate_user_burst})")
+                if monitor.rate_channel > 0:
+                    limits.append(f"{monitor.rate_channel}/min per channel (burst {monitor.rate_channel_burst})")
+                details.append(f"throttled to {' and '.join(limits)}, overflow: {monitor.rate_overflow}")
             embed.add_field(
                 name=f"From {from_channel.mention} | ID: {monitor.id}",
-                value=f"To {to_channel.mention}",
+                value=f"To {to_channel.mention}{''.join(f' ({detail})' for detail in details)}",
                 inline=False
             )
         await inter.response.send_message(embed=embed)
 
+    @img_mon.sub_command(name="stats", description="Show how many images were redirected recently.")
+    async def stats(
+        self,
+        inter: ApplicationCommandInteraction,
+        id: int = commands.Param(description="Only count this watchlist entry.", default=None),
+        days: int = commands.Param(description="How many days to look back.", default=30, ge=1, le=90),
+        user: disnake.User = commands.Param(description="Only count images sent by this user.", default=None)
+    ):
+        monitors = {
+            monitor.id: monitor for monitor in await db.imagemonitor.find_many(
+                where={
+                    "guild": inter.guild_id
+                }
+            )
+        }
+        if id is not None and id not in monitors:
+            await inter.response.send_message("No entry found with that ID.", ephemeral=True)
+            return
+        await inter.response.defer()
+        await Redirects.flush()
+        since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+        where = {}
+        if id is not None:
+            where["monitor"] = id
+        if user is not None:
+            where["user"] = user.id
+        per_monitor = await Redirects.totals(inter.guild_id, since, "monitor", **where)
+        per_user = await Redirects.totals(inter.guild_id, since, "user", **where)
+        embed = Embed.default_embed(
+            title="ImageMonitor Stats",
+            description=f"Redirects over the last {days} day(s){f' by {user.mention}' if user is not None else ''}.",
+            author=inter.author.name,
+            icon_url=inter.author.avatar.url
+        )
+        if not per_monitor:
+            embed.add_field(name="No redirects", value="Nothing was redirected in this period.", inline=False)
+        for monitor_id, redirects, images in per_monitor[:STATS_MONITORS]:
+            monitor = monitors.get(monitor_id)
+            name = f"From <#{monitor.from_channel}> | ID: {monitor_id}" if monitor is not None else f"Removed entry | ID: {monitor_id}"
+            embed.add_field(name=name, value=f"{images} image(s) in {redirects} message(s)", inline=False)
+        if per_user and user is None:
+            embed.add_field(
+                name="Top users",
+                value="\n".join(f"<@{user_id}>: {images} image(s) in {redirects} message(s)" for user_id, redirects, images in per_user[:STATS_USERS]),
+                inline=False
+            )
+        await inter.followup.send(embed=embed)
+
     @img_mon.sub_command(name="add", description="Add a channel to the watchlist.")
     async def add(
+        self,
         inter: ApplicationCommandInteraction,
         from_channel: disnake.TextChannel = commands.Param(name="from-channel", description="The channel to watch."),
         to_channel: disnake.TextChannel = commands.Param(name="to-channel", description="The channel to send the alert."),
         success_msg: str = commands.Param(name="success-msg", description="The message to send in the from-channel when an image is redirected."),
-        limit: int = commands.Param(name="limit", description="The maximum number of images that can be sent at once.", default=1, ge=1)
+        limit: int = commands.Param(name="limit", description="The maximum number of images that can be sent at once.", default=1, ge=1),
+        batch: bool = commands.Param(name="batch", description="Redirect all images of a message together in a single message.", default=False),
+        duplicate_policy: str = commands.Param(name="duplicate-policy", description="What to do with images that were already redirected recently.", default="forward", choices=Dedupe.POLICIES),
+        duplicate_window: int = commands.Param(name="duplicate-window", description="How long redirected images are remembered, in minutes.", default=1440, ge=1),
+        duplicate_perceptual: bool = commands.Param(name="duplicate-perceptual", description="Also treat visually similar images as duplicates.", default=False),
+        transcode: str = commands.Param(name="transcode", description="Re-encode large images to this format before redirecting them.", default=None, choices=Transcode.FORMATS),
+        transcode_quality: int = commands.Param(name="transcode-quality", description="The quality used when re-encoding images.", default=85, ge=1, le=100),
+        transcode_max_dimension: int = commands.Param(name="transcode-max-dimension", description="Images with a larger width or height are downscaled to this size.", default=2560, ge=256),
+        transcode_max_size: int = commands.Param(name="transcode-max-size", description="Images larger than this many KiB are re-encoded.", default=1024, ge=0),
+        rate_user: int = commands.Param(name="rate-user", description="Images each user may send per minute, 0 to disable.", default=0, ge=0),
+        rate_user_burst: int = commands.Param(name="rate-user-burst", description="Images each user may send at once before being throttled.", default=5, ge=1),
+        rate_channel: int = commands.Param(name="rate-channel", description="Images the channel may receive per minute, 0 to disable.", default=0, ge=0),
+        rate_channel_burst: int = commands.Param(name="rate-channel-burst", description="Images the channel may receive at once before being throttled.", default=20, ge=1),
+        rate_overflow: str = commands.Param(name="rate-overflow", description="What to do with images over the rate limit.", default="warn", choices=RateLimit.POLICIES)
     ):
         if from_channel.guild.id != inter.guild_id or to_channel.guild.id != inter.guild_id:
             await inter.response.send_message("Both channels must be in this guild.", ephemeral=True)
@@ -89,16 +582,38 @@ class ImageMonitor(BaseCog):
             return
 
         success_msg = success_msg.replace("\\n", "\n")
+        try:
+            template = Template.parse(success_msg)
+        except ValueError as e:
+            await inter.response.send_message(f"Invalid success message: {e}", ephemeral=True)
+            return
 
-        await db.imagemonitor.create(
+        monitor = await db.imagemonitor.create(
             data={
                 "guild": inter.guild_id,
                 "from_channel": from_channel.id,
                 "to_channel": to_channel.id,
                 "success_msg": success_msg,
-                "limit": limit
+                "limit": limit,
+                "batch": batch,
+                "duplicate_policy": duplicate_policy,
+                "duplicate_window": duplicate_window,
+                "duplicate_perceptual": duplicate_perceptual,
+                "transcode_format": transcode,
+                "transcode_quality": transcode_quality,
+                "transcode_max_dimension": transcode_max_dimension,
+                "transcode_max_bytes": transcode_max_size * 1024,
+                "rate_user": rate_user,
+                "rate_user_burst": rate_user_burst,
+                "rate_channel": rate_channel,
+                "rate_channel_burst": rate_channel_burst,
+                "rate_overflow": rate_overflow
             }
         )
+        self.monitors[monitor.from_channel] = monitor
+        self.templates[monitor.id] = template
+        self.seed_cursor(monitor)
+        Recorder.record_monitors(self.monitors.values())
 
         await Logging.guild_log(
             inter.guild_id,
@@ -114,7 +629,20 @@ class ImageMonitor(BaseCog):
         new_from_channel: disnake.TextChannel | None = commands.Param(name="new-from-channel", description="The new channel to watch.", default=None),
         new_to_channel: disnake.TextChannel | None = commands.Param(name="new-to-channel", description="The new channel to send the alert.", default=None),
         new_success_msg: str = commands.Param(name="new-success-msg", description="The new message to send in the from-channel when an image is redirected.", default=None),
-        new_limit: int = commands.Param(name="new-limit", description="The new maximum number of images that can be sent at once.", default=None)
+        new_limit: int = commands.Param(name="new-limit", description="The new maximum number of images that can be sent at once.", default=None),
+        new_batch: bool = commands.Param(name="new-batch", description="Whether to redirect all images of a message together in a single message.", default=None),
+        new_duplicate_policy: str = commands.Param(name="new-duplicate-policy", description="What to do with images that were already redirected recently.", default=None, choices=Dedupe.POLICIES),
+        new_duplicate_window: int = commands.Param(name="new-duplicate-window", description="How long redirected images are remembered, in minutes.", default=None, ge=1),
+        new_duplicate_perceptual: bool = commands.Param(name="new-duplicate-perceptual", description="Whether to also treat visually similar images as duplicates.", default=None),
+        new_transcode: str = commands.Param(name="new-transcode", description="The new format to re-encode large images to, or none to disable.", default=None, choices=Transcode.FORMATS + ["none"]),
+        new_transcode_quality: int = commands.Param(name="new-transcode-quality", description="The new quality used when re-encoding images.", default=None, ge=1, le=100),
+        new_transcode_max_dimension: int = commands.Param(name="new-transcode-max-dimension", description="The new size larger images are downscaled to.", default=None, ge=256),
+        new_transcode_max_size: int = commands.Param(name="new-transcode-max-size", description="The new size in KiB above which images are re-encoded.", default=None, ge=0),
+        new_rate_user: int = commands.Param(name="new-rate-user", description="The new number of images each user may send per minute, 0 to disable.", default=None, ge=0),
+        new_rate_user_burst: int = commands.Param(name="new-rate-user-burst", description="The new number of images each user may send at once.", default=None, ge=1),
+        new_rate_channel: int = commands.Param(name="new-rate-channel", description="The new number of images the channel may receive per minute, 0 to disable.", default=None, ge=0),
+        new_rate_channel_burst: int = commands.Param(name="new-rate-channel-burst", description="The new number of images the channel may receive at once.", default=None, ge=1),
+        new_rate_overflow: str = commands.Param(name="new-rate-overflow", description="What to do with images over the rate limit.", default=None, choices=RateLimit.POLICIES)
     ):
         monitor = await db.imagemonitor.find_unique(
             where={
@@ -125,7 +653,10 @@ class ImageMonitor(BaseCog):
             await inter.response.send_message("No entry found with that ID.", ephemeral=True)
             return
 
-        if not new_from_channel and not new_to_channel and not new_success_msg and not new_limit:
+        if not new_from_channel and not new_to_channel and not new_success_msg and not new_limit and all(v is None for v in (
+            new_batch, new_duplicate_policy, new_duplicate_window, new_duplicate_perceptual, new_transcode, new_transcode_quality, new_transcode_max_dimension, new_transcode_max_size,
+            new_rate_user, new_rate_user_burst, new_rate_channel, new_rate_channel_burst, new_rate_overflow
+        )):
             await inter.response.send_message("You must specify at least one field to edit.", ephemeral=True)
             return
 
@@ -137,9 +668,36 @@ class ImageMonitor(BaseCog):
             await inter.response.send_message("Failed to find the input or output channel. Please reassign them.", ephemeral=True)
             return
         if not new_success_msg:
-            new_success_msg = monitor.success_msg
+            new_success_msg = monitor.success_msg if monitor.success_msg is not None else DEFAULT_SUCCESS_MSG
         if not new_limit:
             new_limit = monitor.limit
+        if new_batch is None:
+            new_batch = monitor.batch
+        if not new_duplicate_policy:
+            new_duplicate_policy = monitor.duplicate_policy
+        if not new_duplicate_window:
+            new_duplicate_window = monitor.duplicate_window
+        if new_duplicate_perceptual is None:
+            new_duplicate_perceptual = monitor.duplicate_perceptual
+        if new_transcode is None:
+            new_transcode = monitor.transcode_format
+        elif new_transcode == "none":
+            new_transcode = None
+        if new_transcode_quality is None:
+            new_transcode_quality = monitor.transcode_quality
+        if new_transcode_max_dimension is None:
+            new_transcode_max_dimension = monitor.transcode_max_dimension
+        new_transcode_max_bytes = monitor.transcode_max_bytes if new_transcode_max_size is None else new_transcode_max_size * 1024
+        if new_rate_user is None:
+            new_rate_user = monitor.rate_user
+        if new_rate_user_burst is None:
+            new_rate_user_burst = monitor.rate_user_burst
+        if new_rate_channel is None:
+            new_rate_channel = monitor.rate_channel
+        if new_rate_channel_burst is None:
+            new_rate_channel_burst = monitor.rate_channel_burst
+        if new_rate_overflow is None:
+            new_rate_overflow = monitor.rate_overflow
 
         if (new_from_channel and new_from_channel.guild.id != inter.guild_id) or (new_to_channel and new_to_channel.guild.id != inter.guild_id):
             await inter.response.send_message("The channel(s) must be in this guild.", ephemeral=True)
@@ -150,19 +708,45 @@ class ImageMonitor(BaseCog):
 
         if new_success_msg:
             new_success_msg = new_success_msg.replace("\\n", "\n")
+        try:
+            template = Template.parse(new_success_msg, strict=new_success_msg != monitor.success_msg)
+        except ValueError as e:
+            await inter.response.send_message(f"Invalid success message: {e}", ephemeral=True)
+            return
 
         update_data = {}
         update_data["from_channel"] = new_from_channel.id
         update_data["to_channel"] = new_to_channel.id
         update_data["success_msg"] = new_success_msg
         update_data["limit"] = new_limit
+        update_data["batch"] = new_batch
+        update_data["duplicate_policy"] = new_duplicate_policy
+        update_data["duplicate_window"] = new_duplicate_window
+        update_data["duplicate_perceptual"] = new_duplicate_perceptual
+        update_data["transcode_format"] = new_transcode
+        update_data["transcode_quality"] = new_transcode_quality
+        update_data["transcode_max_dimension"] = new_transcode_max_dimension
+        update_data["transcode_max_bytes"] = new_transcode_max_bytes
+        update_data["rate_user"] = new_rate_user
+        update_data["rate_user_burst"] = new_rate_user_burst
+        update_data["rate_channel"] = new_rate_channel
+        update_data["rate_channel_burst"] = new_rate_channel_burst
+        update_data["rate_overflow"] = new_rate_overflow
 
-        await db.imagemonitor.update(
+        updated = await db.imagemonitor.update(
             where={
                 "id": id
             },
             data=update_data
         )
+        self.monitors.pop(monitor.from_channel, None)
+        self.monitors[updated.from_channel] = updated
+        self.templates[updated.id] = template
+        self.duplicate_indexes.pop(updated.id, None)
+        if updated.from_channel != monitor.from_channel:
+            self.forget_cursor(updated.id)
+            self.seed_cursor(updated)
+        Recorder.record_monitors(self.monitors.values())
 
         await Logging.guild_log(
             inter.guild_id,
@@ -172,6 +756,7 @@ class ImageMonitor(BaseCog):
 
     @img_mon.sub_command(name="remove", description="Remove a channel from the watchlist.")
     async def remove(
+        self,
         inter: ApplicationCommandInteraction,
         id: int = commands.Param(description="The ID of the watchlist entry to remove.")
     ):
@@ -189,6 +774,17 @@ class ImageMonitor(BaseCog):
                 "id": id
             }
         )
+        await db.imagehash.delete_many(
+            where={
+                "monitor": id
+            }
+        )
+        self.duplicate_indexes.pop(id, None)
+        self.templates.pop(id, None)
+        RateLimit.forget(id)
+        self.monitors.pop(monitor.from_channel, None)
+        self.forget_cursor(monitor.id)
+        Recorder.record_monitors(self.monitors.values())
         await Logging.guild_log(
             inter.guild_id,
             msg_with_emoji("IMG", f"An ImageMonitor entry from `{monitor.from_channel}` to `{monitor.to_channel}` has been removed by {inter.user.name} (`{inter.user.id}`).")
@@ -201,16 +797,13 @@ class ImageMonitor(BaseCog):
         self,
         inter: ApplicationCommandInteraction,
         id: int = commands.Param(description="The ID of the watchlist entry to parse messages for.", default=None),
-        limit: int = commands.Param(description="The maximum number of messages to parse.", default=100, ge=1, le=1000),
+        limit: int = commands.Param(description="The maximum number of messages to parse. Defaults to 100 if no time range is given.", default=None, ge=1, le=1000),
+        before: str = commands.Param(description="Only parse messages before this message ID or date (YYYY-MM-DD [HH:MM]).", default=None),
+        after: str = commands.Param(description="Only parse messages after this message ID or date (YYYY-MM-DD [HH:MM]).", default=None),
         ignore: str = commands.Param(description="Ignore these messages IDs, separated by commas.", default="")
     ):
         if not id:
-            monitor = await db.imagemonitor.find_unique(
-                where={
-                    "guild": inter.guild_id,
-                    "from_channel": inter.channel.id
-                }
-            )
+            monitor = self.monitors.get(inter.channel.id)
             if not monitor:
                 await inter.response.send_message("You didn't specify a watchlist entry and there is no entry in this channel.", ephemeral=True)
                 return
@@ -224,6 +817,7 @@ class ImageMonitor(BaseCog):
                 await inter.response.send_message("No entry found with that ID.", ephemeral=True)
                 return
 
+        ignore_list = []
         if ignore:
             try:
                 ignore = ignore.replace(" ", "")
@@ -233,6 +827,16 @@ class ImageMonitor(BaseCog):
                 await inter.response.send_message(f"Failed to parse ignore list: {e}", ephemeral=True)
                 return
 
+        try:
+            guild_config = await get_cached_guild_config(inter.guild_id)
+            before_bound = self.parse_history_bound(before, guild_config.time_zone)
+            after_bound = self.parse_history_bound(after, guild_config.time_zone)
+        except ValueError:
+            await inter.response.send_message("Time bounds must be message IDs or dates in the format `YYYY-MM-DD` or `YYYY-MM-DD HH:MM`.", ephemeral=True)
+            return
+        if limit is None and before_bound is None and after_bound is None:
+            limit = 100
+
         from_channel = self.bot.get_channel(monitor.from_channel)
         if not from_channel:
             await inter.response.send_message("Failed to find the input channel.", ephemeral=True)
@@ -242,61 +846,141 @@ class ImageMonitor(BaseCog):
             await inter.response.send_message("Failed to find the output channel.", ephemeral=True)
             return
 
-        thinking_id = await inter.response.defer(with_message=True)
-        parsed_messages = 0
-        parsed_images = 0
-        async for message in from_channel.history(limit=limit):
-            parsed_messages += 1
+        if not self.accepting:
+            await inter.response.send_message("ImageMonitor is shutting down, please try again once it is back.", ephemeral=True)
+            return
+
+        await inter.response.defer(with_message=True)
+        deleter = BulkDeleter(from_channel)
+
+        async def handle(message: Message):
             if message.id in ignore_list:
-                continue
-            res = await self.parse_message(message, monitor, True)
-            if res:
-                parsed_images += res
-        reply = f"Processed {parsed_messages} messages and redirected {parsed_images} images."
+                return
+            return await self.parse_message(message, monitor, True, deleter)
+
+        async def report(engine: BacklogEngine):
+            if not inter.is_expired():
+                await inter.edit_original_response(content=f"Processed {engine.processed} messages and redirected {engine.redirected} images so far ({engine.throughput:.1f} messages/s).")
+
+        engine = BacklogEngine(
+            from_channel.history(limit=limit, before=before_bound, after=after_bound),
+            handle,
+            workers=self.backlog_workers,
+            queue_size=self.backlog_queue_size,
+            deleter=deleter
+        )
+        self.engines.add(engine)
+        try:
+            await engine.run(report, self.backlog_progress_interval)
+        finally:
+            self.engines.discard(engine)
+        reply = f"Processed {engine.processed} messages and redirected {engine.redirected} images in {engine.elapsed:.1f}s ({engine.throughput:.1f} messages/s). {deleter.describe()}"
+        if engine.failed:
+            reply += f" {engine.failed} messages could not be processed."
+        if engine.stopping:
+            reply += " The bot is restarting, so the backlog was stopped early, please run the command again once it is back."
         if not inter.is_expired():
-            await inter.followup.send(content=reply)
+            await inter.edit_original_response(content=reply)
         else:
-            try:
-                await thinking_id.delete()
-            except Exception:
-                pass
-            await inter.channel.send(content=reply)
+            await Outbound.send(inter.channel, Outbound.Priority.USER, content=reply)
 
     @commands.Cog.listener()
     @commands.guild_only()
     async def on_message(self, message: Message):
-        if message.author.bot:
-            return
-        monitor = await db.imagemonitor.find_unique(
-            where={
-                "guild": message.guild.id,
-                "from_channel": message.channel.id
-            }
-        )
+        Recorder.record(message)
+        with Metrics.IMAGE_PHASES.time(phase="lookup"):
+            monitor = self.monitors.get(message.channel.id)
         if not monitor:
+            Metrics.IMAGE_MESSAGES.inc(outcome="unmonitored")
+            return
+        if not self.accepting:
+            Metrics.IMAGE_MESSAGES.inc(outcome="paused")
+            return
+        if message.author.bot or not self.claim(message):
+            Metrics.IMAGE_MESSAGES.inc(outcome="ignored")
+            return
+        if RateLimit.is_limited(monitor) and not await self.throttle(message, monitor):
             return
+        Metrics.IMAGE_MESSAGES.inc(outcome="monitored")
         await self.parse_message(message, monitor)
 
-    async def parse_message(self, message: Message, monitor: ImageMonitorModel, is_backlog=False):
+    @staticmethod
+    def count_images(message: Message) -> int:
+        return sum(
+            1 for attachment in message.attachments
+            if attachment.content_type and attachment.content_type.startswith("image") and os.path.splitext(attachment.filename)[1]
+        )
+
+    async def throttle(self, message: Message, monitor: ImageMonitorModel) -> bool:
+        images = self.count_images(message)
+        if images == 0 or len(message.attachments) > monitor.limit:
+            return True
+        decision = RateLimit.check(monitor, message.author.id, images)
+        if decision.allowed:
+            if decision.delay:
+                # Queued messages are not forwarded once intake pauses, holding the cursor keeps them for the next catch-up.
+                Metrics.IMAGE_MESSAGES.inc(outcome="queued")
+                self.start_cursor(monitor, message.id)
+                self.queued[message.id] = message
+                try:
+                    await asyncio.sleep(decision.delay)
+                finally:
+                    self.queued.pop(message.id, None)
+                return self.accepting and monitor.from_channel in self.monitors
+            return True
+        Metrics.IMAGE_MESSAGES.inc(outcome="throttled")
+        try:
+            await message.delete()
+        except disnake.NotFound:
+            pass
+        if decision.warn:
+            await Outbound.send(
+                message.channel,
+                Outbound.Priority.USER,
+                content=f"{message.author.mention}, you are sending images too quickly, please wait {decision.delay:.0f}s before trying again."
+            )
+            Logging.info(f"Throttled images sent by {message.author.name} ({message.author.id}) in {message.channel.id}.")
+        return False
+
+    async def parse_message(self, message: Message, monitor: ImageMonitorModel, is_backlog=False, deleter: BulkDeleter = None):
+        self.start_cursor(monitor, message.id)
+        task = asyncio.create_task(self.forward_message(message, monitor, is_backlog, deleter))
+        self.in_flight[task] = message
+        task.add_done_callback(lambda done: self.finish_message(done, monitor, is_backlog))
+        return await asyncio.shield(task)
+
+    def finish_message(self, task: asyncio.Task, monitor: ImageMonitorModel, is_backlog: bool):
+        message = self.in_flight.pop(task, None)
+        if task.cancelled() or message is None:
+            return
+        if task.exception() is None:
+            self.completed += 1
+            self.finish_cursor(monitor, message.id)
+        elif is_backlog:
+            self.finish_cursor(monitor, message.id)
+        else:
+            self.fail_cursor(monitor, message.id)
+
+    async def forward_message(self, message: Message, monitor: ImageMonitorModel, is_backlog=False, deleter: BulkDeleter = None):
+        start = time.perf_counter()
         if len(message.attachments) == 0:
             return
         if len(message.attachments) > monitor.limit and not is_backlog:
-            await message.channel.send(f"{message.author.mention}, you may only send {monitor.limit} image(s) at a time, please try again.")
+            await Outbound.send(message.channel, Outbound.Priority.USER, content=f"{message.author.mention}, you may only send {monitor.limit} image(s) at a time, please try again.")
             await message.delete()
             return
         to_channel = message.guild.get_channel(monitor.to_channel)
         if not to_channel:
-            await Logging.error(f"Failed to find channel {monitor.to_channel} in guild {message.guild.id}.")
+            Logging.error(f"Failed to find channel {monitor.to_channel} in guild {message.guild.id}.")
             await Logging.guild_log(
                 message.guild.id,
                 msg_with_emoji("WARN", f"Failed to find channel {monitor.to_channel} in guild {message.guild.id}.")
             )
             return
-        sent_attachments = 0
+        images: list[Attachment] = []
         for attachment in message.attachments:
             if not attachment.content_type or not attachment.content_type.startswith("image"):
                 continue
-            cnt = 0
             _, ext = os.path.splitext(attachment.filename)
             if not ext:
                 await Logging.guild_log(
@@ -308,45 +992,206 @@ class ImageMonitor(BaseCog):
                 )
                 Logging.error(f"Failed to save image attachment {attachment.filename} from {message.author.name} ({message.author.id}) in {message.channel.id} due to missing extension.")
                 return
+            images.append(attachment)
+        if len(images) == 0:
+            return
 
-            file_name = self.generate_filename(ext)
-            while self.image_exists(file_name):
-                cnt += 1
-                file_name = self.generate_filename(ext)
-                if cnt > 100:
-                    await Logging.guild_log(
-                        message.guild.id,
-                        msg_with_emoji("WARN", f"Failed to save image attachment `{attachment.filename}` from {message.author.name} (`{message.author.id}`) in {message.channel.mention}`.")
-                    )
-                    Logging.error(f"Failed to save image attachment {attachment.filename} from {message.author.name} ({message.author.id}) in {message.channel.id}.")
-                    return
+        content = f"Sent by {message.author.mention} in {message.channel.mention}. Original message:\n`{message.content if message.content else 'No message content'}`"
+        if monitor.batch:
+            duplicates, jump_urls = await self.forward_batched(message, monitor, to_channel, images, content)
+        else:
+            duplicates, jump_urls = await self.forward_individually(message, monitor, to_channel, images, content)
+        if duplicates:
+            await self.handle_duplicates(message, monitor, to_channel, duplicates)
+        forwarded = len(images) - len(duplicates)
+        with Metrics.IMAGE_PHASES.time(phase="delete"):
+            if deleter is not None:
+                await deleter.delete(message)
+            else:
+                await message.delete()
+        Metrics.IMAGES.inc(forwarded)
+        Redirects.record(message, monitor, forwarded, len(duplicates))
+        Metrics.IMAGE_PHASES.observe(time.perf_counter() - start, phase="total")
+        if is_backlog:
+            return forwarded
+        if forwarded == 0:
+            await Outbound.send(message.channel, Outbound.Priority.USER, content=f"{message.author.mention}, this image has already been posted recently: {', '.join(dict.fromkeys(duplicates))}")
+            return
+        template = self.templates.get(monitor.id) or self.compile_template(monitor)
+        success_msg = template.render(
+            {
+                "user": message.author.mention,
+                "author_name": message.author.name,
+                "channel": message.channel.mention,
+                "target": to_channel.mention,
+                "count": str(forwarded),
+                "jump_url": jump_urls[0] if jump_urls else ""
+            }
+        )
+        with Metrics.IMAGE_PHASES.time(phase="success"):
+            await Outbound.send(message.channel, Outbound.Priority.USER, content=success_msg)
 
-            await attachment.save(f"imgs/{file_name}")
-            with open(f"imgs/{file_name}", "rb") as f:
-                msg = await to_channel.send(
-                    file=disnake.File(f, file_name, spoiler=False),
-                    content=f"Sent by {message.author.mention} in {message.channel.mention}. Original message:\n`{message.content if message.content else 'No message content'}`"
-                )
-                Logging.info(f"An image sent by {message.author.name} ({message.author.id}) in {message.channel.id} has been redirected to {monitor.to_channel}.")
-                await Logging.guild_log(
-                    message.guild.id,
-                    msg_with_emoji(
-                        "IMG",
-                        f"An image sent by {message.author.mention} (`{message.author.id}`) in {message.channel.mention} has been redirected to {to_channel.mention} : {msg.jump_url}."
-                    )
+    async def forward_individually(self, message: Message, monitor: ImageMonitorModel, to_channel: disnake.TextChannel, images: List[Attachment], content: str) -> tuple[List[str], List[str]]:
+        duplicates = []
+        jump_urls = []
+        for attachment in images:
+            with Metrics.IMAGE_PHASES.time(phase="download"):
+                buffer = await self.download_attachment(attachment)
+            with buffer:
+                reservation, duplicate = await self.find_duplicate(monitor, attachment, buffer)
+                if duplicate is not None:
+                    duplicates.append(duplicate)
+                    continue
+                try:
+                    upload, ext = await self.transcode(monitor, attachment, buffer)
+                    with upload, Metrics.IMAGE_PHASES.time(phase="upload"):
+                        msg = await Outbound.send(to_channel, Outbound.Priority.REDIRECT, file=self.make_file(attachment, upload, ext), content=content)
+                    self.remember(monitor, reservation, msg.jump_url)
+                    jump_urls.append(msg.jump_url)
+                finally:
+                    self.release(monitor, [reservation])
+            Logging.info(f"An image sent by {message.author.name} ({message.author.id}) in {message.channel.id} has been redirected to {to_channel.id}.")
+            await Logging.guild_log(
+                message.guild.id,
+                msg_with_emoji(
+                    "IMG",
+                    f"An image sent by {message.author.mention} (`{message.author.id}`) in {message.channel.mention} has been redirected to {to_channel.mention} : {msg.jump_url}."
                 )
-            pathlib.Path(f"imgs/{file_name}").unlink(missing_ok=True)
-            sent_attachments += 1
-        if sent_attachments == 0:
-            return
-        await message.delete()
-        if is_backlog:
-            return sent_attachments
-        success_msg = monitor.success_msg.replace("{{user}}", message.author.mention)
-        await message.channel.send(success_msg)
+            )
+        return duplicates, jump_urls
+
+    async def forward_batched(self, message: Message, monitor: ImageMonitorModel, to_channel: disnake.TextChannel, images: List[Attachment], content: str) -> tuple[List[str], List[str]]:
+        with Metrics.IMAGE_PHASES.time(phase="download"):
+            results = await asyncio.gather(*(self.download_attachment(attachment) for attachment in images), return_exceptions=True)
+        buffers = [r for r in results if not isinstance(r, BaseException)]
+        duplicates = []
+        jump_urls = []
+        fresh = []
+        reservations = [None] * len(images)
+        try:
+            for r in results:
+                if isinstance(r, BaseException):
+                    raise r
+            fingerprints = [await self.fingerprint_attachment(monitor, attachment, results[i]) for i, attachment in enumerate(images)]
+            copies = dict()
+            originals = []
+            for i, fingerprint in enumerate(fingerprints):
+                original = None
+                if fingerprint is not None:
+                    original = next((j for j in originals if Dedupe.similar(fingerprints[j], fingerprint, self.duplicate_distance)), None)
+                if original is not None:
+                    copies[i] = original
+                else:
+                    originals.append(i)
+            links = dict()
+            for i in originals:
+                if fingerprints[i] is not None:
+                    links[i] = await self.lookup_duplicate(monitor, fingerprints[i])
+                if links.get(i) is not None:
+                    duplicates.append(links[i])
+                else:
+                    fresh.append(i)
+            # Reserve only once every lookup is done, a message never waits on another while holding reservations of its own.
+            for i in fresh:
+                if fingerprints[i] is not None:
+                    reservations[i] = self.reserve(monitor, fingerprints[i])
+            extensions = [None] * len(images)
+            for i, (upload, ext) in zip(fresh, await asyncio.gather(*(self.transcode(monitor, images[i], results[i]) for i in fresh))):
+                if upload is not results[i]:
+                    results[i] = upload
+                    extensions[i] = ext
+                    buffers.append(upload)
+            for chunk in self.chunk_attachments([images[i] for i in fresh], message.guild.filesize_limit):
+                chunk = [fresh[i] for i in chunk]
+                with Metrics.IMAGE_PHASES.time(phase="upload"):
+                    msg = await Outbound.send(to_channel, Outbound.Priority.REDIRECT, files=[self.make_file(images[i], results[i], extensions[i]) for i in chunk], content=content)
+                jump_urls.append(msg.jump_url)
+                for i in chunk:
+                    links[i] = msg.jump_url
+                    self.remember(monitor, reservations[i], msg.jump_url)
+            duplicates.extend(links[original] for original in copies.values() if links.get(original) is not None)
+        finally:
+            self.release(monitor, reservations)
+            for buffer in buffers:
+                buffer.close()
+        if not fresh:
+            return duplicates, jump_urls
+        Logging.info(f"{len(fresh)} image(s) sent by {message.author.name} ({message.author.id}) in {message.channel.id} have been redirected to {to_channel.id}.")
+        await Logging.guild_log(
+            message.guild.id,
+            msg_with_emoji(
+                "IMG",
+                f"{len(fresh)} image(s) sent by {message.author.mention} (`{message.author.id}`) in {message.channel.mention} have been redirected to {to_channel.mention} : {', '.join(jump_urls)}."
+            )
+        )
+        return duplicates, jump_urls
+
+    def chunk_attachments(self, images: List[Attachment], size_limit: int) -> List[List[int]]:
+        chunks = []
+        chunk = []
+        chunk_size = 0
+        for i, attachment in enumerate(images):
+            if chunk and (len(chunk) >= MAX_FILES_PER_MESSAGE or chunk_size + attachment.size > size_limit):
+                chunks.append(chunk)
+                chunk = []
+                chunk_size = 0
+            chunk.append(i)
+            chunk_size += attachment.size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def parse_history_bound(self, value: str | None, time_zone: datetime.tzinfo) -> disnake.Object | datetime.datetime | None:
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return disnake.Object(int(value))
+        for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+            try:
+                return datetime.datetime.strptime(value, fmt).replace(tzinfo=time_zone)
+            except ValueError:
+                pass
+        raise ValueError(f"Invalid time bound: {value}")
+
+    def make_file(self, attachment: Attachment, buffer: io.IOBase, ext: str | None = None) -> disnake.File:
+        if ext is None:
+            _, ext = os.path.splitext(attachment.filename)
+        return disnake.File(buffer, self.generate_filename(ext), spoiler=False)
+
+    async def transcode(self, monitor: ImageMonitorModel, attachment: Attachment, buffer: io.IOBase) -> tuple[io.IOBase, str | None]:
+        if not monitor.transcode_format:
+            return buffer, None
+        _, ext = os.path.splitext(attachment.filename)
+        if not Transcode.needed(ext, attachment.size, attachment.width, attachment.height, monitor.transcode_max_bytes, monitor.transcode_max_dimension):
+            return buffer, None
+        with Metrics.IMAGE_PHASES.time(phase="transcode"):
+            result = await Transcode.transcode(buffer, monitor.transcode_format, monitor.transcode_quality, monitor.transcode_max_dimension)
+        if result is None:
+            return buffer, None
+        saved = attachment.size - len(result)
+        self.transcode_savings[monitor.id] = self.transcode_savings.get(monitor.id, 0) + saved
+        Metrics.TRANSCODE_SAVED.inc(saved, monitor=monitor.id)
+        buffer.close()
+        return io.BytesIO(result), Transcode.EXTENSIONS[monitor.transcode_format]
+
+    async def download_attachment(self, attachment: Attachment) -> io.IOBase:
+        if attachment.size <= self.spool_threshold:
+            return io.BytesIO(await attachment.read())
 
-    def image_exists(self, filename: str):
-        return pathlib.Path(f"imgs/{filename}").exists()
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        buffer = await asyncio.to_thread(tempfile.TemporaryFile)
+        try:
+            async with self.session.get(attachment.url) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(1024 * 1024):
+                    await asyncio.to_thread(buffer.write, chunk)
+            await asyncio.to_thread(buffer.seek, 0)
+        except Exception:
+            buffer.close()
+            raise
+        return buffer
 
     def generate_filename(self, ext: str):
         return f"{uuid.uuid4()}{ext}"
@@ -1,12 +1,10 @@
-import io
-import zoneinfo
-
 import disnake # noqa
 from disnake import ApplicationCommandInteraction
 from disnake.ext import commands
 
 from Cogs.BaseCog import BaseCog
-from Database.DBConnector import db, get_guild_config
+from Database.DBConnector import db, get_guild_config, invalidate_guild_config
+from Util import TimeZones
 
 
 class ModLog(BaseCog):
@@ -41,18 +39,18 @@ class ModLog(BaseCog):
                 "guild_log": channel.id
             }
         )
+        invalidate_guild_config(inter.guild_id)
         await inter.response.send_message(f"Mod-Log channel set to {channel.mention}.")
 
     @ml_config.sub_command(name="time-zone", description="Set the time zone for logs")
     async def ml_configure_time_zone(self, inter: ApplicationCommandInteraction, time_zone: str = commands.param(description="The time zone to use for logs.")):
-        available_zones = zoneinfo.available_timezones()
-        if time_zone not in available_zones:
-            out = "\n".join(x for x in (sorted(x for x in available_zones)))
-            buffer = io.BytesIO()
-            buffer.write(out.encode("utf-8"))
-            buffer.seek(0)
-            await inter.response.send_message("I don't know this time zone. See the attached file for all valid values.", file=disnake.File(buffer, filename="time-zones.txt"), ephemeral=True)
+        zone = TimeZones.canonical(time_zone)
+        if zone is None:
+            suggestions = TimeZones.search(time_zone, 5)
+            hint = f" Did you mean {', '.join(f'`{suggestion}`' for suggestion in suggestions)}?" if suggestions else " Pick one of the suggested values."
+            await inter.response.send_message(f"I don't know this time zone.{hint}", ephemeral=True)
             return
+        time_zone = zone
 
         _ = await get_guild_config(inter.guild_id)
         await db.guildconfig.update(
@@ -63,8 +61,13 @@ class ModLog(BaseCog):
                 "time_zone": time_zone
             }
         )
+        invalidate_guild_config(inter.guild_id)
         await inter.response.send_message(f"Time zone set to {time_zone}.")
 
+    @ml_configure_time_zone.autocomplete("time_zone")
+    async def ml_time_zone_autocomplete(self, inter: ApplicationCommandInteraction, value: str) -> list[str]:
+        return TimeZones.search(value)
+
 
 def setup(bot: commands.Bot):
     bot.add_cog(ModLog(bot))
@@ -1,13 +1,125 @@
+import time
+import asyncio
+import logging
+import zoneinfo
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
 from prisma import Prisma, models
 
+from Util import Metrics, TimeZones
+
 
 db = None
 
+LOGGER = logging.getLogger("xerox")
 
-async def connect():
-    global db
-    db = Prisma()
-    await db.connect()
+GUILD_CONFIG_CACHE_SIZE = 1024
+GUILD_CONFIG_CACHE_TTL = 900
+
+SLOW_QUERY_THRESHOLD = 0.25
+QUERY_SAMPLES = 1024
+
+
+@dataclass
+class CachedGuildConfig:
+    config: models.GuildConfig
+    time_zone: zoneinfo.ZoneInfo
+    expires: float
+
+
+guild_configs: OrderedDict[int, CachedGuildConfig] = OrderedDict()
+pending_guild_configs: dict[int, asyncio.Future] = dict()
+
+
+class QueryStats:
+    __slots__ = ("count", "errors", "slow", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.slow = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque[float] = deque(maxlen=QUERY_SAMPLES)
+
+    def record(self, elapsed: float, failed: bool):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.samples.append(elapsed)
+        if failed:
+            self.errors += 1
+        if elapsed >= SLOW_QUERY_THRESHOLD:
+            self.slow += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+query_stats: dict[tuple[str, str], QueryStats] = dict()
+
+
+class InstrumentedActions:
+    def __init__(self, model: str, actions):
+        self._model = model
+        self._actions = actions
+        self._wrapped = dict()
+
+    def __getattr__(self, name: str):
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        action = getattr(self._actions, name)
+        if name.startswith("_") or not callable(action):
+            return action
+
+        stats = query_stats.setdefault((self._model, name), QueryStats())
+
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await action(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                stats.record(elapsed, failed)
+                Metrics.DB_QUERIES.observe(elapsed, model=self._model, operation=name)
+                if elapsed >= SLOW_QUERY_THRESHOLD:
+                    LOGGER.warning(f"Slow query: {self._model}.{name} took {elapsed * 1000:.0f} ms (where={str(kwargs.get('where'))[:200]}).")
+
+        self._wrapped[name] = wrapper
+        return wrapper
+
+
+class InstrumentedClient:
+    def __init__(self, client: Prisma):
+        self._client = client
+        self._models = dict()
+
+    def __getattr__(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        attr = getattr(self._client, name)
+        if type(attr).__name__.endswith("Actions"):
+            model = self._models[name] = InstrumentedActions(name, attr)
+            return model
+        return attr
+
+
+async def connect(slow_query_ms: float = None):
+    global db, SLOW_QUERY_THRESHOLD
+    if slow_query_ms is not None:
+        SLOW_QUERY_THRESHOLD = slow_query_ms / 1000
+    client = Prisma()
+    await client.connect()
+    db = InstrumentedClient(client)
 
 
 async def disconnect():
@@ -16,7 +128,48 @@ async def disconnect():
 
 
 async def get_guild_config(id: int) -> models.GuildConfig:
+    return (await get_cached_guild_config(id)).config
+
+
+async def get_cached_guild_config(id: int) -> CachedGuildConfig:
+    cached = guild_configs.get(id)
+    if cached is not None and cached.expires > time.monotonic():
+        guild_configs.move_to_end(id)
+        return cached
+
+    pending = pending_guild_configs.get(id)
+    if pending is None:
+        pending = pending_guild_configs[id] = asyncio.ensure_future(load_guild_config(id))
+        pending.add_done_callback(lambda done: forget_pending_guild_config(id, done))
+    return await asyncio.shield(pending)
+
+
+def forget_pending_guild_config(id: int, done: asyncio.Future):
+    if pending_guild_configs.get(id) is done:
+        del pending_guild_configs[id]
+
+
+async def load_guild_config(id: int) -> CachedGuildConfig:
+    config = await fetch_guild_config(id)
+    cached = CachedGuildConfig(config=config, time_zone=TimeZones.get(config.time_zone), expires=time.monotonic() + GUILD_CONFIG_CACHE_TTL)
+    if pending_guild_configs.get(id) is not asyncio.current_task():
+        return cached
+    guild_configs[id] = cached
+    guild_configs.move_to_end(id)
+    while len(guild_configs) > GUILD_CONFIG_CACHE_SIZE:
+        guild_configs.popitem(last=False)
+    return cached
+
+
+async def fetch_guild_config(id: int) -> models.GuildConfig:
     global db
+    config = await db.guildconfig.find_unique(
+        where={
+            "guild": id
+        }
+    )
+    if config is not None:
+        return config
     return await db.guildconfig.upsert(
         where={
             "guild": id
@@ -29,3 +182,8 @@ async def get_guild_config(id: int) -> models.GuildConfig:
             }
         },
     )
+
+
+def invalidate_guild_config(id: int):
+    guild_configs.pop(id, None)
+    pending_guild_configs.pop(id, None)
@@ -0,0 +1,169 @@
+import time
+import asyncio
+import datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import disnake  # noqa
+from disnake import Message
+
+from Util import Logging, Utils
+
+BULK_DELETE_LIMIT = 100
+BULK_DELETE_MAX_AGE = datetime.timedelta(days=14, minutes=-5)
+
+
+class BulkDeleter:
+    def __init__(self, channel: disnake.TextChannel, batch_size: int = BULK_DELETE_LIMIT):
+        self.channel = channel
+        self.batch_size = max(2, min(batch_size, BULK_DELETE_LIMIT))
+        self.pending: list[Message] = []
+        self.lock = asyncio.Lock()
+        self.deleted = 0
+        self.requests = 0
+        self.bulk_requests = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.deleted / self.elapsed if self.elapsed > 0 else 0.0
+
+    async def delete(self, message: Message):
+        if disnake.utils.utcnow() - message.created_at >= BULK_DELETE_MAX_AGE:
+            await self.delete_individually([message])
+            return
+        self.pending.append(message)
+        if len(self.pending) >= self.batch_size:
+            await self.flush(False)
+
+    async def flush(self, partial: bool = True):
+        async with self.lock:
+            while len(self.pending) >= self.batch_size or (partial and self.pending):
+                batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+                if len(batch) == 1:
+                    await self.delete_individually(batch)
+                    continue
+                start = time.perf_counter()
+                try:
+                    await self.channel.delete_messages(batch)
+                    self.deleted += len(batch)
+                except disnake.HTTPException as e:
+                    Logging.warning(f"Bulk delete of {len(batch)} messages in {self.channel.id} failed, deleting them individually: {e}")
+                    await self.delete_individually(batch)
+                finally:
+                    self.requests += 1
+                    self.bulk_requests += 1
+                    self.elapsed += time.perf_counter() - start
+
+    async def delete_individually(self, messages: list[Message]):
+        for message in messages:
+            start = time.perf_counter()
+            try:
+                await message.delete()
+                self.deleted += 1
+            except disnake.NotFound:
+                pass
+            except disnake.HTTPException as e:
+                self.failed += 1
+                Logging.error(f"Failed to delete message {message.id} in {self.channel.id}: {e}")
+            finally:
+                self.requests += 1
+                self.elapsed += time.perf_counter() - start
+
+    def describe(self) -> str:
+        return f"Deleted {self.deleted} originals with {self.requests} requests ({self.bulk_requests} bulk, {self.throughput:.1f} deletes/s)."
+
+
+class BacklogEngine:
+    def __init__(self, history: AsyncIterator[Message], handler: Callable[[Message], Awaitable[Optional[int]]], workers: int = 4, queue_size: int = 50, deleter: BulkDeleter = None):
+        self.history = history
+        self.deleter = deleter
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: asyncio.Queue[Message] = asyncio.Queue(maxsize=max(1, queue_size))
+        self.processed = 0
+        self.redirected = 0
+        self.failed = 0
+        self.skipped = 0
+        self.stopping = False
+        self.done = asyncio.Event()
+        self.feeding: asyncio.Task = None
+        self.started: float = None
+        self.finished: float = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return Utils.coalesce(self.finished, time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    async def run(self, progress: Callable[["BacklogEngine"], Awaitable[None]] = None, progress_interval: float = 5.0):
+        self.started = time.perf_counter()
+        self.feeding = asyncio.create_task(self.feed())
+        tasks = [self.feeding] + [asyncio.create_task(self.forward()) for _ in range(self.workers)]
+        if progress is not None:
+            tasks.append(asyncio.create_task(self.report(progress, progress_interval)))
+        try:
+            await asyncio.wait([self.feeding])
+            if not self.feeding.cancelled():
+                self.feeding.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.deleter is not None:
+                await self.deleter.flush()
+            self.finished = time.perf_counter()
+            self.done.set()
+
+    def stop(self):
+        self.stopping = True
+
+    def abort(self):
+        self.stopping = True
+        if self.feeding is not None:
+            self.feeding.cancel()
+
+    async def wait(self):
+        await self.done.wait()
+
+    async def feed(self):
+        await self.fetch()
+        await self.queue.join()
+
+    async def fetch(self):
+        async for message in self.history:
+            if self.stopping:
+                break
+            await self.queue.put(message)
+
+    async def forward(self):
+        while True:
+            message = await self.queue.get()
+            if self.stopping:
+                self.skipped += 1
+                self.queue.task_done()
+                continue
+            try:
+                res = await self.handler(message)
+                if res:
+                    self.redirected += res
+            except Exception as e:
+                self.failed += 1
+                Logging.exception(f"Failed to process backlog message {message.id} in {message.channel.id}.", e)
+            finally:
+                self.processed += 1
+                self.queue.task_done()
+
+    async def report(self, progress: Callable[["BacklogEngine"], Awaitable[None]], interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await progress(self)
+            except Exception as e:
+                Logging.warning(f"Failed to report backlog progress: {e}")
@@ -0,0 +1,185 @@
+import os
+import math
+import asyncio
+import datetime
+from typing import Awaitable, Callable
+
+import disnake  # noqa
+from disnake.ext import commands
+from prisma import Json
+
+from Database import DBConnector
+from Util import Configuration, Logging
+
+CLUSTER_ID = 0
+CLUSTER_COUNT = 1
+SHARD_COUNT: int | None = 1
+SHARD_IDS: list[int] | None = None
+
+POLL_INTERVAL = 2.0
+COMMAND_TTL = 3600
+
+BOT: commands.AutoShardedInteractionBot = None
+HANDLERS: dict[str, Callable[[dict], Awaitable]] = dict()
+POLL_TASK: asyncio.Task = None
+LAST_COMMAND = 0
+
+
+def initialize():
+    global CLUSTER_ID, CLUSTER_COUNT, SHARD_COUNT, SHARD_IDS
+    CLUSTER_ID = int(os.environ.get("XEROX_CLUSTER_ID", 0))
+    CLUSTER_COUNT = int(os.environ.get("XEROX_CLUSTER_COUNT", 1))
+    if "XEROX_SHARD_COUNT" in os.environ:
+        SHARD_COUNT = int(os.environ["XEROX_SHARD_COUNT"])
+        SHARD_IDS = [int(shard) for shard in os.environ["XEROX_SHARD_IDS"].split(",")]
+    elif Configuration.get_master_var("SHARDING", "off") == "auto":
+        SHARD_COUNT = Configuration.get_master_var("SHARD_COUNT", 0) or None
+        SHARD_IDS = None
+    else:
+        SHARD_COUNT = 1
+        SHARD_IDS = None
+
+
+def is_clustered() -> bool:
+    return CLUSTER_COUNT > 1
+
+
+def bot_options() -> dict:
+    options = {
+        "shard_count": SHARD_COUNT,
+        "shard_ids": SHARD_IDS,
+    }
+    if CLUSTER_ID != 0:
+        options["command_sync_flags"] = commands.CommandSyncFlags.none()
+    return options
+
+
+def log_suffix() -> str:
+    return f"-{CLUSTER_ID}" if is_clustered() else ""
+
+
+def metrics_port(port: int) -> int:
+    return port + CLUSTER_ID if port else 0
+
+
+def owns(guild_id: int) -> bool:
+    if BOT is None or BOT.shard_ids is None or BOT.shard_count is None:
+        return True
+    return (guild_id >> 22) % BOT.shard_count in BOT.shard_ids
+
+
+def label() -> str:
+    shards = BOT.shard_ids if BOT is not None and BOT.shard_ids is not None else SHARD_IDS
+    count = BOT.shard_count if BOT is not None and BOT.shard_count else SHARD_COUNT
+    if shards:
+        shard_label = f"shards {shards[0]}-{shards[-1]}" if len(shards) > 1 else f"shard {shards[0]}"
+    else:
+        shard_label = "all shards"
+    return f"cluster {CLUSTER_ID + 1}/{CLUSTER_COUNT}, {shard_label} of {count or '?'}"
+
+
+def format_latency(latency: float) -> str:
+    return f"{latency * 1000:.0f} ms" if math.isfinite(latency) else "n/a"
+
+
+def describe_shards(bot: commands.AutoShardedInteractionBot) -> list[str]:
+    guilds: dict[int, int] = dict()
+    for guild in bot.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+    return [
+        f"Shard {shard_id}: {format_latency(shard.latency)}, {guilds.get(shard_id, 0)} guild(s){', disconnected' if shard.is_closed() else ''}"
+        for shard_id, shard in sorted(bot.shards.items())
+    ]
+
+
+def on_command(name: str, handler: Callable[[dict], Awaitable]):
+    HANDLERS[name] = handler
+
+
+def remove_command(name: str):
+    HANDLERS.pop(name, None)
+
+
+async def broadcast(command: str, payload: dict = None):
+    if not is_clustered():
+        return
+    try:
+        await DBConnector.db.clustercommand.create(
+            data={
+                "command": command,
+                "payload": Json(payload or {}),
+                "origin": CLUSTER_ID
+            }
+        )
+    except Exception as e:
+        Logging.error(f"Failed to broadcast {command} to the other clusters: {e}")
+
+
+async def start(bot: commands.AutoShardedInteractionBot):
+    global BOT, POLL_TASK, POLL_INTERVAL, LAST_COMMAND
+    BOT = bot
+    POLL_INTERVAL = Configuration.get_master_var("CLUSTER_POLL_INTERVAL", 2.0)
+    if not is_clustered() or POLL_TASK is not None:
+        return
+    latest = await DBConnector.db.clustercommand.find_first(
+        order={
+            "id": "desc"
+        }
+    )
+    LAST_COMMAND = latest.id if latest is not None else 0
+    POLL_TASK = asyncio.create_task(poll())
+
+
+async def stop():
+    global POLL_TASK
+    if POLL_TASK is not None:
+        POLL_TASK.cancel()
+        POLL_TASK = None
+
+
+async def poll():
+    pruned = 0.0
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        try:
+            await run_pending()
+            if CLUSTER_ID == 0 and asyncio.get_running_loop().time() - pruned >= COMMAND_TTL:
+                pruned = asyncio.get_running_loop().time()
+                await DBConnector.db.clustercommand.delete_many(
+                    where={
+                        "created_at": {
+                            "lt": datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=COMMAND_TTL)
+                        }
+                    }
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            Logging.error(f"Failed to poll cluster commands: {e}")
+
+
+async def run_pending():
+    global LAST_COMMAND
+    pending = await DBConnector.db.clustercommand.find_many(
+        where={
+            "id": {
+                "gt": LAST_COMMAND
+            }
+        },
+        order={
+            "id": "asc"
+        }
+    )
+    for command in pending:
+        LAST_COMMAND = command.id
+        if command.origin == CLUSTER_ID:
+            continue
+        handler = HANDLERS.get(command.command)
+        if handler is None:
+            Logging.warning(f"No handler for cluster command {command.command} from cluster {command.origin + 1}.")
+            continue
+        Logging.info(f"Running cluster command {command.command} from cluster {command.origin + 1}.")
+        try:
+            await handler(command.payload or {})
+        except Exception as e:
+            Logging.error(f"Cluster command {command.command} failed: {e}")
@@ -1,37 +1,97 @@
+import os
 import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
 
 from Util import Logging
 
-MASTER_CONFIG = dict()
-MASTER_LOADED = False
+MASTER_PATH = "config/master.json"
+MASTER_CONFIG: "MasterConfig" = None
+RELOAD_LISTENERS: list[Callable[["MasterConfig"], None]] = []
 
 
-def save_master_var():
-    global MASTER_CONFIG
-    with open("config/master.json", "w") as file:
-        json.dump(MASTER_CONFIG, file, indent=4, skipkeys=True, sort_keys=True)
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True)
+class MasterConfig:
+    values: Mapping[str, Any]
+    mtime: float
+    admin_guild: int
+    bot_log_channel: int
+    bot_token: str
+    cogs: tuple[str, ...]
+    embed_color: int
+    emoji: Mapping[str, int]
+    emoji_guild: int
+    env: str
+
+    @classmethod
+    def from_dict(cls, values: dict, mtime: float) -> "MasterConfig":
+        values = freeze(values)
+        return cls(
+            values=values,
+            mtime=mtime,
+            admin_guild=int(values.get("ADMIN_GUILD", 0)),
+            bot_log_channel=int(values.get("BOT_LOG_CHANNEL", 0)),
+            bot_token=values.get("BOT_TOKEN", ""),
+            cogs=tuple(values.get("COGS", ())),
+            embed_color=int(str(values.get("EMBED_COLOR", "0x0")), 16),
+            emoji=MappingProxyType({name: int(eid) for name, eid in values.get("EMOJI", {}).items()}),
+            emoji_guild=int(values.get("EMOJI_GUILD", 0)),
+            env=values.get("ENV", ""),
+        )
 
+    def get(self, key: str, default=None):
+        return self.values.get(key, default)
 
-def load_master():
-    global MASTER_CONFIG, MASTER_LOADED
+
+def load_master() -> MasterConfig:
+    global MASTER_CONFIG
     try:
-        with open("config/master.json", "r") as file:
-            MASTER_CONFIG = json.load(file)
-            MASTER_LOADED = True
+        with open(MASTER_PATH, "r") as file:
+            values = json.load(file)
+            mtime = os.fstat(file.fileno()).st_mtime
+        MASTER_CONFIG = MasterConfig.from_dict(values, mtime)
     except Exception as e:
         Logging.error(f"Failed to load master config: {e}")
         raise e
+    return MASTER_CONFIG
 
 
-def get_master_var(key, default=None):
-    global MASTER_LOADED, MASTER_CONFIG
-    if not MASTER_LOADED:
+def reload_master(force: bool = False) -> bool:
+    if not force and MASTER_CONFIG is not None and os.stat(MASTER_PATH).st_mtime == MASTER_CONFIG.mtime:
+        return False
+    config = load_master()
+    for listener in RELOAD_LISTENERS:
+        try:
+            listener(config)
+        except Exception as e:
+            Logging.error(f"Failed to apply reloaded master config: {e}")
+    Logging.info("Reloaded master config.")
+    return True
+
+
+def on_reload(listener: Callable[[MasterConfig], None]):
+    if listener not in RELOAD_LISTENERS:
+        RELOAD_LISTENERS.append(listener)
+
+
+def get_config() -> MasterConfig:
+    if MASTER_CONFIG is None:
         load_master()
-    if key not in MASTER_CONFIG.keys():
-        MASTER_CONFIG[key] = default
-        save_master_var()
-    return MASTER_CONFIG[key]
+    return MASTER_CONFIG
+
+
+def get_master_var(key, default=None):
+    return get_config().values.get(key, default)
 
 
 def is_dev_env():
-    return get_master_var("ENV") == "dev"
+    return get_config().env == "dev"
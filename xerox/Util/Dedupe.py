@@ -0,0 +1,129 @@
+import io
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from PIL import Image
+
+POLICIES = ["forward", "skip", "link"]
+HASH_CHUNK = 1024 * 1024
+INLINE_HASH_LIMIT = 256 * 1024
+DHASH_SIZE = 8
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    digest: str
+    perceptual: int | None
+
+
+@dataclass
+class Seen:
+    digest: str
+    jump_url: str | None
+    time: float
+    perceptual: int | None
+    pending: asyncio.Future = None
+
+    async def resolve(self) -> str | None:
+        if self.pending is not None:
+            return await asyncio.shield(self.pending)
+        return self.jump_url
+
+
+def content_digest(buffer: io.IOBase) -> str:
+    h = hashlib.sha256()
+    while chunk := buffer.read(HASH_CHUNK):
+        h.update(chunk)
+    buffer.seek(0)
+    return h.hexdigest()
+
+
+def dhash(buffer: io.IOBase) -> int | None:
+    try:
+        with Image.open(buffer) as image:
+            image.draft("L", (DHASH_SIZE * 8, DHASH_SIZE * 8))
+            pixels = list(image.convert("L").resize((DHASH_SIZE + 1, DHASH_SIZE)).getdata())
+    except Exception:
+        return None
+    finally:
+        buffer.seek(0)
+    value = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            offset = row * (DHASH_SIZE + 1) + col
+            value = (value << 1) | (pixels[offset] > pixels[offset + 1])
+    return value
+
+
+def compute(buffer: io.IOBase, perceptual: bool) -> Fingerprint:
+    return Fingerprint(content_digest(buffer), dhash(buffer) if perceptual else None)
+
+
+async def fingerprint(buffer: io.IOBase, size: int, perceptual: bool) -> Fingerprint:
+    if size <= INLINE_HASH_LIMIT and not perceptual:
+        return compute(buffer, perceptual)
+    return await asyncio.to_thread(compute, buffer, perceptual)
+
+
+def similar(a: Fingerprint, b: Fingerprint, distance: int) -> bool:
+    if a.digest == b.digest:
+        return True
+    return a.perceptual is not None and b.perceptual is not None and (a.perceptual ^ b.perceptual).bit_count() <= distance
+
+
+def to_signed(value: int | None) -> int | None:
+    if value is None or value < 1 << 63:
+        return value
+    return value - (1 << 64)
+
+
+def to_unsigned(value: int | None) -> int | None:
+    if value is None or value >= 0:
+        return value
+    return value + (1 << 64)
+
+
+class DuplicateIndex:
+    def __init__(self, size: int, distance: int):
+        self.size = size
+        self.distance = distance
+        self.entries: OrderedDict[str, Seen] = OrderedDict()
+        self.loaded: asyncio.Task = None
+
+    def find(self, fingerprint: Fingerprint, window: float, now: float = None) -> Seen | None:
+        now = now or time.time()
+        seen = self.entries.get(fingerprint.digest)
+        if seen is not None and now - seen.time <= window:
+            return seen
+        if fingerprint.perceptual is None:
+            return None
+        for seen in reversed(self.entries.values()):
+            if now - seen.time > window:
+                break
+            if seen.perceptual is not None and (seen.perceptual ^ fingerprint.perceptual).bit_count() <= self.distance:
+                return seen
+        return None
+
+    def add(self, fingerprint: Fingerprint, jump_url: str | None, now: float = None) -> Seen:
+        seen = self.entries[fingerprint.digest] = Seen(fingerprint.digest, jump_url, now or time.time(), fingerprint.perceptual)
+        self.entries.move_to_end(fingerprint.digest)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return seen
+
+    def reserve(self, fingerprint: Fingerprint) -> Seen:
+        seen = self.add(fingerprint, None)
+        seen.pending = asyncio.get_running_loop().create_future()
+        return seen
+
+    def complete(self, seen: Seen, jump_url: str | None):
+        if seen.pending is None:
+            return
+        seen.jump_url = jump_url
+        seen.pending.set_result(jump_url)
+        seen.pending = None
+        if jump_url is None and self.entries.get(seen.digest) is seen:
+            del self.entries[seen.digest]
@@ -13,9 +13,10 @@ BACKUPS = {
 
 
 async def initialize(bot: InteractionBot):
-    emoji_guild = await bot.fetch_guild(Configuration.get_master_var("EMOJI_GUILD"))
+    config = Configuration.get_config()
+    emoji_guild = await bot.fetch_guild(config.emoji_guild)
     failed = []
-    for name, eid in Configuration.get_master_var("EMOJI", {}).items():
+    for name, eid in config.emoji.items():
         e = utils.get(emoji_guild.emojis, id=eid)
         if e is not None:
             emojis[name] = e
@@ -1,17 +1,18 @@
 import sys
+import json
+import queue
+import asyncio
 import traceback
 import datetime
-import zoneinfo
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 import colorama
 
 import disnake  # noqa
-from disnake import Forbidden
 from disnake.ext import commands
 
-from Database.DBConnector import get_guild_config
-from Util import Configuration, Utils
+from Database.DBConnector import get_cached_guild_config
+from Util import Configuration, Outbound
 
 colorama.init()
 
@@ -20,11 +21,19 @@ DISCORD_LOGGER = logging.getLogger("disnake")
 
 BOT: commands.Bot = None
 BOT_LOG_CHANNEL = None
+BOT_LOG_PREFIX = ""
+LISTENERS: list[QueueListener] = []
+
+MESSAGE_LIMIT = 2000
+GUILD_LOG_FLUSH_INTERVAL = 2.0
+GUILD_LOG_MAX_ENTRIES = 20
+GUILD_LOG_BUFFERS: dict[int, "GuildLogBuffer"] = dict()
+GUILD_LOG_TASKS: set[asyncio.Task] = set()
 
 
 class ColoredFormatter(logging.Formatter):
     def __init__(self, fmt, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        super().__init__(fmt, *args, **kwargs)
         self.colors = {
             "DEBUG":    colorama.Fore.CYAN,
             "INFO":     colorama.Fore.GREEN,
@@ -33,57 +42,177 @@ class ColoredFormatter(logging.Formatter):
             "CRITICAL": colorama.Fore.RED,
         }
         self.fmt = fmt
+        colored_fmt = fmt.replace(" -", colorama.Style.RESET_ALL + " -") + colorama.Style.RESET_ALL
+        self.formatters = {level: logging.Formatter(color + colored_fmt) for level, color in self.colors.items()}
 
     def format(self, record):
-        log_fmt = self.colors[record.levelname] + self.fmt.replace(" -", colorama.Style.RESET_ALL + " -") + colorama.Style.RESET_ALL
-        formatter = logging.Formatter(log_fmt)
+        formatter = self.formatters.get(record.levelname)
+        if formatter is None:
+            return super().format(record)
         return formatter.format(record)
 
 
-def setup_logging():
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class GuildLogBuffer:
+    def __init__(self):
+        self.lines: list[str] = []
+        self.size = 0
+        self.task: asyncio.Task = None
+
+    def fits(self, line: str) -> bool:
+        return len(self.lines) < GUILD_LOG_MAX_ENTRIES and self.size + len(line) + 1 <= MESSAGE_LIMIT
+
+    def append(self, line: str):
+        self.lines.append(line)
+        self.size += len(line) + 1
+
+
+def setup_logging(suffix: str = ""):
+    structured = Configuration.get_master_var("LOG_FORMAT", "text") == "json"
+
     discord_level = logging.DEBUG if Configuration.is_dev_env() else logging.WARNING
     DISCORD_LOGGER.setLevel(discord_level)
-    discord_handler = logging.FileHandler(filename="./logs/disnake.log", encoding="utf-8", mode="w")
-    discord_handler.setFormatter(ColoredFormatter("[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s"))
-    DISCORD_LOGGER.addHandler(discord_handler)
+    discord_handler = logging.FileHandler(filename=f"./logs/disnake{suffix}.log", encoding="utf-8", mode="w")
+    discord_handler.setFormatter(JsonFormatter() if structured else ColoredFormatter("[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s"))
+    add_queue_handler(DISCORD_LOGGER, discord_handler)
 
     LOGGER.setLevel(logging.DEBUG)
-    bot_handler = TimedRotatingFileHandler(filename="logs/xerox.log", when="midnight", backupCount=30, encoding="utf-8")
-    bot_handler.setFormatter(ColoredFormatter("[%(asctime)s] [%(levelname)s] - %(message)s"))
-    LOGGER.addHandler(bot_handler)
+    bot_handler = TimedRotatingFileHandler(filename=f"logs/xerox{suffix}.log", when="midnight", backupCount=30, encoding="utf-8")
+    bot_handler.setFormatter(JsonFormatter() if structured else ColoredFormatter("[%(asctime)s] [%(levelname)s] - %(message)s"))
+    handlers = [bot_handler]
     if Configuration.is_dev_env():
         stdout_handler = logging.StreamHandler(stream=sys.stdout)
         stdout_handler.setLevel(logging.WARNING)
-        LOGGER.addHandler(stdout_handler)
+        if structured:
+            stdout_handler.setFormatter(JsonFormatter())
+        handlers.append(stdout_handler)
+    add_queue_handler(LOGGER, *handlers)
+
+
+def add_queue_handler(logger: logging.Logger, *handlers: logging.Handler):
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    LISTENERS.append(listener)
 
 
-async def initialize(bot: commands.Bot, log_channel_id: str):
-    global BOT_LOG_CHANNEL, BOT
+def stop_logging():
+    while LISTENERS:
+        LISTENERS.pop().stop()
+
+
+async def initialize(bot: commands.Bot, log_channel_id: int, remote: bool = False, prefix: str = ""):
+    global BOT_LOG_CHANNEL, BOT, BOT_LOG_PREFIX
     BOT = bot
+    BOT_LOG_PREFIX = prefix
+    configure_guild_log(Configuration.get_config())
+    Configuration.on_reload(configure_guild_log)
     BOT_LOG_CHANNEL = bot.get_channel(int(log_channel_id))
+    if BOT_LOG_CHANNEL is None and remote:
+        BOT_LOG_CHANNEL = bot.get_partial_messageable(int(log_channel_id))
     if BOT_LOG_CHANNEL is None:
         LOGGER.error("-----Failed to get logging channel, aborting startup!-----")
         await bot.close()
 
 
+def configure_guild_log(config: "Configuration.MasterConfig"):
+    global GUILD_LOG_FLUSH_INTERVAL, GUILD_LOG_MAX_ENTRIES
+    GUILD_LOG_FLUSH_INTERVAL = config.get("GUILD_LOG_FLUSH_INTERVAL", 2.0)
+    GUILD_LOG_MAX_ENTRIES = config.get("GUILD_LOG_MAX_ENTRIES", 20)
+
+
 async def bot_log(message: str = None, embed: disnake.Embed = None):
     global BOT_LOG_CHANNEL
     if BOT_LOG_CHANNEL is not None:
-        return await BOT_LOG_CHANNEL.send(content=message, embed=embed)
+        if message is not None and BOT_LOG_PREFIX:
+            message = f"{BOT_LOG_PREFIX} {message}"
+        Outbound.post(BOT_LOG_CHANNEL, Outbound.Priority.LOG, content=message, embed=embed)
 
 
 async def guild_log(guild_id: int, message: str = None, embed: disnake.Embed = None, file: disnake.File = None):
+    guild_config = await get_cached_guild_config(guild_id)
+    if guild_config.config.guild_log is None:
+        return
+    timestamp = datetime.datetime.strftime(datetime.datetime.now(tz=guild_config.time_zone), "%H:%M:%S")
+    line = f"[`{timestamp}`]  " + message
+    if embed is not None or file is not None or len(line) > MESSAGE_LIMIT:
+        flush_guild_log_later(guild_id)
+        send_guild_log_later(guild_id, content=line[:MESSAGE_LIMIT], embed=embed, file=file)
+        return
+
+    buffer = GUILD_LOG_BUFFERS.get(guild_id)
+    if buffer is not None and not buffer.fits(line):
+        flush_guild_log_later(guild_id)
+        buffer = None
+    if buffer is None:
+        buffer = GUILD_LOG_BUFFERS[guild_id] = GuildLogBuffer()
+        buffer.task = asyncio.create_task(delayed_flush_guild_log(guild_id, buffer))
+    buffer.append(line)
+    if len(buffer.lines) >= GUILD_LOG_MAX_ENTRIES:
+        flush_guild_log_later(guild_id)
+
+
+async def delayed_flush_guild_log(guild_id: int, buffer: GuildLogBuffer):
+    await asyncio.sleep(GUILD_LOG_FLUSH_INTERVAL)
+    if GUILD_LOG_BUFFERS.get(guild_id) is buffer:
+        buffer.task = None
+        await flush_guild_log(guild_id)
+
+
+def take_guild_log(guild_id: int) -> str | None:
+    buffer = GUILD_LOG_BUFFERS.pop(guild_id, None)
+    if buffer is None:
+        return None
+    if buffer.task is not None:
+        buffer.task.cancel()
+    return "\n".join(buffer.lines) if buffer.lines else None
+
+
+async def flush_guild_log(guild_id: int):
+    content = take_guild_log(guild_id)
+    if content is not None:
+        await send_guild_log(guild_id, content=content)
+
+
+def flush_guild_log_later(guild_id: int):
+    content = take_guild_log(guild_id)
+    if content is not None:
+        send_guild_log_later(guild_id, content=content)
+
+
+async def flush_guild_logs():
+    for guild_id in list(GUILD_LOG_BUFFERS.keys()):
+        await flush_guild_log(guild_id)
+    if GUILD_LOG_TASKS:
+        await asyncio.wait(list(GUILD_LOG_TASKS))
+
+
+def send_guild_log_later(guild_id: int, **kwargs):
+    task = asyncio.create_task(send_guild_log(guild_id, **kwargs))
+    GUILD_LOG_TASKS.add(task)
+    task.add_done_callback(GUILD_LOG_TASKS.discard)
+
+
+async def send_guild_log(guild_id: int, content: str = None, embed: disnake.Embed = None, file: disnake.File = None):
     global BOT
-    guild_config = await get_guild_config(guild_id)
-    timezone = zoneinfo.ZoneInfo(Utils.coalesce(guild_config.time_zone, "UTC"))
-    timestamp = datetime.datetime.strftime(datetime.datetime.now(tz=timezone), "%H:%M:%S")
-    if guild_config.guild_log is not None:
-        channel = BOT.get_channel(guild_config.guild_log)
+    guild_config = await get_cached_guild_config(guild_id)
+    if guild_config.config.guild_log is not None:
+        channel = BOT.get_channel(guild_config.config.guild_log)
         if channel is not None:
-            try:
-                return await channel.send(content=f"[`{timestamp}`]  " + message, embed=embed, file=file)
-            except Forbidden:
-                LOGGER.error(f"Failed to send guild log message to {channel.id} in guild {guild_id}.")
+            Outbound.post(channel, Outbound.Priority.LOG, content=content, embed=embed, file=file)
 
 
 def debug(message: str):
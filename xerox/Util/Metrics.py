@@ -0,0 +1,217 @@
+import os
+import time
+import asyncio
+import resource
+import bisect
+from contextlib import contextmanager
+from typing import Callable
+
+from aiohttp import web
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_INTERVAL = 0.5
+
+REGISTRY: dict[str, "Metric"] = dict()
+BOT = None
+RUNNER: web.AppRunner = None
+LAG_TASK: asyncio.Task = None
+
+
+def label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def format_labels(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self.values: dict[tuple, float] = dict()
+
+    def inc(self, amount: float = 1, **labels):
+        key = label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        return super().render() + [f"{self.name}{format_labels(key)} {value}" for key, value in self.values.items()]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, description: str, callback: Callable[[], dict[tuple, float]] = None):
+        super().__init__(name, description)
+        self.values: dict[tuple, float] = dict()
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        self.values[label_key(labels)] = value
+
+    def render(self) -> list[str]:
+        values = self.callback() if self.callback is not None else self.values
+        return super().render() + [f"{self.name}{format_labels(key)} {value}" for key, value in values.items()]
+
+
+class HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = buckets
+        self.series: dict[tuple, HistogramSeries] = dict()
+
+    def observe(self, value: float, **labels):
+        key = label_key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = HistogramSeries(len(self.buckets))
+        series.counts[bisect.bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> float | None:
+        series = self.series.get(label_key(labels))
+        if series is None or series.count == 0:
+            return None
+        rank = q * series.count
+        seen = 0
+        for i, count in enumerate(series.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(key, {'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels(key, {'le': '+Inf'})} {series.count}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {series.sum}")
+            lines.append(f"{self.name}_count{format_labels(key)} {series.count}")
+        return lines
+
+
+def register(metric: Metric) -> Metric:
+    return REGISTRY.setdefault(metric.name, metric)
+
+
+def resident_memory() -> int:
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def process_memory() -> dict[tuple, float]:
+    return {label_key({}): resident_memory()}
+
+
+def gateway_latencies() -> dict[tuple, float]:
+    if BOT is None:
+        return {}
+    return {label_key({"shard": shard_id}): latency for shard_id, latency in getattr(BOT, "latencies", [(0, BOT.latency)])}
+
+
+IMAGE_MESSAGES: Counter = register(Counter("xerox_imagemonitor_messages_total", "Messages seen by the ImageMonitor, by outcome."))
+IMAGE_PHASES: Histogram = register(Histogram("xerox_imagemonitor_phase_seconds", "Time spent in each phase of forwarding a message."))
+IMAGES: Counter = register(Counter("xerox_imagemonitor_images_total", "Images redirected by the ImageMonitor."))
+IMAGE_DUPLICATES: Counter = register(Counter("xerox_imagemonitor_duplicates_total", "Duplicate images detected by the ImageMonitor, by policy."))
+TRANSCODE_SAVED: Counter = register(Counter("xerox_imagemonitor_transcode_saved_bytes_total", "Upload bytes saved by transcoding, by monitor."))
+COMMANDS: Histogram = register(Histogram("xerox_command_seconds", "Slash command latency."))
+DB_QUERIES: Histogram = register(Histogram("xerox_db_query_seconds", "Database query latency."))
+LOOP_LAG: Histogram = register(Histogram("xerox_event_loop_lag_seconds", "Delay of event loop wake-ups past their schedule."))
+GATEWAY_LATENCY: Gauge = register(Gauge("xerox_gateway_latency_seconds", "Gateway heartbeat latency.", gateway_latencies))
+MEMORY: Gauge = register(Gauge("xerox_process_resident_memory_bytes", "Resident memory of the bot process.", process_memory))
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY.values():
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render(), content_type="text/plain")
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    healthy = BOT is not None and BOT.is_ready() and not BOT.is_closed()
+    return web.json_response(
+        {
+            "status": "ok" if healthy else "unavailable",
+            "latency": BOT.latency if healthy else None,
+        },
+        status=200 if healthy else 503
+    )
+
+
+async def measure_loop_lag():
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        LOOP_LAG.observe(max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL))
+
+
+async def start(bot, host: str, port: int):
+    global BOT, RUNNER, LAG_TASK
+    BOT = bot
+    if LAG_TASK is None:
+        LAG_TASK = asyncio.create_task(measure_loop_lag())
+    if RUNNER is not None or not port:
+        return
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/health", handle_health)
+    RUNNER = web.AppRunner(app, access_log=None)
+    await RUNNER.setup()
+    await web.TCPSite(RUNNER, host, port).start()
+
+
+async def stop():
+    global RUNNER, LAG_TASK
+    if LAG_TASK is not None:
+        LAG_TASK.cancel()
+        LAG_TASK = None
+    if RUNNER is not None:
+        await RUNNER.cleanup()
+        RUNNER = None
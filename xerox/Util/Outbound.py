@@ -0,0 +1,182 @@
+import time
+import heapq
+import asyncio
+import itertools
+from enum import IntEnum
+
+import disnake  # noqa
+from disnake.abc import Messageable
+
+from Util import Configuration, Logging
+
+MESSAGE_LIMIT = 2000
+MAX_QUEUE_DEPTH = 50
+CHANNEL_CONCURRENCY = 1
+
+QUEUES: dict[int, "ChannelQueue"] = dict()
+SEQUENCE = itertools.count()
+
+
+class Priority(IntEnum):
+    REDIRECT = 0
+    USER = 1
+    LOG = 2
+
+
+class OutboundMessage:
+    __slots__ = ("priority", "seq", "kwargs", "future", "enqueued", "followers")
+
+    def __init__(self, priority: Priority, kwargs: dict):
+        self.priority = priority
+        self.seq = next(SEQUENCE)
+        self.kwargs = kwargs
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.perf_counter()
+        self.followers: list[OutboundMessage] = []
+
+    def __lt__(self, other: "OutboundMessage"):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def mergeable(self) -> bool:
+        return self.priority == Priority.LOG and self.kwargs.keys() == {"content"} and bool(self.kwargs["content"])
+
+    def merge(self, other: "OutboundMessage") -> bool:
+        if not self.mergeable() or not other.mergeable():
+            return False
+        content = self.kwargs["content"] + "\n" + other.kwargs["content"]
+        if len(content) > MESSAGE_LIMIT:
+            return False
+        self.kwargs["content"] = content
+        self.followers.append(other)
+        return True
+
+
+class ChannelQueue:
+    def __init__(self, channel: Messageable):
+        self.channel = channel
+        self.heap: list[OutboundMessage] = []
+        self.workers: set[asyncio.Task] = set()
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.total_wait = {priority: 0.0 for priority in Priority}
+        self.max_wait = {priority: 0.0 for priority in Priority}
+        self.waits = {priority: 0 for priority in Priority}
+
+    @property
+    def depth(self) -> int:
+        return len(self.heap)
+
+    def put(self, message: OutboundMessage):
+        if self.depth >= MAX_QUEUE_DEPTH and not self.shed(message):
+            self.drop(message)
+            return
+        heapq.heappush(self.heap, message)
+        if len(self.workers) < CHANNEL_CONCURRENCY:
+            self.workers.add(asyncio.create_task(self.run()))
+
+    def shed(self, message: OutboundMessage) -> bool:
+        if message.priority == Priority.LOG:
+            pending = [m for m in self.heap if m.priority == Priority.LOG]
+            if pending and max(pending).merge(message):
+                self.merged += 1
+                return True
+            return False
+        victims = [m for m in self.heap if m.priority == Priority.LOG]
+        if victims:
+            victim = max(victims)
+            self.heap.remove(victim)
+            heapq.heapify(self.heap)
+            self.drop(victim)
+        return True
+
+    def drop(self, message: OutboundMessage):
+        for m in (message, *message.followers):
+            self.dropped += 1
+            if not m.future.done():
+                m.future.set_result(None)
+
+    async def run(self):
+        try:
+            while self.heap:
+                await self.send(heapq.heappop(self.heap))
+        finally:
+            self.workers.discard(asyncio.current_task())
+
+    async def send(self, message: OutboundMessage):
+        while self.heap and message.mergeable() and message.merge(self.heap[0]):
+            heapq.heappop(self.heap)
+            self.merged += 1
+        batch = [message, *message.followers]
+        now = time.perf_counter()
+        for m in batch:
+            wait = now - m.enqueued
+            self.total_wait[m.priority] += wait
+            self.max_wait[m.priority] = max(self.max_wait[m.priority], wait)
+            self.waits[m.priority] += 1
+        try:
+            result = await self.channel.send(**message.kwargs)
+        except Exception as e:
+            for m in batch:
+                if not m.future.done():
+                    m.future.set_exception(e)
+        else:
+            self.sent += 1
+            for m in batch:
+                if not m.future.done():
+                    m.future.set_result(result)
+
+
+def initialize():
+    configure(Configuration.get_config())
+    Configuration.on_reload(configure)
+
+
+def configure(config: "Configuration.MasterConfig"):
+    global MAX_QUEUE_DEPTH, CHANNEL_CONCURRENCY
+    MAX_QUEUE_DEPTH = config.get("OUTBOUND_MAX_QUEUE_DEPTH", 50)
+    CHANNEL_CONCURRENCY = max(1, config.get("OUTBOUND_CHANNEL_CONCURRENCY", 1))
+
+
+def enqueue(channel: Messageable, priority: Priority, **kwargs) -> asyncio.Future:
+    key = getattr(channel, "id", id(channel))
+    queue = QUEUES.get(key)
+    if queue is None:
+        queue = QUEUES[key] = ChannelQueue(channel)
+    message = OutboundMessage(priority, {k: v for k, v in kwargs.items() if v is not None})
+    queue.put(message)
+    return message.future
+
+
+async def send(channel: Messageable, priority: Priority = Priority.USER, **kwargs) -> disnake.Message | None:
+    return await enqueue(channel, priority, **kwargs)
+
+
+def post(channel: Messageable, priority: Priority = Priority.LOG, **kwargs):
+    enqueue(channel, priority, **kwargs).add_done_callback(report_failure)
+
+
+def report_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        Logging.error(f"Failed to send queued message: {future.exception()}")
+
+
+async def drain(timeout: float = 10.0):
+    workers = [worker for queue in QUEUES.values() for worker in queue.workers]
+    if workers:
+        await asyncio.wait(workers, timeout=timeout)
+
+
+def stats() -> list[dict]:
+    out = []
+    for channel_id, queue in QUEUES.items():
+        out.append({
+            "channel": channel_id,
+            "depth": queue.depth,
+            "sent": queue.sent,
+            "merged": queue.merged,
+            "dropped": queue.dropped,
+            "avg_wait": {p.name: queue.total_wait[p] / queue.waits[p] for p in Priority if queue.waits[p]},
+            "max_wait": {p.name: queue.max_wait[p] for p in Priority if queue.waits[p]},
+        })
+    return out
@@ -0,0 +1,120 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from Util import Configuration
+
+POLICIES = ["warn", "queue", "drop"]
+
+IDLE_TIMEOUT = 600.0
+MAX_BUCKETS = 100000
+MAX_QUEUE_DELAY = 30.0
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated", "warned")
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+        self.warned = False
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float) -> float:
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def idle(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst and now - self.updated >= IDLE_TIMEOUT
+
+
+class BucketStore:
+    def __init__(self):
+        self.buckets: OrderedDict[tuple, TokenBucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+    def get(self, key: tuple, rate: float, burst: int, now: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.evict(now)
+            bucket = self.buckets[key] = TokenBucket(rate, burst, now)
+        else:
+            self.buckets.move_to_end(key)
+            bucket.refill(now)
+            bucket.rate = rate
+            bucket.burst = burst
+            bucket.tokens = min(bucket.tokens, burst)
+        return bucket
+
+    def evict(self, now: float):
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if not bucket.idle(now) and len(self.buckets) < MAX_BUCKETS:
+                break
+            del self.buckets[key]
+
+    def clear(self, prefix: int):
+        for key in [key for key in self.buckets if key[0] == prefix]:
+            del self.buckets[key]
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    delay: float = 0.0
+    warn: bool = False
+
+
+USERS = BucketStore()
+CHANNELS = BucketStore()
+
+
+def initialize():
+    configure(Configuration.get_config())
+    Configuration.on_reload(configure)
+
+
+def configure(config: "Configuration.MasterConfig"):
+    global IDLE_TIMEOUT, MAX_BUCKETS, MAX_QUEUE_DELAY
+    IDLE_TIMEOUT = config.get("RATE_LIMIT_IDLE_TIMEOUT", 600.0)
+    MAX_BUCKETS = config.get("RATE_LIMIT_MAX_BUCKETS", 100000)
+    MAX_QUEUE_DELAY = config.get("RATE_LIMIT_MAX_QUEUE_DELAY", 30.0)
+
+
+def is_limited(monitor) -> bool:
+    return monitor.rate_user > 0 or monitor.rate_channel > 0
+
+
+def check(monitor, user_id: int, cost: int) -> Decision:
+    now = time.monotonic()
+    buckets = []
+    if monitor.rate_user > 0:
+        buckets.append(USERS.get((monitor.id, user_id), monitor.rate_user / 60, monitor.rate_user_burst, now))
+    if monitor.rate_channel > 0:
+        buckets.append(CHANNELS.get((monitor.id,), monitor.rate_channel / 60, monitor.rate_channel_burst, now))
+    delay = 0.0
+    for bucket in buckets:
+        delay = max(delay, bucket.wait_time(min(cost, bucket.burst)))
+    if delay == 0.0:
+        for bucket in buckets:
+            bucket.tokens -= min(cost, bucket.burst)
+            bucket.warned = False
+        return Decision(True)
+    if monitor.rate_overflow == "queue" and delay <= MAX_QUEUE_DELAY:
+        for bucket in buckets:
+            bucket.tokens -= min(cost, bucket.burst)
+        return Decision(True, delay)
+    warn = monitor.rate_overflow != "drop" and not buckets[0].warned
+    buckets[0].warned = True
+    return Decision(False, delay, warn)
+
+
+def forget(monitor_id: int):
+    USERS.clear(monitor_id)
+    CHANNELS.clear(monitor_id)
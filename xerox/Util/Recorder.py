@@ -0,0 +1,162 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+from typing import Iterable
+
+import disnake  # noqa
+from disnake import Message
+
+from Util import Configuration, Logging
+
+FORMAT_VERSION = 1
+FLUSH_INTERVAL = 5.0
+FLUSH_ENTRIES = 500
+MONITOR_SETTINGS = [
+    "duplicate_policy", "duplicate_window", "duplicate_perceptual",
+    "transcode_format", "transcode_quality", "transcode_max_dimension", "transcode_max_bytes",
+    "rate_user", "rate_user_burst", "rate_channel", "rate_channel_burst", "rate_overflow",
+]
+
+PATH: str = None
+FILE: gzip.GzipFile = None
+SALT: bytes = b""
+STARTED: float = 0.0
+BUFFER: list[str] = []
+FLUSH_TASK: asyncio.Task = None
+LOCK = asyncio.Lock()
+MONITORS: list[dict] = []
+RECORDED = 0
+
+
+def initialize():
+    configure(Configuration.get_config())
+    Configuration.on_reload(configure)
+
+
+def configure(config: "Configuration.MasterConfig"):
+    global FLUSH_INTERVAL, FLUSH_ENTRIES
+    FLUSH_INTERVAL = config.get("RECORD_FLUSH_INTERVAL", 5.0)
+    FLUSH_ENTRIES = config.get("RECORD_FLUSH_ENTRIES", 500)
+    path = config.get("RECORD_EVENTS_PATH") or None
+    if path != PATH:
+        asyncio.get_running_loop().create_task(switch(path))
+
+
+def is_recording() -> bool:
+    return FILE is not None
+
+
+def anonymize(id: int) -> int:
+    return int.from_bytes(hashlib.blake2b(id.to_bytes(8, "little"), key=SALT, digest_size=7).digest(), "little")
+
+
+def extension(filename: str) -> str:
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def elapsed() -> float:
+    return round(time.monotonic() - STARTED, 4)
+
+
+def monitor_entry(monitor) -> dict:
+    return {
+        "g": anonymize(monitor.guild),
+        "f": anonymize(monitor.from_channel),
+        "t": anonymize(monitor.to_channel),
+        "l": monitor.limit,
+        "b": monitor.batch,
+        "c": {setting: getattr(monitor, setting) for setting in MONITOR_SETTINGS},
+    }
+
+
+def write(entry: dict):
+    global FLUSH_TASK
+    BUFFER.append(json.dumps(entry, separators=(",", ":")))
+    if len(BUFFER) >= FLUSH_ENTRIES:
+        asyncio.get_running_loop().create_task(flush())
+    elif FLUSH_TASK is None or FLUSH_TASK.done():
+        FLUSH_TASK = asyncio.get_running_loop().create_task(delayed_flush())
+
+
+def record(message: Message):
+    global RECORDED
+    if FILE is None or message.guild is None:
+        return
+    RECORDED += 1
+    write(
+        {
+            "k": "m",
+            "t": elapsed(),
+            "g": anonymize(message.guild.id),
+            "c": anonymize(message.channel.id),
+            "a": anonymize(message.author.id),
+            "b": message.author.bot,
+            "n": len(message.content),
+            "f": [[attachment.size, extension(attachment.filename)] for attachment in message.attachments],
+        }
+    )
+
+
+def record_monitors(monitors: Iterable):
+    global MONITORS
+    MONITORS = list(monitors)
+    if FILE is not None:
+        write({"k": "i", "t": elapsed(), "m": [monitor_entry(monitor) for monitor in MONITORS]})
+
+
+async def delayed_flush():
+    await asyncio.sleep(FLUSH_INTERVAL)
+    await flush()
+
+
+async def flush():
+    async with LOCK:
+        if FILE is None or not BUFFER:
+            return
+        data = ("\n".join(BUFFER) + "\n").encode()
+        BUFFER.clear()
+        try:
+            await asyncio.to_thread(FILE.write, data)
+        except Exception as e:
+            Logging.error(f"Failed to write recorded events to {PATH}: {e}")
+
+
+async def switch(path: str | None):
+    global PATH, FILE, SALT, STARTED, RECORDED
+    await stop()
+    if path is None:
+        return
+    async with LOCK:
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            FILE = await asyncio.to_thread(gzip.open, path, "ab")
+        except Exception as e:
+            Logging.error(f"Failed to open event recording {path}: {e}")
+            return
+        PATH = path
+        SALT = os.urandom(16)
+        STARTED = time.monotonic()
+        RECORDED = 0
+    write({"k": "h", "v": FORMAT_VERSION, "t": 0.0, "started": time.time()})
+    record_monitors(MONITORS)
+    Logging.info(f"Recording gateway events to {path}.")
+
+
+async def stop():
+    global PATH, FILE
+    if FLUSH_TASK is not None:
+        FLUSH_TASK.cancel()
+    await flush()
+    async with LOCK:
+        if FILE is None:
+            return
+        try:
+            await asyncio.to_thread(FILE.close)
+        except Exception as e:
+            Logging.error(f"Failed to close event recording {PATH}: {e}")
+        Logging.info(f"Stopped recording gateway events to {PATH} after {RECORDED} messages.")
+        FILE = None
+        PATH = None
@@ -0,0 +1,168 @@
+import time
+import asyncio
+import datetime
+
+import disnake  # noqa
+from disnake import Message
+
+from Database import DBConnector
+from Util import Cluster, Configuration, Logging
+
+FLUSH_INTERVAL = 10.0
+FLUSH_ENTRIES = 500
+RETENTION_DAYS = 90
+PRUNE_INTERVAL = 3600
+
+BUFFER: list[dict] = []
+ROLLUPS: dict[tuple[int, int, int, datetime.datetime], list[int]] = dict()
+FLUSH_TASK: asyncio.Task = None
+LOCK = asyncio.Lock()
+PRUNED = 0.0
+
+
+def initialize():
+    configure(Configuration.get_config())
+    Configuration.on_reload(configure)
+
+
+def configure(config: "Configuration.MasterConfig"):
+    global FLUSH_INTERVAL, FLUSH_ENTRIES, RETENTION_DAYS
+    FLUSH_INTERVAL = config.get("REDIRECT_FLUSH_INTERVAL", 10.0)
+    FLUSH_ENTRIES = config.get("REDIRECT_FLUSH_ENTRIES", 500)
+    RETENTION_DAYS = config.get("REDIRECT_RETENTION_DAYS", 90)
+
+
+def hour_of(moment: datetime.datetime) -> datetime.datetime:
+    return moment.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def record(message: Message, monitor, images: int, duplicates: int):
+    global FLUSH_TASK
+    now = datetime.datetime.now(datetime.timezone.utc)
+    BUFFER.append(
+        {
+            "monitor": monitor.id,
+            "guild": monitor.guild,
+            "channel": message.channel.id,
+            "target": monitor.to_channel,
+            "user": message.author.id,
+            "message": message.id,
+            "images": images,
+            "duplicates": duplicates,
+            "created_at": now
+        }
+    )
+    rollup = ROLLUPS.setdefault((monitor.id, monitor.guild, message.author.id, hour_of(now)), [0, 0])
+    rollup[0] += 1
+    rollup[1] += images
+    if len(BUFFER) >= FLUSH_ENTRIES:
+        asyncio.get_running_loop().create_task(flush())
+    elif FLUSH_TASK is None or FLUSH_TASK.done():
+        FLUSH_TASK = asyncio.get_running_loop().create_task(delayed_flush())
+
+
+async def delayed_flush():
+    await asyncio.sleep(FLUSH_INTERVAL)
+    await flush()
+
+
+def restore(rows: list[dict], rollups: dict[tuple[int, int, int, datetime.datetime], list[int]]):
+    BUFFER[:0] = rows
+    for key, (redirects, images) in rollups.items():
+        rollup = ROLLUPS.setdefault(key, [0, 0])
+        rollup[0] += redirects
+        rollup[1] += images
+
+
+async def flush():
+    global ROLLUPS
+    async with LOCK:
+        rows = BUFFER[:]
+        rollups = ROLLUPS
+        BUFFER.clear()
+        ROLLUPS = dict()
+        if rows:
+            try:
+                await DBConnector.db.redirect.create_many(data=rows)
+            except Exception as e:
+                restore(rows, rollups)
+                Logging.error(f"Failed to save {len(rows)} redirects: {e}")
+                return
+        if rollups:
+            try:
+                async with DBConnector.db.batch_() as batcher:
+                    for (monitor, guild, user, hour), (redirects, images) in rollups.items():
+                        batcher.redirectrollup.upsert(
+                            where={
+                                "monitor_user_hour": {
+                                    "monitor": monitor,
+                                    "user": user,
+                                    "hour": hour
+                                }
+                            },
+                            data={
+                                "create": {
+                                    "monitor": monitor,
+                                    "guild": guild,
+                                    "user": user,
+                                    "hour": hour,
+                                    "redirects": redirects,
+                                    "images": images
+                                },
+                                "update": {
+                                    "redirects": {
+                                        "increment": redirects
+                                    },
+                                    "images": {
+                                        "increment": images
+                                    }
+                                }
+                            }
+                        )
+            except Exception as e:
+                restore([], rollups)
+                Logging.error(f"Failed to update {len(rollups)} redirect rollups: {e}")
+                return
+        await prune()
+
+
+async def prune():
+    global PRUNED
+    if Cluster.CLUSTER_ID != 0 or not RETENTION_DAYS or time.monotonic() - PRUNED < PRUNE_INTERVAL:
+        return
+    PRUNED = time.monotonic()
+    try:
+        await DBConnector.db.redirect.delete_many(
+            where={
+                "created_at": {
+                    "lt": datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=RETENTION_DAYS)
+                }
+            }
+        )
+    except Exception as e:
+        Logging.error(f"Failed to prune old redirects: {e}")
+
+
+async def stop():
+    if FLUSH_TASK is not None:
+        FLUSH_TASK.cancel()
+    await flush()
+
+
+async def totals(guild: int, since: datetime.datetime, by: str, **where) -> list[tuple[int, int, int]]:
+    groups = await DBConnector.db.redirectrollup.group_by(
+        by=[by],
+        where={
+            "guild": guild,
+            "hour": {
+                "gte": hour_of(since)
+            },
+            **where
+        },
+        sum={
+            "redirects": True,
+            "images": True
+        }
+    )
+    results = [(group[by], group["_sum"]["redirects"] or 0, group["_sum"]["images"] or 0) for group in groups]
+    return sorted(results, key=lambda result: (result[1], result[2]), reverse=True)
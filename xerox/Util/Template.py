@@ -0,0 +1,57 @@
+import re
+from dataclasses import dataclass
+
+VARIABLES = {
+    "user": "A user mention, e.g. @user",
+    "author_name": "The name of the user who sent the image(s)",
+    "channel": "A mention of the channel the image(s) were sent in",
+    "target": "A mention of the channel the image(s) were redirected to",
+    "count": "The number of images that were redirected",
+    "jump_url": "A link to the redirected image(s)",
+}
+MAX_LENGTH = 2000
+
+TOKEN = re.compile(r"{{(.*?)}}", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class Template:
+    parts: tuple[str, ...]
+    variables: tuple[str, ...]
+
+    def render(self, values: dict[str, str]) -> str:
+        if not self.variables:
+            return self.parts[0]
+        out = [self.parts[0]]
+        for name, part in zip(self.variables, self.parts[1:]):
+            out.append(values[name])
+            out.append(part)
+        return "".join(out)
+
+
+def parse(source: str, strict: bool = True) -> Template:
+    parts = []
+    variables = []
+    literal = []
+    position = 0
+    for match in TOKEN.finditer(source):
+        literal.append(source[position:match.start()])
+        position = match.end()
+        name = match.group(1).strip()
+        if name not in VARIABLES:
+            if strict:
+                raise ValueError(f"Unknown variable `{{{{{name}}}}}`, available variables are {', '.join(f'`{{{{{v}}}}}`' for v in VARIABLES)}.")
+            literal.append(match.group(0))
+            continue
+        parts.append("".join(literal))
+        variables.append(name)
+        literal = []
+    literal.append(source[position:])
+    parts.append("".join(literal))
+    if strict:
+        for part in parts:
+            if "{{" in part or "}}" in part:
+                raise ValueError("Unbalanced braces, variables must be written as `{{name}}`.")
+        if len(source) > MAX_LENGTH:
+            raise ValueError(f"The message must be at most {MAX_LENGTH} characters long.")
+    return Template(tuple(parts), tuple(variables))
@@ -0,0 +1,84 @@
+import re
+import bisect
+import asyncio
+import zoneinfo
+
+MAX_RESULTS = 25
+DEFAULT = "UTC"
+SEPARATORS = re.compile(r"[^a-z0-9+]+")
+
+ZONES: list[str] = []
+LOWERED: list[str] = []
+CANONICAL: dict[str, str] = dict()
+TOKENS: list[frozenset[str]] = []
+PREFIXES: dict[str, set[int]] = dict()
+CACHE: dict[str, zoneinfo.ZoneInfo] = dict()
+
+
+def tokenize(value: str) -> list[str]:
+    return [token for token in SEPARATORS.split(value.lower()) if token]
+
+
+def build():
+    global ZONES, LOWERED, CANONICAL, TOKENS, PREFIXES
+    zones = sorted(zoneinfo.available_timezones(), key=str.lower)
+    tokens = [frozenset(tokenize(zone)) for zone in zones]
+    prefixes: dict[str, set[int]] = dict()
+    for i, zone_tokens in enumerate(tokens):
+        for token in zone_tokens:
+            for end in range(1, len(token) + 1):
+                prefixes.setdefault(token[:end], set()).add(i)
+    ZONES = zones
+    LOWERED = [zone.lower() for zone in zones]
+    CANONICAL = {zone.lower(): zone for zone in zones}
+    TOKENS = tokens
+    PREFIXES = prefixes
+
+
+async def initialize():
+    if not ZONES:
+        await asyncio.to_thread(build)
+
+
+def canonical(name: str) -> str | None:
+    if not ZONES:
+        build()
+    return CANONICAL.get(name.strip().lower())
+
+
+def get(name: str | None) -> zoneinfo.ZoneInfo:
+    name = name or DEFAULT
+    zone = CACHE.get(name)
+    if zone is None:
+        try:
+            zone = zoneinfo.ZoneInfo(name)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            zone = get(DEFAULT) if name != DEFAULT else zoneinfo.ZoneInfo(DEFAULT)
+        CACHE[name] = zone
+    return zone
+
+
+def search(query: str, limit: int = MAX_RESULTS) -> list[str]:
+    if not ZONES:
+        build()
+    query = query.strip().lower()
+    if not query:
+        return ZONES[:limit]
+    results = []
+    start = bisect.bisect_left(LOWERED, query)
+    while start < len(LOWERED) and LOWERED[start].startswith(query) and len(results) < limit:
+        results.append(start)
+        start += 1
+    tokens = tokenize(query)
+    if tokens and len(results) < limit:
+        matches = None
+        for token in sorted(tokens, key=len, reverse=True):
+            found = PREFIXES.get(token)
+            if not found:
+                matches = set()
+                break
+            matches = set(found) if matches is None else matches & found
+        seen = set(results)
+        ranked = sorted((i for i in matches if i not in seen), key=lambda i: (not TOKENS[i].issuperset(tokens), len(ZONES[i]), ZONES[i]))
+        results.extend(ranked[:limit - len(results)])
+    return [ZONES[i] for i in results]
@@ -0,0 +1,92 @@
+import io
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+from Util import Configuration, Logging
+
+FORMATS = ["webp", "jpeg"]
+EXTENSIONS = {
+    "webp": ".webp",
+    "jpeg": ".jpg",
+}
+TRANSCODABLE = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+
+POOL: ProcessPoolExecutor = None
+WORKERS = 2
+
+
+def initialize():
+    configure(Configuration.get_config())
+    Configuration.on_reload(configure)
+
+
+def configure(config: "Configuration.MasterConfig"):
+    global WORKERS
+    WORKERS = max(1, config.get("TRANSCODE_WORKERS", 2))
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global POOL
+    if POOL is None:
+        POOL = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return POOL
+
+
+def shutdown():
+    global POOL
+    if POOL is not None:
+        POOL.shutdown(wait=False, cancel_futures=True)
+        POOL = None
+
+
+def needed(extension: str, size: int, width: int | None, height: int | None, max_bytes: int, max_dimension: int) -> bool:
+    if extension.lower() not in TRANSCODABLE:
+        return False
+    if size > max_bytes:
+        return True
+    return width is None or height is None or max(width, height) > max_dimension
+
+
+def encode(data: bytes, fmt: str, quality: int, max_dimension: int) -> bytes | None:
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if getattr(image, "is_animated", False):
+                return None
+            image.draft("RGB", (max_dimension, max_dimension))
+            image = ImageOps.exif_transpose(image)
+            if max(image.size) > max_dimension:
+                image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+            has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            if fmt == "jpeg":
+                if has_alpha:
+                    return None
+                image = image.convert("RGB")
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if has_alpha else "RGB")
+            out = io.BytesIO()
+            options = {"method": 2} if fmt == "webp" else {"optimize": True, "progressive": True}
+            image.save(out, fmt.upper(), quality=quality, **options)
+    except Exception:
+        return None
+    result = out.getvalue()
+    return result if len(result) < len(data) else None
+
+
+async def transcode(buffer: io.IOBase, fmt: str, quality: int, max_dimension: int) -> bytes | None:
+    if isinstance(buffer, io.BytesIO):
+        data = buffer.getvalue()
+    else:
+        data = await asyncio.to_thread(buffer.read)
+        await asyncio.to_thread(buffer.seek, 0)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_pool(), encode, data, fmt, quality, max_dimension)
+    except BrokenProcessPool as e:
+        Logging.error(f"Image transcoding pool broke, restarting it: {e}")
+        shutdown()
+    except Exception as e:
+        Logging.error(f"Image transcoding failed: {e}")
+    return None
@@ -11,7 +11,7 @@ def default_embed(title=None, description=None, author=None, icon_url=None):
         title=title,
         description=description,
         timestamp=now,
-        color=disnake.Color(int(Configuration.get_master_var("EMBED_COLOR"), 16))
+        color=disnake.Color(Configuration.get_config().embed_color)
     )
     if author and icon_url:
         embed.set_footer(
@@ -0,0 +1,24 @@
+import os
+import sys
+import json
+import urllib.request
+
+MASTER_PATH = "config/master.json"
+LOCAL_HOSTS = {"", "0.0.0.0", "::"}
+
+
+if __name__ == "__main__":
+    with open(MASTER_PATH, "r") as file:
+        values = json.load(file)
+    port = values.get("METRICS_PORT", 0)
+    if not port:
+        sys.exit(0)
+    host = values.get("METRICS_HOST", "127.0.0.1")
+    if host in LOCAL_HOSTS:
+        host = "127.0.0.1"
+    port += int(os.environ.get("XEROX_CLUSTER_ID", 0))
+    try:
+        urllib.request.urlopen(f"http://{host}:{port}/health", timeout=3)
+    except Exception as e:
+        print(f"Health check failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,139 @@
+import os
+import sys
+import math
+import signal
+import asyncio
+import argparse
+
+import aiohttp
+
+from Util import Configuration, Logging
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+BOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "xerox.py")
+IDENTIFY_INTERVAL = 5.0
+RESTART_DELAY = 5.0
+MAX_RESTART_DELAY = 60.0
+STABLE_AFTER = 60.0
+STOP_TIMEOUT = 30.0
+
+
+class Worker:
+    def __init__(self, cluster_id: int, cluster_count: int, shard_count: int, shard_ids: list[int]):
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+        self.process: asyncio.subprocess.Process = None
+
+    @property
+    def name(self) -> str:
+        return f"cluster {self.cluster_id + 1}/{self.cluster_count} (shards {self.shard_ids[0]}-{self.shard_ids[-1]} of {self.shard_count})"
+
+    def environment(self) -> dict:
+        return {
+            **os.environ,
+            "XEROX_CLUSTER_ID": str(self.cluster_id),
+            "XEROX_CLUSTER_COUNT": str(self.cluster_count),
+            "XEROX_SHARD_COUNT": str(self.shard_count),
+            "XEROX_SHARD_IDS": ",".join(str(shard) for shard in self.shard_ids),
+        }
+
+    async def spawn(self):
+        self.process = await asyncio.create_subprocess_exec(sys.executable, BOT_PATH, env=self.environment())
+        Logging.info(f"Started {self.name} as pid {self.process.pid}.")
+
+    async def supervise(self, stopping: asyncio.Event):
+        delay = RESTART_DELAY
+        loop = asyncio.get_running_loop()
+        while not stopping.is_set():
+            if self.process is None:
+                await self.spawn()
+            started = loop.time()
+            code = await self.process.wait()
+            self.process = None
+            if stopping.is_set():
+                break
+            delay = RESTART_DELAY if loop.time() - started >= STABLE_AFTER else min(delay * 2, MAX_RESTART_DELAY)
+            Logging.warning(f"{self.name} exited with code {code}, restarting in {delay:.0f}s.")
+            try:
+                await asyncio.wait_for(stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(self.process.wait(), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            Logging.warning(f"{self.name} did not stop within {STOP_TIMEOUT:.0f}s, killing it.")
+            self.process.kill()
+
+
+def split(shard_count: int, processes: int) -> list[list[int]]:
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+async def fetch_gateway(token: str) -> tuple[int, int]:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+async def launch(args: argparse.Namespace):
+    shard_count = args.shards or Configuration.get_master_var("SHARD_COUNT", 0)
+    max_concurrency = 1
+    if not shard_count:
+        shard_count, max_concurrency = await fetch_gateway(Configuration.get_config().bot_token)
+    processes = args.processes or Configuration.get_master_var("CLUSTER_PROCESSES", 1)
+    ranges = split(shard_count, processes)
+    workers = [Worker(i, len(ranges), shard_count, shard_ids) for i, shard_ids in enumerate(ranges)]
+    Logging.info(f"Launching {shard_count} shard(s) across {len(workers)} process(es).")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig_name in ("SIGINT", "SIGTERM"):
+        loop.add_signal_handler(getattr(signal, sig_name), stopping.set)
+
+    supervisors = []
+    for worker in workers:
+        if stopping.is_set():
+            break
+        await worker.spawn()
+        supervisors.append(asyncio.create_task(worker.supervise(stopping)))
+        try:
+            await asyncio.wait_for(stopping.wait(), math.ceil(len(worker.shard_ids) / max_concurrency) * IDENTIFY_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+    await stopping.wait()
+    Logging.info("Stopping all clusters.")
+    await asyncio.gather(*(worker.stop() for worker in workers))
+    await asyncio.gather(*supervisors)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run xerox as several processes, each owning a range of shards.")
+    parser.add_argument("--processes", type=int, help="Number of bot processes, defaults to CLUSTER_PROCESSES.")
+    parser.add_argument("--shards", type=int, help="Total shard count, defaults to SHARD_COUNT or Discord's recommendation.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    Logging.setup_logging("-launcher")
+    try:
+        asyncio.run(launch(args))
+    finally:
+        Logging.stop_logging()
@@ -2,20 +2,21 @@ import signal
 import asyncio
 
 import disnake  # noqa
-from disnake import Intents
 
-from Bot.xerox import xerox
+from Bot.xerox import cache_options, xerox
 from Database import DBConnector
-from Util import Configuration, Logging
+from Util import Cluster, Configuration, Logging
 
 
 async def startup():
-    Logging.setup_logging()
-    await DBConnector.connect()
+    Cluster.initialize()
+    Logging.setup_logging(Cluster.log_suffix())
+    await DBConnector.connect(Configuration.get_master_var("DB_SLOW_QUERY_MS", 250))
 
 
 async def shutdown():
     await DBConnector.disconnect()
+    Logging.stop_logging()
 
 
 if __name__ == "__main__":
@@ -23,24 +24,15 @@ if __name__ == "__main__":
     asyncio.set_event_loop(loop)
     loop.run_until_complete(startup())
     Logging.info("--------------")
-    Logging.info("Starting up.")
-
-    intents = Intents(
-        guilds=True,
-        members=True,
-        emojis=True,
-        messages=True,
-        reactions=True,
-        message_content=True,
-        moderation=True
-    )
+    Logging.info(f"Starting up ({Cluster.label()}).")
 
     args = {
-        "intents": intents,
+        **cache_options(Configuration.get_config().cogs, Configuration.get_master_var("MEMORY_PROFILE", "default")),
+        **Cluster.bot_options(),
     }
 
     xerox = xerox(**args)
-    xerox.run(Configuration.get_master_var("BOT_TOKEN", ""))
+    xerox.run(Configuration.get_config().bot_token)
 
     try:
         for sig_name in ("SIGINT", "SIGTERM"):